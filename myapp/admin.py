@@ -1,34 +1,35 @@
+from datetime import date
+
 from django.contrib import admin
-from .models import AppUser, Paciente, HistoriaClinica, AnalisisFinal, RecursoMedico, Noticia
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Case, F, Q, Value, When
+from django.db.models.functions import ExtractYear, Left
+from django.forms.models import BaseInlineFormSet
+from django.urls import reverse
+from django.utils.html import format_html
+from django.utils.functional import cached_property
+
+from .services import busqueda_pacientes
+from .models import AppUser, Paciente, HistoriaClinica, AnalisisFinal, RecursoMedico, Noticia, PrediccionCache, TrabajoPrediccion, LotePrediccion, PrediccionModelo, ImportacionPacientes, FilaRechazada, EstadisticaAnalisis, CorreoSaliente
 
 @admin.register(AppUser)
 class AppUserAdmin(admin.ModelAdmin):
     # Campos que se mostrarán en la lista de usuarios en el admin
-    list_display = ('email', 'first_name', 'last_name', 'verification_code')
+    list_display = ('email', 'first_name', 'last_name')
     
     # Campos por los que se puede buscar
     search_fields = ('email', 'first_name', 'last_name')
     
-    # Filtros laterales
-    list_filter = ('verification_code',) 
-    
     # Para la edición individual:
-    # Agrupa los campos para que la vista de edición sea más limpia
+    # Agrupa los campos para que la vista de edición sea más limpia.
+    # Importante: No mostrar el campo 'password' ya que no se puede editar directamente de forma segura
+    # (los códigos de verificación viven aparte, en CodigoVerificacion).
     fieldsets = (
         (None, {
             'fields': ('email', 'first_name', 'last_name')
         }),
-        ('Seguridad y Verificación', {
-            # Importante: No mostrar el campo 'password' ya que no se puede editar directamente de forma segura
-            'fields': ('verification_code',),
-            'classes': ('collapse',) # Opcional: oculta esta sección por defecto
-        }),
     )
-    
-    # Evita que se muestren los campos de contraseña en la edición y creación
-    # ya que tu método `save` maneja el hasheo de forma segura.
-    # En un proyecto real, se usaría UserAdmin o un formulario específico para cambiar contraseñas.
-    readonly_fields = ('verification_code',)
 
     # Sobreescribe el método para que no se muestre el campo 'password' en el formulario de edición
     # Aunque no se muestra en `fieldsets`, esto es una buena práctica para asegurar.
@@ -39,16 +40,154 @@ class AppUserAdmin(admin.ModelAdmin):
             form.base_fields['password'].widget.attrs['disabled'] = True
         return form
 
+# A partir de este número de filas el paginador del admin usa la estimación de PostgreSQL
+# (pg_class.reltuples) en lugar de COUNT(*), que recorre toda la tabla
+CONTEO_ESTIMADO_MINIMO = 100_000
+
+
+class PaginadorEstimado(Paginator):
+    """
+    Paginador para changelists de tablas grandes.
+
+    Sin filtros ni búsqueda, el total se toma de las estadísticas de la tabla;
+    con filtros se cuenta normalmente (esa consulta ya está acotada por los índices).
+    """
+
+    @cached_property
+    def count(self):
+        consulta = getattr(self.object_list, 'query', None)
+        if consulta is not None and not consulta.where and connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                    [self.object_list.model._meta.db_table],
+                )
+                fila = cursor.fetchone()
+            if fila and fila[0] >= CONTEO_ESTIMADO_MINIMO:
+                return fila[0]
+        return super().count
+
+
+def _restar_anios(fecha, anios):
+    try:
+        return fecha.replace(year=fecha.year - anios)
+    except ValueError:
+        # 29 de febrero en un año no bisiesto
+        return fecha.replace(year=fecha.year - anios, day=28)
+
+
+def expresion_edad(hoy):
+    """Edad en años calculada por la base de datos a partir de fecha_nacimiento."""
+    cumple_pendiente = (
+        Q(fecha_nacimiento__month__gt=hoy.month)
+        | Q(fecha_nacimiento__month=hoy.month, fecha_nacimiento__day__gt=hoy.day)
+    )
+    return (
+        Value(hoy.year) - ExtractYear('fecha_nacimiento')
+        - Case(When(cumple_pendiente, then=Value(1)), default=Value(0))
+    )
+
+
+# Filtro por rango de edad (se traduce a un rango de fecha_nacimiento, que usa el índice)
+class RangoEdadFilter(admin.SimpleListFilter):
+    title = 'rango de edad'
+    parameter_name = 'edad'
+
+    RANGOS = EstadisticaAnalisis.RANGOS_EDAD
+
+    def lookups(self, request, model_admin):
+        return [(clave, etiqueta) for clave, etiqueta, _, _ in self.RANGOS]
+
+    def queryset(self, request, queryset):
+        for clave, _, minima, maxima in self.RANGOS:
+            if self.value() == clave:
+                hoy = date.today()
+                # Tener al menos `minima` años: haber nacido en o antes de hoy - minima
+                queryset = queryset.filter(fecha_nacimiento__lte=_restar_anios(hoy, minima))
+                if maxima is not None:
+                    # Tener como máximo `maxima` años: haber nacido después de hoy - (maxima + 1)
+                    queryset = queryset.filter(fecha_nacimiento__gt=_restar_anios(hoy, maxima + 1))
+                return queryset
+        return queryset
+
+
 # --- 1. Inline para Historia Clínica ---
+# Historias que se muestran en la página del paciente y caracteres de cada texto
+HISTORIAS_INLINE_RECIENTES = 5
+HISTORIAS_INLINE_CARACTERES = 150
+
+
+class HistoriasRecientesFormSet(BaseInlineFormSet):
+    """Formset que solo carga las historias más recientes del paciente."""
+
+    def get_queryset(self):
+        if not hasattr(self, '_recientes'):
+            self._recientes = list(super().get_queryset()[:HISTORIAS_INLINE_RECIENTES])
+            # El paciente ya está cargado: evita una consulta por fila en HistoriaClinica.__str__
+            for historia in self._recientes:
+                historia.paciente = self.instance
+        return self._recientes
+
+
+def _resumen(texto):
+    # Los textos llegan recortados a HISTORIAS_INLINE_CARACTERES + 1 desde la base de datos
+    if texto and len(texto) > HISTORIAS_INLINE_CARACTERES:
+        return texto[:HISTORIAS_INLINE_CARACTERES].rstrip() + "…"
+    return texto or "-"
+
+
 # Define cómo se mostrarán las Historias Clínicas dentro del Paciente
 class HistoriaClinicaInline(admin.TabularInline):
     # Indica el modelo que se va a mostrar
     model = HistoriaClinica
-    # Campos que se muestran en el inline
-    fields = ('fecha_visita', 'sintomas_actuales', 'diagnostico_principal', 'otras_comorbilidades')
-    # Hace que el campo de texto sea más grande
+    formset = HistoriasRecientesFormSet
+    verbose_name_plural = f"Historias Clínicas (las {HISTORIAS_INLINE_RECIENTES} más recientes)"
+    # Campos que se muestran en el inline: texto recortado; el completo se abre con "Cambiar"
+    fields = ('fecha_visita', 'sintomas_resumen', 'diagnostico_resumen', 'comorbilidades_resumen')
+    readonly_fields = fields
+    extra = 0
+    show_change_link = True
+
+    def has_add_permission(self, request, obj=None):
+        # Las historias nuevas se agregan con NuevaHistoriaClinicaInline
+        return False
+
+    def get_queryset(self, request):
+        largo = HISTORIAS_INLINE_CARACTERES + 1
+        return super().get_queryset(request).defer(
+            'sintomas_actuales', 'tratamientos_actuales', 'diagnostico_principal', 'otras_comorbilidades'
+        ).annotate(
+            sintomas_corto=Left('sintomas_actuales', largo),
+            diagnostico_corto=Left('diagnostico_principal', largo),
+            comorbilidades_corto=Left('otras_comorbilidades', largo),
+        )
+
+    def sintomas_resumen(self, obj):
+        return _resumen(obj.sintomas_corto)
+
+    sintomas_resumen.short_description = 'Síntomas del Paciente'
+
+    def diagnostico_resumen(self, obj):
+        return _resumen(obj.diagnostico_corto)
+
+    diagnostico_resumen.short_description = 'Diagnóstico del Profesional'
+
+    def comorbilidades_resumen(self, obj):
+        return _resumen(obj.comorbilidades_corto)
+
+    comorbilidades_resumen.short_description = 'Otras Comorbilidades'
+
+
+# Formulario vacío para registrar una historia nueva desde la página del paciente
+class NuevaHistoriaClinicaInline(admin.TabularInline):
+    model = HistoriaClinica
+    verbose_name_plural = "Nueva Historia Clínica"
+    fields = ('sintomas_actuales', 'diagnostico_principal', 'otras_comorbilidades')
     extra = 1  # Permite añadir 1 historia clínica vacía por defecto
-    readonly_fields = ('fecha_visita',) # La fecha se genera automáticamente
+    can_delete = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).none()
 
 # --- 2. Admin del Modelo Paciente ---
 # Clase personalizada para la visualización del Paciente
@@ -59,13 +198,17 @@ class PacienteAdmin(admin.ModelAdmin):
         'numero_identificacion',
         'primer_nombre',
         'primer_apellido',
-        'edad', # Usamos la propiedad calculada 'edad'
+        'edad_display', # Edad calculada por la base de datos
         'telefono',
         'estado_civil'
     )
     
     # Campos por los que se puede filtrar
-    list_filter = ('estado_civil', 'sexo', 'tipo_identificacion')
+    list_filter = ('estado_civil', 'sexo', 'tipo_identificacion', RangoEdadFilter)
+
+    # Tablas grandes: total estimado y sin el segundo COUNT(*) al filtrar
+    paginator = PaginadorEstimado
+    show_full_result_count = False
     
     # Campos por los que se puede buscar (usa __icontains para búsqueda insensible a mayúsculas)
     search_fields = (
@@ -96,11 +239,42 @@ class PacienteAdmin(admin.ModelAdmin):
                 'telefono',
             ),
         }),
+        ('Historias Clínicas', {
+            'fields': ('historias_anteriores',),
+        }),
     )
     
     # Añadimos el Inline para que las Historias Clínicas aparezcan
     # en la misma página de edición del Paciente
-    inlines = [HistoriaClinicaInline]
+    inlines = [HistoriaClinicaInline, NuevaHistoriaClinicaInline]
+
+    readonly_fields = ('historias_anteriores',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(edad_anos=expresion_edad(date.today()))
+
+    def get_search_results(self, request, queryset, search_term):
+        # Usa las columnas normalizadas e indexadas (identificación, nombres sin tildes, teléfono)
+        if not search_term:
+            return queryset, False
+        return busqueda_pacientes.buscar_pacientes(search_term, queryset), False
+
+    def edad_display(self, obj):
+        return obj.edad_anos
+
+    edad_display.short_description = 'Edad'
+    # Ordenar por edad equivale a ordenar por fecha de nacimiento descendente (indexada)
+    edad_display.admin_order_field = F('fecha_nacimiento').desc()
+
+    def historias_anteriores(self, obj):
+        # Las historias anteriores se consultan en el listado de historias (paginado)
+        if obj is None or obj.pk is None:
+            return "-"
+        total = obj.historias.count()
+        url = reverse('admin:myapp_historiaclinica_changelist') + f"?paciente__id__exact={obj.pk}"
+        return format_html('<a href="{}">Ver las {} historias clínicas del paciente</a>', url, total)
+
+    historias_anteriores.short_description = 'Historial completo'
 
 # --- 3. Admin del Modelo HistoriaClinica (Registro individual) ---
 # Opcional: Para gestionar las Historias Clínicas de forma individual también
@@ -115,25 +289,174 @@ class HistoriaClinicaAdmin(admin.ModelAdmin):
     
     # Filtro por fecha
     list_filter = ('fecha_visita',)
+
+    # Trae el paciente en la misma consulta (evita una consulta por fila)
+    list_select_related = ('paciente',)
+
+    paginator = PaginadorEstimado
+    show_full_result_count = False
     
     # Método para mostrar el nombre completo del paciente
     def paciente_display(self, obj):
         return f"{obj.paciente.primer_nombre} {obj.paciente.primer_apellido}"
     
     paciente_display.short_description = 'Paciente'
+    paciente_display.admin_order_field = 'paciente__primer_apellido'
+
+
+# Filtro por nivel de acuerdo entre modelos (usa la columna indexada, no el JSON)
+class PorcentajeAcuerdoFilter(admin.SimpleListFilter):
+    title = 'nivel de acuerdo NLP'
+    parameter_name = 'acuerdo'
+
+    def lookups(self, request, model_admin):
+        return (
+            ('alto', 'Alto (> 80%)'),
+            ('medio', 'Medio (50% - 80%)'),
+            ('bajo', 'Bajo (< 50%)'),
+        )
+
+    def queryset(self, request, queryset):
+        if self.value() == 'alto':
+            return queryset.filter(porcentaje_acuerdo__gt=80)
+        if self.value() == 'medio':
+            return queryset.filter(porcentaje_acuerdo__gte=50, porcentaje_acuerdo__lte=80)
+        if self.value() == 'bajo':
+            return queryset.filter(porcentaje_acuerdo__lt=50)
+        return queryset
+
+
+# Filtro por la mayor probabilidad de CRC que dio algún modelo
+class ProbabilidadCRCFilter(admin.SimpleListFilter):
+    title = 'máx. probabilidad CRC'
+    parameter_name = 'prob_crc'
+
+    def lookups(self, request, model_admin):
+        return (
+            ('alta', 'Alta (> 80%)'),
+            ('media', 'Media (50% - 80%)'),
+            ('baja', 'Baja (< 50%)'),
+        )
+
+    def queryset(self, request, queryset):
+        if self.value() == 'alta':
+            return queryset.filter(max_probabilidad_crc__gt=80)
+        if self.value() == 'media':
+            return queryset.filter(max_probabilidad_crc__gte=50, max_probabilidad_crc__lte=80)
+        if self.value() == 'baja':
+            return queryset.filter(max_probabilidad_crc__lt=50)
+        return queryset
 
 
 @admin.register(AnalisisFinal)
 class AnalisisFinalAdmin(admin.ModelAdmin):
-    # Muestra el paciente, el resultado (CCR/CO) y la fecha
-    list_display = ('paciente', 'diagnostico_final', 'fecha_analisis')
+    # Muestra el paciente, el resultado (CCR/CO), el resumen del modelo y la fecha
+    list_display = ('paciente', 'diagnostico_final', 'consenso_resultado', 'porcentaje_acuerdo',
+                    'max_probabilidad_crc', 'fecha_analisis')
     
     # Permite buscar por nombre del paciente o su identificación
     search_fields = ('paciente__primer_nombre', 'paciente__primer_apellido', 'paciente__numero_identificacion')
     
     # Filtros laterales para ver rápidamente cuántos CCR o CO hay
-    list_filter = ('diagnostico_final', 'fecha_analisis')
+    list_filter = ('diagnostico_final', 'consenso_resultado', PorcentajeAcuerdoFilter,
+                   ProbabilidadCRCFilter, 'fecha_analisis')
+
+    readonly_fields = ('consenso_resultado', 'porcentaje_acuerdo', 'max_probabilidad_crc')
+
+    # Trae el paciente en la misma consulta (su __str__ se usa en cada fila)
+    list_select_related = ('paciente',)
+
+    paginator = PaginadorEstimado
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        # El JSON del modelo y el texto clínico no se muestran en el listado
+        return super().get_queryset(request).defer('predicciones_nlp', 'texto_clinico')
+
+@admin.register(PrediccionModelo)
+class PrediccionModeloAdmin(admin.ModelAdmin):
+    # Una fila por modelo y análisis
+    list_display = ('analisis', 'modelo', 'prediccion', 'clase', 'probabilidad_crc', 'fecha')
+
+    list_filter = ('modelo', 'clase')
+
+    # Evita una consulta por fila al mostrar el análisis y su paciente
+    list_select_related = ('analisis__paciente',)
+
+    paginator = PaginadorEstimado
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer('analisis__predicciones_nlp', 'analisis__texto_clinico')
 
 admin.site.register(RecursoMedico)
 
-admin.site.register(Noticia)
\ No newline at end of file
+admin.site.register(Noticia)
+
+@admin.register(PrediccionCache)
+class PrediccionCacheAdmin(admin.ModelAdmin):
+    # Muestra la clave, la versión del modelo y cuántas veces se reutilizó
+    list_display = ('clave', 'version_modelo', 'aciertos', 'fecha_creacion', 'expira_en')
+
+    # Filtro por versión para revisar entradas de modelos anteriores
+    list_filter = ('version_modelo',)
+
+    readonly_fields = ('clave', 'version_modelo', 'resultado', 'fecha_creacion', 'expira_en', 'aciertos')
+
+
+@admin.register(TrabajoPrediccion)
+class TrabajoPrediccionAdmin(admin.ModelAdmin):
+    # Muestra el estado de cada trabajo y cuándo se procesó
+    list_display = ('id', 'paciente', 'estado', 'fecha_creacion', 'fecha_fin')
+
+    # Filtro por estado para revisar la cola
+    list_filter = ('estado',)
+
+    readonly_fields = ('resultado', 'error', 'fecha_creacion', 'fecha_inicio', 'fecha_fin')
+
+
+@admin.register(CorreoSaliente)
+class CorreoSalienteAdmin(admin.ModelAdmin):
+    # Estado de entrega de cada correo de la cola de salida
+    list_display = ('asunto', 'destinatarios', 'estado', 'intentos', 'fecha_creacion', 'fecha_envio')
+
+    list_filter = ('estado',)
+
+    # El cuerpo puede contener códigos de verificación: no se muestra
+    exclude = ('mensaje',)
+
+    readonly_fields = ('intentos', 'error', 'fecha_creacion', 'fecha_ultimo_intento', 'fecha_envio')
+
+
+@admin.register(LotePrediccion)
+class LotePrediccionAdmin(admin.ModelAdmin):
+    # Muestra el avance de cada lote
+    list_display = ('nombre_archivo', 'estado', 'procesadas', 'total_filas', 'con_error', 'fecha_creacion')
+
+    list_filter = ('estado',)
+
+    # El CSV de resultados y las filas de entrada pueden ser grandes: no se muestran ni se cargan en el listado
+    exclude = ('resultado_csv', 'entrada')
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer('resultado_csv', 'entrada')
+
+
+class FilaRechazadaInline(admin.TabularInline):
+    model = FilaRechazada
+    extra = 0
+    can_delete = False
+    readonly_fields = ('fila', 'numero_identificacion', 'errores')
+
+
+@admin.register(ImportacionPacientes)
+class ImportacionPacientesAdmin(admin.ModelAdmin):
+    # Muestra el avance y el resultado de cada importación
+    list_display = ('nombre_archivo', 'estado', 'filas_leidas', 'importadas', 'rechazadas', 'fecha_creacion')
+
+    list_filter = ('estado',)
+
+    readonly_fields = ('nombre_archivo', 'huella', 'estado', 'filas_leidas', 'importadas', 'rechazadas',
+                       'error', 'fecha_creacion', 'fecha_fin')
+
+    inlines = [FilaRechazadaInline]
@@ -0,0 +1,42 @@
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.http import JsonResponse
+from django.shortcuts import redirect
+
+from .services.sesion_usuario import CLAVE_SESION
+
+
+def _rechazo(json):
+    if json:
+        return JsonResponse({"error": "No autenticado."}, status=401)
+    return redirect("login")
+
+
+def sesion_requerida(vista=None, json=False):
+    """
+    Exige que el usuario haya completado el inicio de sesión.
+
+    Sin sesión redirige a `login`, o con `json=True` responde 401 en JSON.
+    Solo revisa la sesión: el AppUser se carga aparte, si la vista usa `request.usuario`.
+    Se usa como `@sesion_requerida` o `@sesion_requerida(json=True)`.
+    """
+    def decorador(funcion):
+        if iscoroutinefunction(funcion):
+            @wraps(funcion)
+            async def envoltura_async(request, *args, **kwargs):
+                if not await request.session.aget(CLAVE_SESION):
+                    return _rechazo(json)
+                return await funcion(request, *args, **kwargs)
+            return envoltura_async
+
+        @wraps(funcion)
+        def envoltura(request, *args, **kwargs):
+            if not request.session.get(CLAVE_SESION):
+                return _rechazo(json)
+            return funcion(request, *args, **kwargs)
+        return envoltura
+
+    if vista is not None:
+        return decorador(vista)
+    return decorador
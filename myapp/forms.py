@@ -34,6 +34,31 @@ class PacienteForm(forms.ModelForm):
             if isinstance(field.widget, forms.Select):
                 field.widget.attrs['class'] = 'form-control custom-select'
 
+class PacienteImportacionForm(PacienteForm):
+    """
+    Mismas reglas que PacienteForm para validar filas de una importación masiva.
+
+    La unicidad de `numero_identificacion` no se consulta fila por fila: la
+    importación hace upsert sobre ese campo.
+    """
+
+    def validate_unique(self):
+        pass
+
+    def reiniciar(self, data):
+        """
+        Prepara el formulario para validar otra fila.
+
+        Crear un formulario por fila copia todos sus campos cada vez; reutilizarlo
+        multiplica la velocidad de validación en importaciones grandes.
+        """
+        self.data = data
+        self.is_bound = True
+        self._errors = None
+        self._bound_fields_cache = {}
+        self.instance = self._meta.model()
+        self.__dict__.pop('cleaned_data', None)
+
 class HistoriaClinicaForm(forms.ModelForm):
     class Meta:
         model = HistoriaClinica
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from myapp.services import estadisticas_analisis
+
+
+class Command(BaseCommand):
+    help = (
+        "Suma a las estadísticas precalculadas los análisis nuevos desde la última ejecución "
+        "(pensado para ejecutarse periódicamente, por ejemplo con cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tamano-lote', type=int, help="Análisis por transacción.")
+        parser.add_argument(
+            '--reconstruir', action='store_true',
+            help="Borra las estadísticas y las recalcula desde el primer análisis "
+                 "(tras editar o eliminar análisis ya sumados).",
+        )
+
+    def handle(self, *args, **options):
+        def progreso(procesados):
+            self.stdout.write(f"{procesados} análisis sumados...")
+
+        funcion = estadisticas_analisis.reconstruir if options['reconstruir'] else estadisticas_analisis.actualizar
+        procesados = funcion(options['tamano_lote'], progreso)
+        self.stdout.write(self.style.SUCCESS(f"Estadísticas actualizadas ({procesados} análisis nuevos)."))
@@ -0,0 +1,92 @@
+import asyncio
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import AsyncClient, Client
+from django.test.utils import setup_databases, teardown_databases
+
+from myapp.services import prediccion_service
+from myapp.simulacion.servidor_modelo import iniciar_servidor
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara el rendimiento de hacer_prediccion síncrona (WSGI, un hilo por petición) "
+        "y asíncrona (ASGI, un solo event loop) contra un servidor de modelo simulado lento."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--peticiones', type=int, default=200, help="Peticiones por escenario.")
+        parser.add_argument('--usuarios', type=int, default=50, help="Peticiones simultáneas en ASGI.")
+        parser.add_argument('--hilos-wsgi', type=int, default=8, help="Hilos del worker WSGI.")
+        parser.add_argument('--latencia', type=float, default=0.5, help="Latencia simulada del modelo (s).")
+
+    def handle(self, *args, **options):
+        # Cada petición guarda su predicción en la caché de la base de datos: se usa una
+        # base de prueba (como `manage.py test`) para no llenar las tablas reales
+        self.stdout.write("Creando la base de datos de prueba...")
+        bases = setup_databases(verbosity=0, interactive=False, serialized_aliases=[])
+
+        servidor, url = iniciar_servidor(latencia=options['latencia'])
+        prediccion_service.FASTAPI_URL = url
+        self.stdout.write(f"Servidor de modelo simulado en {url} (latencia {options['latencia']} s)")
+
+        try:
+            wsgi = self._medir_wsgi(options['peticiones'], options['hilos_wsgi'])
+            asgi = asyncio.run(self._medir_asgi(options['peticiones'], options['usuarios']))
+        finally:
+            servidor.shutdown()
+            connections.close_all()
+            teardown_databases(bases, verbosity=0)
+
+        self.stdout.write("")
+        self.stdout.write(f"{'Escenario':<32}{'Tiempo (s)':>12}{'Exitosas/s':>15}{'Fallidas':>10}")
+        self.stdout.write(f"{'WSGI (' + str(options['hilos_wsgi']) + ' hilos)':<32}{wsgi[0]:>12.2f}{wsgi[1]:>15.1f}{wsgi[2]:>10}")
+        self.stdout.write(f"{'ASGI (1 loop, ' + str(options['usuarios']) + ' simultáneas)':<32}{asgi[0]:>12.2f}{asgi[1]:>15.1f}{asgi[2]:>10}")
+        if wsgi[2] or asgi[2]:
+            self.stdout.write(self.style.WARNING(
+                "Hubo respuestas fallidas (código distinto de 2xx o error del modelo, p. ej. \"saturado\"): "
+                "no cuentan como peticiones atendidas y la comparación no es concluyente."
+            ))
+
+    def _texto(self):
+        # Texto único por petición para que la caché no intervenga
+        return f"Paciente de 60 años con dolor abdominal. Caso {uuid.uuid4()}"
+
+    def _exitosa(self, respuesta):
+        # La vista responde 200 también cuando el modelo falla: el error va en la página
+        return 200 <= respuesta.status_code < 300 and b'class="error-box"' not in respuesta.content
+
+    def _resumen(self, inicio, resultados):
+        """(duración, peticiones exitosas por segundo, peticiones fallidas)"""
+        duracion = time.monotonic() - inicio
+        exitosas = sum(resultados)
+        return duracion, exitosas / duracion, len(resultados) - exitosas
+
+    def _medir_wsgi(self, peticiones, hilos):
+        def peticion(_):
+            try:
+                return self._exitosa(Client().post('/hacer-prediccion/', {'texto_clinico': self._texto()}))
+            finally:
+                connections.close_all()
+
+        inicio = time.monotonic()
+        with ThreadPoolExecutor(max_workers=hilos) as pool:
+            resultados = list(pool.map(peticion, range(peticiones)))
+        return self._resumen(inicio, resultados)
+
+    async def _medir_asgi(self, peticiones, usuarios):
+        cliente = AsyncClient()
+        limite = asyncio.Semaphore(usuarios)
+
+        async def peticion():
+            async with limite:
+                respuesta = await cliente.post('/async/hacer-prediccion/', {'texto_clinico': self._texto()})
+                return self._exitosa(respuesta)
+
+        inicio = time.monotonic()
+        resultados = await asyncio.gather(*(peticion() for _ in range(peticiones)))
+        return self._resumen(inicio, resultados)
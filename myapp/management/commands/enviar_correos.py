@@ -0,0 +1,70 @@
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+
+from myapp.services import correo_saliente
+
+
+class Command(BaseCommand):
+    help = "Envía los correos de la cola de salida reutilizando una sola conexión SMTP."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--continuo',
+            action='store_true',
+            help="Sigue revisando la cola indefinidamente.",
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=2.0,
+            help="Segundos de espera entre revisiones en modo continuo.",
+        )
+        parser.add_argument(
+            '--limite',
+            type=int,
+            default=None,
+            help="Máximo de correos a enviar por ronda.",
+        )
+        parser.add_argument(
+            '--purgar-dias',
+            type=int,
+            default=correo_saliente.CORREO_RETENCION_DIAS,
+            help="Elimina los correos ENVIADO y FALLIDO de más de N días (una vez por hora en modo continuo).",
+        )
+        parser.add_argument(
+            '--reencolar-minutos',
+            type=int,
+            default=10,
+            help="Reencola correos que llevan más de N minutos en ENVIANDO.",
+        )
+
+    def handle(self, *args, **options):
+        conexion = get_connection()
+        proxima_purga = 0.0
+        try:
+            while True:
+                if time.monotonic() >= proxima_purga:
+                    purgados = correo_saliente.purgar_terminados(options['purgar_dias'])
+                    if purgados:
+                        self.stdout.write(f"Correos purgados: {purgados}")
+                    proxima_purga = time.monotonic() + 3600
+
+                reencolados = correo_saliente.reencolar_atascados(options['reencolar_minutos'])
+                if reencolados:
+                    self.stdout.write(f"Correos reencolados: {reencolados}")
+
+                enviados = correo_saliente.enviar_pendientes(options['limite'], conexion)
+                if enviados:
+                    self.stdout.write(self.style.SUCCESS(f"Correos procesados: {enviados}"))
+                    # Hay más en cola: se sigue sin esperar y con la misma conexión
+                    continue
+
+                if not options['continuo']:
+                    break
+                # Cola vacía: se cierra la conexión para que el servidor no la corte por inactividad
+                conexion.close()
+                time.sleep(options['intervalo'])
+        finally:
+            conexion.close()
@@ -0,0 +1,47 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from myapp.services import exportacion_casos
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporta los casos etiquetados (texto, historia clínica, diagnóstico final y predicciones) "
+        "en CSV o JSONL para reentrenar los modelos, sin cargar el resultado completo en memoria."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--formato', choices=('csv', 'jsonl'), default='jsonl')
+        parser.add_argument('--salida', help="Archivo de salida (por defecto, la salida estándar).")
+        parser.add_argument('--incremental', action='store_true',
+                            help="Exporta solo lo nuevo desde la última exportación incremental y avanza la marca "
+                                 "(los análisis de los últimos ANALISIS_MARGEN_MINUTOS quedan para la próxima).")
+        parser.add_argument('--desde-id', type=int, default=0,
+                            help="Exporta los análisis con id mayor a este valor.")
+
+    def handle(self, *args, **options):
+        if options['incremental']:
+            desde_id, hasta_id = exportacion_casos.rango_incremental()
+        else:
+            desde_id, hasta_id = options['desde_id'], None
+
+        consulta = exportacion_casos.consulta_casos(desde_id, hasta_id)
+
+        destino = open(options['salida'], 'w', newline='', encoding='utf-8') if options['salida'] else sys.stdout
+        total = 0
+        try:
+            for linea in exportacion_casos.lineas(options['formato'], consulta):
+                destino.write(linea)
+                total += 1
+        finally:
+            if options['salida']:
+                destino.close()
+
+        if options['formato'] == 'csv':
+            total -= 1  # encabezado
+
+        if options['incremental']:
+            exportacion_casos.guardar_marca(hasta_id)
+
+        self.stderr.write(self.style.SUCCESS(f"{total} casos exportados (id > {desde_id})."))
@@ -0,0 +1,50 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp.services import importacion_pacientes
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa pacientes desde un archivo CSV o Excel (.xlsx) por bloques, con las mismas "
+        "validaciones que el formulario de creación. Si una importación anterior del mismo "
+        "archivo quedó incompleta, continúa desde la última fila confirmada."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help="Ruta del archivo CSV o .xlsx.")
+        parser.add_argument('--tamano-lote', type=int, default=importacion_pacientes.IMPORTACION_TAMANO_LOTE,
+                            help="Filas por bloque (una transacción por bloque).")
+        parser.add_argument('--nueva', action='store_true',
+                            help="Empieza desde el principio aunque haya una importación sin terminar.")
+        parser.add_argument('--rechazos', help="Escribe las filas rechazadas en este archivo CSV.")
+
+    def handle(self, *args, **options):
+        def progreso(importacion):
+            self.stdout.write(
+                f"{importacion.filas_leidas} filas leídas "
+                f"({importacion.importadas} importadas, {importacion.rechazadas} rechazadas)..."
+            )
+
+        try:
+            importacion = importacion_pacientes.importar_archivo(
+                options['archivo'],
+                tamano_lote=options['tamano_lote'],
+                nueva=options['nueva'],
+                progreso=progreso,
+            )
+        except (importacion_pacientes.ArchivoImportacionInvalido, OSError, UnicodeDecodeError) as e:
+            raise CommandError(str(e))
+
+        if options['rechazos'] and importacion.rechazadas:
+            with open(options['rechazos'], 'w', newline='', encoding='utf-8') as salida:
+                escritor = csv.writer(salida)
+                escritor.writerow(['fila', 'numero_identificacion', 'errores'])
+                for rechazo in importacion.filas_rechazadas.iterator(chunk_size=2000):
+                    escritor.writerow([rechazo.fila, rechazo.numero_identificacion, rechazo.errores])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Importación #{importacion.pk} completada: {importacion.importadas} pacientes importados, "
+            f"{importacion.rechazadas} filas rechazadas."
+        ))
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp.services import lote_prediccion
+
+
+class Command(BaseCommand):
+    help = "Puntúa un archivo CSV o JSONL de descripciones clínicas y escribe un CSV de resultados."
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help="Ruta del archivo CSV o JSONL de entrada.")
+        parser.add_argument('salida', help="Ruta del CSV de resultados.")
+        parser.add_argument(
+            '--hilos',
+            type=int,
+            default=lote_prediccion.NLP_LOTE_HILOS,
+            help="Consultas simultáneas al modelo NLP.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['archivo'], 'rb') as entrada:
+                filas = lote_prediccion.leer_filas(options['archivo'], entrada.read())
+        except (OSError, lote_prediccion.ArchivoLoteInvalido) as e:
+            raise CommandError(str(e))
+
+        inicio = time.monotonic()
+
+        def al_avanzar(procesadas, con_error):
+            if procesadas % 50 == 0 or procesadas == len(filas):
+                self.stdout.write(f"{procesadas}/{len(filas)} filas ({con_error} con error)")
+
+        resultados = lote_prediccion.predecir_filas(filas, hilos=options['hilos'], al_avanzar=al_avanzar)
+
+        with open(options['salida'], 'w', newline='', encoding='utf-8') as salida:
+            lote_prediccion.escribir_csv(filas, resultados, salida)
+
+        duracion = time.monotonic() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(filas)} filas en {duracion:.1f} s ({len(filas) / duracion:.1f} filas/s) -> {options['salida']}"
+        ))
@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from myapp.services import lote_prediccion, trabajos_prediccion
+
+
+class Command(BaseCommand):
+    help = "Procesa los trabajos de predicción NLP y los lotes de predicción que están en cola."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--continuo',
+            action='store_true',
+            help="Sigue revisando la cola indefinidamente.",
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=2.0,
+            help="Segundos de espera entre revisiones en modo continuo.",
+        )
+        parser.add_argument(
+            '--limite',
+            type=int,
+            default=None,
+            help="Máximo de trabajos a procesar por revisión.",
+        )
+        parser.add_argument(
+            '--reencolar-minutos',
+            type=int,
+            default=10,
+            help="Reencola trabajos que llevan más de N minutos en PROCESANDO.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            reencolados = trabajos_prediccion.reencolar_atascados(options['reencolar_minutos'])
+            if reencolados:
+                self.stdout.write(f"Trabajos reencolados: {reencolados}")
+
+            procesados = trabajos_prediccion.procesar_pendientes(options['limite'])
+            if procesados:
+                self.stdout.write(self.style.SUCCESS(f"Trabajos procesados: {procesados}"))
+
+            # Lotes que un reinicio del servidor web dejó a medias (o sin empezar)
+            reencolados = lote_prediccion.reencolar_atascados(lote_prediccion.NLP_LOTE_ATASCADO_MINUTOS)
+            if reencolados:
+                self.stdout.write(f"Lotes reencolados: {reencolados}")
+            procesados = lote_prediccion.procesar_pendientes(options['limite'])
+            if procesados:
+                self.stdout.write(self.style.SUCCESS(f"Lotes procesados: {procesados}"))
+
+            if not options['continuo']:
+                break
+            time.sleep(options['intervalo'])
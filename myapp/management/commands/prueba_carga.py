@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp.simulacion.carga import ejecutar_carga
+
+
+class Command(BaseCommand):
+    help = (
+        "Prueba de carga de extremo a extremo sobre hacer_prediccion y analisis_descrip_clinica "
+        "contra una instancia en ejecución. Reporta p50/p95/p99 y peticiones por segundo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help="URL base de la aplicación.")
+        parser.add_argument('--usuarios', type=int, default=10, help="Usuarios simultáneos.")
+        parser.add_argument('--duracion', type=float, default=30, help="Duración de la prueba (s).")
+        parser.add_argument(
+            '--escenario',
+            choices=('hacer_prediccion', 'analisis', 'mixto'),
+            default='mixto',
+        )
+        parser.add_argument('--paciente', type=int, help="ID del paciente para analisis_descrip_clinica.")
+        parser.add_argument('--async', dest='prefijo_async', action='store_true',
+                            help="Usa las vistas asíncronas (/async/...).")
+        parser.add_argument('--sesion', help="Cookie sessionid de un usuario autenticado (opcional).")
+        parser.add_argument('--repetir-texto', action='store_true',
+                            help="Envía siempre el mismo texto para medir la caché.")
+
+    def handle(self, *args, **options):
+        escenarios = {
+            'hacer_prediccion': ['hacer_prediccion'],
+            'analisis': ['analisis'],
+            'mixto': ['hacer_prediccion', 'analisis'],
+        }[options['escenario']]
+
+        if 'analisis' in escenarios and not options['paciente']:
+            raise CommandError("El escenario de análisis requiere --paciente <id>.")
+
+        self.stdout.write(
+            f"{options['usuarios']} usuarios durante {options['duracion']} s contra {options['url']} ..."
+        )
+        resultados, duracion = ejecutar_carga(
+            options['url'],
+            options['usuarios'],
+            options['duracion'],
+            escenarios,
+            paciente_id=options['paciente'],
+            prefijo_async=options['prefijo_async'],
+            sesion=options['sesion'],
+            textos_unicos=not options['repetir_texto'],
+        )
+
+        self.stdout.write("")
+        self.stdout.write(
+            f"{'Escenario':<20}{'Peticiones':>11}{'Errores':>9}{'p50 (s)':>10}{'p95 (s)':>10}{'p99 (s)':>10}{'Pet/s':>9}"
+        )
+        for fila in resultados.resumen(duracion):
+            self.stdout.write(
+                f"{fila['escenario']:<20}{fila['peticiones']:>11}{fila['errores']:>9}"
+                f"{fila['p50']:>10.3f}{fila['p95']:>10.3f}{fila['p99']:>10.3f}{fila['rps']:>9.1f}"
+            )
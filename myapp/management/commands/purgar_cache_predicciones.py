@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from myapp.services import cache_predicciones
+
+
+class Command(BaseCommand):
+    help = "Elimina las predicciones NLP vencidas de la caché persistente."
+
+    def handle(self, *args, **options):
+        borrados = cache_predicciones.purgar_expirados()
+        self.stdout.write(self.style.SUCCESS(f"Entradas vencidas eliminadas: {borrados}"))
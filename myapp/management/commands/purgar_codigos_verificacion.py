@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from myapp.services import codigos_verificacion
+
+
+class Command(BaseCommand):
+    help = "Elimina los códigos de verificación que ya vencieron."
+
+    def handle(self, *args, **options):
+        borrados = codigos_verificacion.purgar_vencidos()
+        self.stdout.write(self.style.SUCCESS(f"Códigos de verificación eliminados: {borrados}"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from myapp.services import resultados_temporales
+
+
+class Command(BaseCommand):
+    help = "Elimina los resultados de análisis temporales que ya expiraron."
+
+    def handle(self, *args, **options):
+        borrados = resultados_temporales.purgar_expirados()
+        self.stdout.write(self.style.SUCCESS(f"Resultados temporales eliminados: {borrados}"))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from myapp.services import contadores
+
+
+class Command(BaseCommand):
+    help = (
+        "Corrige los contadores de la página de inicio con el conteo real de cada tabla "
+        "(pensado para ejecutarse periódicamente, por ejemplo con cron)."
+    )
+
+    def handle(self, *args, **options):
+        for nombre, (anterior, nuevo) in contadores.reconciliar().items():
+            diferencia = nuevo - anterior
+            self.stdout.write(f"{nombre}: {nuevo} (diferencia {diferencia:+d})")
+        self.stdout.write(self.style.SUCCESS("Contadores reconciliados."))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from myapp.models import Paciente, ResumenPaciente
+from myapp.services import resumen_pacientes
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula el resumen clínico (totales, última visita, último diagnóstico) de todos "
+        "los pacientes desde las historias y los análisis, recorriendo la tabla por bloques."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tamano-lote', type=int, default=1000, help="Pacientes por bloque.")
+
+    def handle(self, *args, **options):
+        tamano = options['tamano_lote']
+        base = resumen_pacientes.anotar_resumen(Paciente.objects.order_by('pk').only('pk'))
+
+        ultimo_pk = 0
+        total = 0
+        while True:
+            # Paginación por clave: cada bloque es una consulta corta y la memoria no crece
+            bloque = list(base.filter(pk__gt=ultimo_pk)[:tamano])
+            if not bloque:
+                break
+
+            ResumenPaciente.objects.bulk_create(
+                [ResumenPaciente(paciente_id=p.pk, **resumen_pacientes.valores_resumen(p)) for p in bloque],
+                update_conflicts=True,
+                unique_fields=['paciente'],
+                update_fields=list(resumen_pacientes.CAMPOS) + ['fecha_actualizacion'],
+            )
+
+            ultimo_pk = bloque[-1].pk
+            total += len(bloque)
+            self.stdout.write(f"{total} pacientes recalculados...")
+
+        self.stdout.write(self.style.SUCCESS(f"Resumen reconstruido para {total} pacientes."))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from myapp.models import Paciente
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula las columnas de búsqueda normalizadas (nombre, identificación, teléfono) "
+        "recorriendo la tabla por bloques. La migración 0027 ya las llena al desplegar; "
+        "sirve para resincronizarlas (p. ej. tras cambios hechos con update())."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tamano-lote', type=int, default=1000, help="Filas por bloque.")
+        parser.add_argument('--todos', action='store_true',
+                            help="Recalcula todas las filas, no solo las que no tienen columnas de búsqueda.")
+
+    def handle(self, *args, **options):
+        tamano = options['tamano_lote']
+        base = Paciente.objects.order_by('pk').only(
+            'pk', 'numero_identificacion', 'primer_nombre', 'segundo_nombre',
+            'primer_apellido', 'segundo_apellido', 'telefono',
+        )
+        if not options['todos']:
+            base = base.filter(busqueda_nombre='')
+
+        ultimo_pk = 0
+        total = 0
+        while True:
+            # Paginación por clave: cada bloque es una consulta corta y la memoria no crece
+            bloque = list(base.filter(pk__gt=ultimo_pk)[:tamano])
+            if not bloque:
+                break
+
+            for paciente in bloque:
+                paciente.actualizar_busqueda()
+            Paciente.objects.bulk_update(bloque, Paciente.CAMPOS_BUSQUEDA)
+
+            ultimo_pk = bloque[-1].pk
+            total += len(bloque)
+            self.stdout.write(f"{total} pacientes actualizados...")
+
+        self.stdout.write(self.style.SUCCESS(f"Columnas de búsqueda calculadas para {total} pacientes."))
@@ -0,0 +1,39 @@
+from django.db.models import Exists, OuterRef
+from django.core.management.base import BaseCommand
+
+from myapp.models import AnalisisFinal, PrediccionModelo
+
+
+class Command(BaseCommand):
+    help = "Crea las filas de PrediccionModelo de los AnalisisFinal que aún no las tienen."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tamano-lote', type=int, default=1000, help="Análisis por bloque.")
+
+    def handle(self, *args, **options):
+        tamano = options['tamano_lote']
+        pendientes = AnalisisFinal.objects.filter(
+            ~Exists(PrediccionModelo.objects.filter(analisis=OuterRef('pk')))
+        ).order_by('pk').only('pk', 'predicciones_nlp', 'fecha_analisis')
+
+        ultimo_pk = 0
+        analisis_total = 0
+        filas_total = 0
+        while True:
+            bloque = list(pendientes.filter(pk__gt=ultimo_pk)[:tamano])
+            if not bloque:
+                break
+
+            filas = []
+            for analisis in bloque:
+                filas.extend(PrediccionModelo.construir_desde(analisis))
+            PrediccionModelo.objects.bulk_create(filas, batch_size=tamano)
+
+            ultimo_pk = bloque[-1].pk
+            analisis_total += len(bloque)
+            filas_total += len(filas)
+            self.stdout.write(f"{analisis_total} análisis procesados...")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{filas_total} predicciones por modelo creadas para {analisis_total} análisis."
+        ))
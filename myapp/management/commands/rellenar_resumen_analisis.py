@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from myapp.models import AnalisisFinal
+
+
+class Command(BaseCommand):
+    help = (
+        "Calcula las columnas de resumen (consenso, acuerdo, máx. probabilidad CRC) de los "
+        "AnalisisFinal existentes, recorriendo la tabla por bloques."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tamano-lote', type=int, default=1000, help="Filas por bloque.")
+        parser.add_argument('--todos', action='store_true',
+                            help="Recalcula todas las filas, no solo las que no tienen resumen.")
+
+    def handle(self, *args, **options):
+        tamano = options['tamano_lote']
+        base = AnalisisFinal.objects.order_by('pk').only('pk', 'predicciones_nlp')
+        if not options['todos']:
+            base = base.filter(consenso_resultado__isnull=True)
+
+        ultimo_pk = 0
+        total = 0
+        while True:
+            # Paginación por clave: cada bloque es una consulta corta y la memoria no crece
+            bloque = list(base.filter(pk__gt=ultimo_pk)[:tamano])
+            if not bloque:
+                break
+
+            for analisis in bloque:
+                analisis.actualizar_resumen()
+            AnalisisFinal.objects.bulk_update(bloque, AnalisisFinal.CAMPOS_RESUMEN)
+
+            ultimo_pk = bloque[-1].pk
+            total += len(bloque)
+            self.stdout.write(f"{total} análisis actualizados...")
+
+        self.stdout.write(self.style.SUCCESS(f"Resumen calculado para {total} análisis."))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from myapp.simulacion.servidor_modelo import PerfilLatencia, crear_servidor
+
+
+class Command(BaseCommand):
+    help = (
+        "Inicia un servidor local que imita /predict_all del modelo NLP, con latencia "
+        "y tasa de errores configurables. Usar con API_URL=http://<host>:<puerto>/predict_all."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--puerto', type=int, default=8001)
+        parser.add_argument('--latencia', type=float, default=0.5, help="Latencia media o mediana (s).")
+        parser.add_argument(
+            '--distribucion',
+            choices=PerfilLatencia.DISTRIBUCIONES,
+            default='fija',
+            help="Distribución de la latencia.",
+        )
+        parser.add_argument('--desviacion', type=float, default=0.0, help="Dispersión de la latencia.")
+        parser.add_argument('--tasa-error', type=float, default=0.0, help="Fracción de respuestas 500/503 (0 a 1).")
+
+    def handle(self, *args, **options):
+        servidor = crear_servidor(
+            puerto=options['puerto'],
+            latencia=options['latencia'],
+            distribucion=options['distribucion'],
+            desviacion=options['desviacion'],
+            tasa_error=options['tasa_error'],
+            host=options['host'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Servidor de modelo simulado en http://{options['host']}:{servidor.server_address[1]}/predict_all "
+            f"({options['distribucion']}, latencia {options['latencia']} s, errores {options['tasa_error']:.0%})"
+        ))
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            servidor.server_close()
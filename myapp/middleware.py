@@ -0,0 +1,67 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.utils.functional import SimpleLazyObject
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .services import sesion_usuario
+
+
+class WhiteNoiseAsyncMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise con soporte asíncrono.
+
+    WhiteNoiseMiddleware solo es síncrono; con él en la cadena, Django ejecuta
+    todas las vistas asíncronas dentro de un único hilo bajo ASGI y las
+    peticiones quedan en serie. Esta versión sirve los estáticos igual y deja
+    pasar el resto de la petición sin salir del event loop.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def _buscar_estatico(self, request):
+        if self.autorefresh:
+            return self.find_file(request.path_info)
+        return self.files.get(request.path_info)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        static_file = self._buscar_estatico(request)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
+
+
+class UsuarioSesionMiddleware:
+    """
+    Agrega `request.usuario`: el AppUser de la sesión, o None (envuelto en el
+    objeto perezoso) si no hay sesión o el usuario ya no existe.
+
+    Se carga de forma perezosa (solo si la vista lo usa), una sola vez por
+    petición y desde la caché de `sesion_usuario` cuando es posible. Las
+    vistas asíncronas no deben leerlo fuera de `sync_to_async`.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request.usuario = SimpleLazyObject(lambda: sesion_usuario.usuario_de_la_peticion(request))
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        request.usuario = SimpleLazyObject(lambda: sesion_usuario.usuario_de_la_peticion(request))
+        return await self.get_response(request)
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0008_noticia'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrediccionCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clave', models.CharField(max_length=64, unique=True, verbose_name='Hash del Texto')),
+                ('version_modelo', models.CharField(max_length=50, verbose_name='Versión del Modelo')),
+                ('resultado', models.JSONField(verbose_name='Respuesta del Modelo (JSON)')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('expira_en', models.DateTimeField(db_index=True, verbose_name='Expira en')),
+                ('aciertos', models.PositiveIntegerField(default=0, verbose_name='Aciertos')),
+            ],
+            options={
+                'verbose_name': 'Predicción en Caché',
+                'verbose_name_plural': 'Predicciones en Caché',
+            },
+        ),
+    ]
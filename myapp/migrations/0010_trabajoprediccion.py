@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0009_prediccioncache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrabajoPrediccion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('texto_clinico', models.TextField(verbose_name='Texto Clínico')),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('PROCESANDO', 'Procesando'), ('COMPLETADO', 'Completado'), ('ERROR', 'Error')], db_index=True, default='PENDIENTE', max_length=12, verbose_name='Estado')),
+                ('resultado', models.JSONField(blank=True, null=True, verbose_name='Resultado del Modelo (JSON)')),
+                ('error', models.TextField(blank=True, null=True, verbose_name='Error')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('fecha_inicio', models.DateTimeField(blank=True, null=True, verbose_name='Inicio del Procesamiento')),
+                ('fecha_fin', models.DateTimeField(blank=True, null=True, verbose_name='Fin del Procesamiento')),
+                ('paciente', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='trabajos_prediccion', to='myapp.paciente', verbose_name='Paciente')),
+            ],
+            options={
+                'verbose_name': 'Trabajo de Predicción',
+                'verbose_name_plural': 'Trabajos de Predicción',
+                'ordering': ['-fecha_creacion'],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0010_trabajoprediccion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LotePrediccion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre_archivo', models.CharField(max_length=255, verbose_name='Archivo Original')),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('PROCESANDO', 'Procesando'), ('COMPLETADO', 'Completado'), ('ERROR', 'Error')], default='PENDIENTE', max_length=12, verbose_name='Estado')),
+                ('total_filas', models.PositiveIntegerField(default=0, verbose_name='Total de Filas')),
+                ('procesadas', models.PositiveIntegerField(default=0, verbose_name='Filas Procesadas')),
+                ('con_error', models.PositiveIntegerField(default=0, verbose_name='Filas con Error')),
+                ('resultado_csv', models.TextField(blank=True, default='', verbose_name='Resultado (CSV)')),
+                ('error', models.TextField(blank=True, null=True, verbose_name='Error')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('fecha_fin', models.DateTimeField(blank=True, null=True, verbose_name='Fin del Procesamiento')),
+            ],
+            options={
+                'verbose_name': 'Lote de Predicción',
+                'verbose_name_plural': 'Lotes de Predicción',
+                'ordering': ['-fecha_creacion'],
+            },
+        ),
+    ]
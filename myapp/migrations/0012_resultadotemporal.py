@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0011_loteprediccion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResultadoTemporal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=64, unique=True, verbose_name='Token')),
+                ('texto_clinico', models.TextField(verbose_name='Texto Clínico')),
+                ('resultado', models.JSONField(verbose_name='Resultado del Modelo (JSON)')),
+                ('expira_en', models.DateTimeField(db_index=True, verbose_name='Expira en')),
+                ('paciente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resultados_temporales', to='myapp.paciente', verbose_name='Paciente')),
+            ],
+            options={
+                'verbose_name': 'Resultado Temporal',
+                'verbose_name_plural': 'Resultados Temporales',
+            },
+        ),
+    ]
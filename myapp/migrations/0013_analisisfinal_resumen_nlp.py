@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0012_resultadotemporal'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analisisfinal',
+            name='consenso_resultado',
+            field=models.CharField(blank=True, editable=False, max_length=50, null=True, verbose_name='Consenso NLP'),
+        ),
+        migrations.AddField(
+            model_name='analisisfinal',
+            name='max_probabilidad_crc',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Máx. Probabilidad CRC'),
+        ),
+        migrations.AddField(
+            model_name='analisisfinal',
+            name='porcentaje_acuerdo',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Porcentaje de Acuerdo'),
+        ),
+        migrations.AddIndex(
+            model_name='analisisfinal',
+            index=models.Index(fields=['consenso_resultado', 'porcentaje_acuerdo'], name='analisis_consenso_acuerdo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='analisisfinal',
+            index=models.Index(fields=['max_probabilidad_crc'], name='analisis_max_prob_crc_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0013_analisisfinal_resumen_nlp'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrediccionModelo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modelo', models.CharField(max_length=100, verbose_name='Modelo')),
+                ('prediccion', models.CharField(max_length=50, verbose_name='Predicción del Modelo')),
+                ('clase', models.CharField(choices=[('CCR', 'Cáncer Colorrectal'), ('CO', 'Paciente Control')], max_length=3, verbose_name='Clase Predicha')),
+                ('probabilidad_co', models.FloatField(blank=True, null=True, verbose_name='Probabilidad CO')),
+                ('probabilidad_crc', models.FloatField(blank=True, null=True, verbose_name='Probabilidad CRC')),
+                ('fecha', models.DateTimeField(verbose_name='Fecha del Análisis')),
+                ('analisis', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='predicciones_modelo', to='myapp.analisisfinal', verbose_name='Análisis Final')),
+            ],
+            options={
+                'verbose_name': 'Predicción por Modelo',
+                'verbose_name_plural': 'Predicciones por Modelo',
+                'indexes': [models.Index(fields=['modelo', 'fecha'], name='prediccion_modelo_fecha_idx'), models.Index(fields=['modelo', 'clase'], name='prediccion_modelo_clase_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0014_prediccionmodelo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarcaExportacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=50, unique=True, verbose_name='Exportación')),
+                ('ultimo_id', models.BigIntegerField(default=0, verbose_name='Último ID Exportado')),
+                ('fecha_exportacion', models.DateTimeField(auto_now=True, verbose_name='Última Exportación')),
+            ],
+            options={
+                'verbose_name': 'Marca de Exportación',
+                'verbose_name_plural': 'Marcas de Exportación',
+            },
+        ),
+        migrations.AddField(
+            model_name='analisisfinal',
+            name='historia',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='analisis_finales', to='myapp.historiaclinica', verbose_name='Historia Clínica'),
+        ),
+        migrations.AddField(
+            model_name='analisisfinal',
+            name='texto_clinico',
+            field=models.TextField(blank=True, null=True, verbose_name='Texto Clínico Analizado'),
+        ),
+    ]
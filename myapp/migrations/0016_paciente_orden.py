@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0015_exportacion_casos'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='paciente',
+            options={'ordering': ['primer_apellido', 'primer_nombre', 'id'], 'verbose_name': 'Paciente', 'verbose_name_plural': 'Pacientes'},
+        ),
+        migrations.AddIndex(
+            model_name='paciente',
+            index=models.Index(fields=['primer_apellido', 'primer_nombre', 'id'], name='paciente_orden_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:17
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0016_paciente_orden'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='paciente',
+            name='busqueda_identificacion',
+            field=models.CharField(blank=True, default='', editable=False, max_length=20, verbose_name='Identificación (búsqueda)'),
+        ),
+        migrations.AddField(
+            model_name='paciente',
+            name='busqueda_nombre',
+            field=models.CharField(blank=True, default='', editable=False, max_length=410, verbose_name='Nombre (búsqueda)'),
+        ),
+        migrations.AddField(
+            model_name='paciente',
+            name='busqueda_telefono',
+            field=models.CharField(blank=True, default='', editable=False, max_length=15, verbose_name='Teléfono (búsqueda)'),
+        ),
+        migrations.AddIndex(
+            model_name='paciente',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass('busqueda_nombre', name='gin_trgm_ops'), name='paciente_nombre_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='paciente',
+            index=models.Index(django.contrib.postgres.indexes.OpClass('busqueda_identificacion', name='varchar_pattern_ops'), name='paciente_ident_prefijo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='paciente',
+            index=models.Index(django.contrib.postgres.indexes.OpClass('busqueda_telefono', name='varchar_pattern_ops'), name='paciente_tel_prefijo_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0017_paciente_busqueda'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportacionPacientes',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre_archivo', models.CharField(max_length=255, verbose_name='Archivo Original')),
+                ('huella', models.CharField(db_index=True, max_length=64, verbose_name='Huella del Archivo (SHA-256)')),
+                ('estado', models.CharField(choices=[('PROCESANDO', 'Procesando'), ('COMPLETADO', 'Completado'), ('ERROR', 'Error')], default='PROCESANDO', max_length=12, verbose_name='Estado')),
+                ('filas_leidas', models.PositiveIntegerField(default=0, verbose_name='Filas Leídas')),
+                ('importadas', models.PositiveIntegerField(default=0, verbose_name='Filas Importadas')),
+                ('rechazadas', models.PositiveIntegerField(default=0, verbose_name='Filas Rechazadas')),
+                ('error', models.TextField(blank=True, null=True, verbose_name='Error')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('fecha_fin', models.DateTimeField(blank=True, null=True, verbose_name='Fin de la Importación')),
+            ],
+            options={
+                'verbose_name': 'Importación de Pacientes',
+                'verbose_name_plural': 'Importaciones de Pacientes',
+                'ordering': ['-fecha_creacion'],
+            },
+        ),
+        migrations.CreateModel(
+            name='FilaRechazada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fila', models.PositiveIntegerField(verbose_name='Fila del Archivo')),
+                ('numero_identificacion', models.CharField(blank=True, default='', max_length=50, verbose_name='Número de Identificación')),
+                ('errores', models.TextField(verbose_name='Errores')),
+                ('importacion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='filas_rechazadas', to='myapp.importacionpacientes', verbose_name='Importación')),
+            ],
+            options={
+                'verbose_name': 'Fila Rechazada',
+                'verbose_name_plural': 'Filas Rechazadas',
+                'ordering': ['importacion', 'fila'],
+            },
+        ),
+    ]
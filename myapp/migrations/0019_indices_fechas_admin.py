@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0018_importacion_pacientes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='analisisfinal',
+            name='fecha_analisis',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Fecha del Análisis'),
+        ),
+        migrations.AlterField(
+            model_name='historiaclinica',
+            name='fecha_visita',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Fecha y Hora de la Visita'),
+        ),
+        migrations.AlterField(
+            model_name='paciente',
+            name='fecha_nacimiento',
+            field=models.DateField(db_index=True, verbose_name='Fecha de Nacimiento'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0019_indices_fechas_admin'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='historiaclinica',
+            index=models.Index(fields=['paciente', '-fecha_visita'], name='historia_paciente_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0020_historia_paciente_fecha'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenPaciente',
+            fields=[
+                ('paciente', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='resumen', serialize=False, to='myapp.paciente', verbose_name='Paciente')),
+                ('total_historias', models.PositiveIntegerField(default=0, verbose_name='Historias Clínicas')),
+                ('total_analisis', models.PositiveIntegerField(default=0, verbose_name='Análisis')),
+                ('ultima_visita', models.DateTimeField(blank=True, null=True, verbose_name='Última Visita')),
+                ('fecha_ultimo_analisis', models.DateTimeField(blank=True, null=True, verbose_name='Último Análisis')),
+                ('ultimo_diagnostico', models.CharField(blank=True, choices=[('CCR', 'Cáncer Colorrectal'), ('CO', 'Paciente Control')], max_length=3, null=True, verbose_name='Último Diagnóstico Final')),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True, verbose_name='Última Actualización')),
+            ],
+            options={
+                'verbose_name': 'Resumen de Paciente',
+                'verbose_name_plural': 'Resúmenes de Pacientes',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='analisisfinal',
+            index=models.Index(fields=['paciente', '-fecha_analisis'], name='analisis_paciente_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0021_resumen_paciente'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Contador',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=50, unique=True, verbose_name='Contador')),
+                ('valor', models.BigIntegerField(default=0, verbose_name='Valor')),
+                ('fecha_reconciliacion', models.DateTimeField(blank=True, null=True, verbose_name='Última Reconciliación')),
+            ],
+            options={
+                'verbose_name': 'Contador',
+                'verbose_name_plural': 'Contadores',
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0022_contador'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadisticaAnalisis',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('periodo', models.CharField(choices=[('D', 'Día'), ('M', 'Mes')], max_length=1, verbose_name='Periodo')),
+                ('fecha', models.DateField(verbose_name='Fecha')),
+                ('rango_edad', models.CharField(choices=[('0-17', 'Menores de 18'), ('18-44', '18 a 44 años'), ('45-59', '45 a 59 años'), ('60-74', '60 a 74 años'), ('75+', '75 años o más')], max_length=5, verbose_name='Rango de Edad')),
+                ('sexo', models.CharField(choices=[('M', 'Masculino'), ('F', 'Femenino'), ('O', 'Otro')], max_length=1, verbose_name='Sexo')),
+                ('diagnostico_final', models.CharField(choices=[('CCR', 'Cáncer Colorrectal'), ('CO', 'Paciente Control')], max_length=3, verbose_name='Diagnóstico Final')),
+                ('nivel_acuerdo', models.CharField(choices=[('alto', 'Alto (> 80%)'), ('medio', 'Medio (50% - 80%)'), ('bajo', 'Bajo (< 50%)'), ('sin_dato', 'Sin dato')], max_length=8, verbose_name='Nivel de Acuerdo')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Análisis')),
+                ('concordantes', models.PositiveIntegerField(default=0, verbose_name='Concordantes con el Consenso')),
+            ],
+            options={
+                'verbose_name': 'Estadística de Análisis',
+                'verbose_name_plural': 'Estadísticas de Análisis',
+                'constraints': [models.UniqueConstraint(fields=('periodo', 'fecha', 'rango_edad', 'sexo', 'diagnostico_final', 'nivel_acuerdo'), name='estadistica_analisis_unica')],
+            },
+        ),
+    ]
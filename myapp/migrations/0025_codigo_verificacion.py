@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0024_correo_saliente'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='appuser',
+            name='verification_code',
+        ),
+        migrations.CreateModel(
+            name='CodigoVerificacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.EmailField(max_length=254, verbose_name='Correo')),
+                ('proposito', models.CharField(choices=[('login', 'Inicio de sesión'), ('reset', 'Recuperación de contraseña')], max_length=5, verbose_name='Propósito')),
+                ('codigo_hash', models.CharField(max_length=64, verbose_name='Huella del Código')),
+                ('intentos', models.PositiveSmallIntegerField(default=0, verbose_name='Intentos Fallidos')),
+                ('expira_en', models.DateTimeField(db_index=True, verbose_name='Expira en')),
+            ],
+            options={
+                'verbose_name': 'Código de Verificación',
+                'verbose_name_plural': 'Códigos de Verificación',
+                'constraints': [models.UniqueConstraint(fields=('email', 'proposito'), name='codigo_email_proposito_unico')],
+            },
+        ),
+    ]
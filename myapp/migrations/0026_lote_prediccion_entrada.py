@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0025_codigo_verificacion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='loteprediccion',
+            name='entrada',
+            field=models.JSONField(blank=True, default=list, verbose_name='Filas de Entrada'),
+        ),
+        migrations.AddField(
+            model_name='loteprediccion',
+            name='fecha_actividad',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Última Actividad'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+import re
+import unicodedata
+
+from django.db import migrations
+
+TAMANO_LOTE = 1000
+
+
+# Copias de Paciente.normalizar_busqueda / normalizar_identificacion: el modelo histórico no tiene sus métodos
+def _normalizar(texto):
+    texto = unicodedata.normalize('NFKD', str(texto or ''))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return ' '.join(texto.lower().split())
+
+
+def _normalizar_identificacion(texto):
+    return re.sub(r'[^0-9a-z]', '', _normalizar(texto))
+
+
+def rellenar_busqueda(apps, schema_editor):
+    """Calcula las columnas de búsqueda de los pacientes que existían antes de 0017."""
+    Paciente = apps.get_model('myapp', 'Paciente')
+    base = Paciente.objects.filter(busqueda_nombre='').order_by('pk').only(
+        'pk', 'numero_identificacion', 'primer_nombre', 'segundo_nombre',
+        'primer_apellido', 'segundo_apellido', 'telefono',
+    )
+
+    ultimo_pk = 0
+    while True:
+        bloque = list(base.filter(pk__gt=ultimo_pk)[:TAMANO_LOTE])
+        if not bloque:
+            break
+        for paciente in bloque:
+            nombres = (paciente.primer_nombre, paciente.segundo_nombre,
+                       paciente.primer_apellido, paciente.segundo_apellido)
+            paciente.busqueda_nombre = _normalizar(' '.join(n for n in nombres if n))
+            paciente.busqueda_identificacion = _normalizar_identificacion(paciente.numero_identificacion)
+            paciente.busqueda_telefono = re.sub(r'\D', '', paciente.telefono or '')
+        Paciente.objects.bulk_update(
+            bloque, ['busqueda_nombre', 'busqueda_identificacion', 'busqueda_telefono'],
+        )
+        ultimo_pk = bloque[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0026_lote_prediccion_entrada'),
+    ]
+
+    operations = [
+        migrations.RunPython(rellenar_busqueda, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+def borrar_mensajes_terminados(apps, schema_editor):
+    """Los correos ya enviados o fallidos no conservan el cuerpo (puede llevar un código de verificación)."""
+    CorreoSaliente = apps.get_model('myapp', 'CorreoSaliente')
+    CorreoSaliente.objects.filter(estado__in=('ENVIADO', 'FALLIDO')).exclude(mensaje='').update(mensaje='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0027_rellenar_busqueda_pacientes'),
+    ]
+
+    operations = [
+        migrations.RunPython(borrar_mensajes_terminados, migrations.RunPython.noop),
+    ]
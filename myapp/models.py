@@ -1,5 +1,8 @@
-import random
+import re
+import unicodedata
 from django.db import models
+from django.utils import timezone
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.contrib.auth.hashers import make_password, check_password
 from datetime import date
 from django.db.models import JSONField
@@ -9,7 +12,6 @@ class AppUser(models.Model):
     last_name = models.CharField(max_length=100)
     email = models.EmailField(unique=True)
     password = models.CharField(max_length=255)  # Guardada encriptada
-    verification_code = models.CharField(max_length=6, blank=True, null=True)
 
     def save(self, *args, **kwargs):
         """Hashea la contraseña antes de guardar el usuario."""
@@ -21,11 +23,6 @@ class AppUser(models.Model):
         """Verifica si la contraseña ingresada es correcta."""
         return check_password(raw_password, self.password)
 
-    def generate_verification_code(self):
-        """Genera un código de 6 dígitos y lo guarda en el modelo"""
-        self.verification_code = str(random.randint(100000, 999999))
-        self.save()
-
 class Paciente(models.Model):
     # Opciones para campos de selección
     TIPO_ID_CHOICES = (
@@ -80,7 +77,7 @@ class Paciente(models.Model):
         choices=ESTADO_CIVIL_CHOICES,
         verbose_name="Estado Civil"
     )
-    fecha_nacimiento = models.DateField(verbose_name="Fecha de Nacimiento")
+    fecha_nacimiento = models.DateField(db_index=True, verbose_name="Fecha de Nacimiento")
     pais_nacimiento = models.CharField(
         max_length=100,
         default='Colombia',
@@ -109,10 +106,46 @@ class Paciente(models.Model):
         verbose_name="Grupo Étnico"
     )
 
+    # --- Columnas de búsqueda (normalizadas: minúsculas y sin tildes) ---
+    busqueda_nombre = models.CharField(
+        max_length=410,
+        blank=True,
+        default='',
+        editable=False,
+        verbose_name="Nombre (búsqueda)"
+    )
+    busqueda_identificacion = models.CharField(
+        max_length=20,
+        blank=True,
+        default='',
+        editable=False,
+        verbose_name="Identificación (búsqueda)"
+    )
+    busqueda_telefono = models.CharField(
+        max_length=15,
+        blank=True,
+        default='',
+        editable=False,
+        verbose_name="Teléfono (búsqueda)"
+    )
+
+    CAMPOS_BUSQUEDA = ('busqueda_nombre', 'busqueda_identificacion', 'busqueda_telefono')
+
     class Meta:
         verbose_name = "Paciente"
         verbose_name_plural = "Pacientes"
-        ordering = ['primer_apellido', 'primer_nombre']
+        # `id` desempata pacientes homónimos para que el orden sea total (paginación por cursor)
+        ordering = ['primer_apellido', 'primer_nombre', 'id']
+        indexes = [
+            models.Index(fields=['primer_apellido', 'primer_nombre', 'id'], name='paciente_orden_idx'),
+            # Trigramas (pg_trgm): búsquedas "contiene" sobre los nombres sin recorrer la tabla
+            GinIndex(OpClass('busqueda_nombre', name='gin_trgm_ops'), name='paciente_nombre_trgm_idx'),
+            # varchar_pattern_ops: LIKE 'prefijo%' usa el índice con cualquier collation
+            models.Index(OpClass('busqueda_identificacion', name='varchar_pattern_ops'),
+                         name='paciente_ident_prefijo_idx'),
+            models.Index(OpClass('busqueda_telefono', name='varchar_pattern_ops'),
+                         name='paciente_tel_prefijo_idx'),
+        ]
 
     def __str__(self):
         return f"{self.primer_nombre} {self.primer_apellido} ({self.numero_identificacion})"
@@ -125,6 +158,33 @@ class Paciente(models.Model):
 
     edad = property(calcular_edad)
 
+    @staticmethod
+    def normalizar_busqueda(texto):
+        """Minúsculas, sin tildes ni diéresis y con espacios simples: "Muñoz " -> "munoz"."""
+        texto = unicodedata.normalize('NFKD', str(texto or ''))
+        texto = ''.join(c for c in texto if not unicodedata.combining(c))
+        return ' '.join(texto.lower().split())
+
+    @staticmethod
+    def normalizar_identificacion(texto):
+        """Quita puntos, guiones y espacios del número de identificación."""
+        return re.sub(r'[^0-9a-z]', '', Paciente.normalizar_busqueda(texto))
+
+    def actualizar_busqueda(self):
+        """Recalcula las columnas de búsqueda a partir de los nombres, la identificación y el teléfono."""
+        nombres = (self.primer_nombre, self.segundo_nombre, self.primer_apellido, self.segundo_apellido)
+        self.busqueda_nombre = self.normalizar_busqueda(' '.join(n for n in nombres if n))
+        self.busqueda_identificacion = self.normalizar_identificacion(self.numero_identificacion)
+        self.busqueda_telefono = re.sub(r'\D', '', self.telefono or '')
+
+    def save(self, *args, **kwargs):
+        """Mantiene las columnas de búsqueda sincronizadas con los datos del paciente."""
+        self.actualizar_busqueda()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | set(self.CAMPOS_BUSQUEDA)
+        super().save(*args, **kwargs)
+
 class HistoriaClinica(models.Model):
     # Enlace al paciente
     paciente = models.ForeignKey(
@@ -136,6 +196,7 @@ class HistoriaClinica(models.Model):
     
     fecha_visita = models.DateTimeField(
         auto_now_add=True,
+        db_index=True,
         verbose_name="Fecha y Hora de la Visita"
     )
     
@@ -163,6 +224,10 @@ class HistoriaClinica(models.Model):
         verbose_name = "Historia Clínica"
         verbose_name_plural = "Historias Clínicas "
         ordering = ['-fecha_visita'] 
+        indexes = [
+            # Historias más recientes de un paciente sin ordenar todas las suyas
+            models.Index(fields=['paciente', '-fecha_visita'], name='historia_paciente_fecha_idx'),
+        ]
 
     def __str__(self):
         return f"HC #{self.pk} - {self.paciente.primer_apellido} ({self.fecha_visita.strftime('%Y-%m-%d')})"
@@ -196,17 +261,192 @@ class AnalisisFinal(models.Model):
     # (Opcional) Fecha de registro para mantener orden
     fecha_analisis = models.DateTimeField(
         auto_now_add=True, 
+        db_index=True,
         verbose_name="Fecha del Análisis"
     )
 
+    # Texto que se envió al modelo y la historia clínica de la visita (para reentrenamiento)
+    texto_clinico = models.TextField(
+        blank=True,
+        null=True,
+        verbose_name="Texto Clínico Analizado"
+    )
+    historia = models.ForeignKey(
+        'HistoriaClinica',
+        on_delete=models.SET_NULL,
+        related_name='analisis_finales',
+        blank=True,
+        null=True,
+        verbose_name="Historia Clínica"
+    )
+
+    # --- Resumen extraído de predicciones_nlp (se calcula al guardar) ---
+    # Permiten filtrar y agregar en SQL sin leer el JSON de cada fila
+    consenso_resultado = models.CharField(
+        max_length=50,
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name="Consenso NLP"
+    )
+    porcentaje_acuerdo = models.FloatField(
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name="Porcentaje de Acuerdo"
+    )
+    max_probabilidad_crc = models.FloatField(
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name="Máx. Probabilidad CRC"
+    )
+
+    CAMPOS_RESUMEN = ('consenso_resultado', 'porcentaje_acuerdo', 'max_probabilidad_crc')
+
     class Meta:
         verbose_name = "Análisis Final"
         verbose_name_plural = "Análisis Finales"
         ordering = ['-fecha_analisis']
+        indexes = [
+            # Análisis más reciente de un paciente (resumen y línea de tiempo)
+            models.Index(fields=['paciente', '-fecha_analisis'], name='analisis_paciente_fecha_idx'),
+            models.Index(fields=['consenso_resultado', 'porcentaje_acuerdo'], name='analisis_consenso_acuerdo_idx'),
+            models.Index(fields=['max_probabilidad_crc'], name='analisis_max_prob_crc_idx'),
+        ]
 
     def __str__(self):
         return f"Análisis: {self.get_diagnostico_final_display()} - {self.paciente.primer_apellido}"
+
+    @staticmethod
+    def _a_numero(valor):
+        try:
+            return float(valor)
+        except (TypeError, ValueError):
+            return None
+
+    def actualizar_resumen(self):
+        """Copia consenso, acuerdo y la mayor probabilidad CRC del JSON a sus columnas."""
+        datos = self.predicciones_nlp if isinstance(self.predicciones_nlp, dict) else {}
+        consenso = datos.get('consenso') or {}
+        predicciones = datos.get('predicciones') or []
+
+        resultado = consenso.get('resultado_general')
+        self.consenso_resultado = str(resultado)[:50] if resultado is not None else None
+        self.porcentaje_acuerdo = self._a_numero(consenso.get('porcentaje_acuerdo'))
+
+        probabilidades = [
+            self._a_numero(item.get('probabilidad_CRC'))
+            for item in predicciones if isinstance(item, dict)
+        ]
+        probabilidades = [p for p in probabilidades if p is not None]
+        self.max_probabilidad_crc = max(probabilidades) if probabilidades else None
+
+    def save(self, *args, **kwargs):
+        """Mantiene las columnas de resumen sincronizadas con predicciones_nlp."""
+        self.actualizar_resumen()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'predicciones_nlp' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | set(self.CAMPOS_RESUMEN)
+        super().save(*args, **kwargs)
     
+class PrediccionModelo(models.Model):
+    """
+    Una fila por cada modelo NLP de un AnalisisFinal.
+
+    Duplica en columnas lo que viene en `predicciones_nlp['predicciones']` para
+    comparar modelos con consultas agrupadas en SQL.
+    """
+    analisis = models.ForeignKey(
+        'AnalisisFinal',
+        on_delete=models.CASCADE,
+        related_name='predicciones_modelo',
+        verbose_name="Análisis Final"
+    )
+    modelo = models.CharField(max_length=100, verbose_name="Modelo")
+    prediccion = models.CharField(max_length=50, verbose_name="Predicción del Modelo")
+    # Predicción traducida a los códigos de diagnostico_final ('CCR' o 'CO')
+    clase = models.CharField(
+        max_length=3,
+        choices=AnalisisFinal.DIAGNOSTICO_FINAL_CHOICES,
+        verbose_name="Clase Predicha"
+    )
+    probabilidad_co = models.FloatField(blank=True, null=True, verbose_name="Probabilidad CO")
+    probabilidad_crc = models.FloatField(blank=True, null=True, verbose_name="Probabilidad CRC")
+    # Copia de AnalisisFinal.fecha_analisis para filtrar por periodo sin JOIN
+    fecha = models.DateTimeField(verbose_name="Fecha del Análisis")
+
+    class Meta:
+        verbose_name = "Predicción por Modelo"
+        verbose_name_plural = "Predicciones por Modelo"
+        indexes = [
+            models.Index(fields=['modelo', 'fecha'], name='prediccion_modelo_fecha_idx'),
+            models.Index(fields=['modelo', 'clase'], name='prediccion_modelo_clase_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.modelo}: {self.prediccion} (Análisis #{self.analisis_id})"
+
+    @staticmethod
+    def clase_de(prediccion):
+        """Misma regla que usan las plantillas para colorear la predicción."""
+        prediccion = str(prediccion or '')
+        return 'CCR' if ('CRC' in prediccion or 'Cancer' in prediccion) else 'CO'
+
+    @classmethod
+    def construir_desde(cls, analisis):
+        """Crea (sin guardar) las filas por modelo a partir del JSON de un análisis."""
+        datos = analisis.predicciones_nlp if isinstance(analisis.predicciones_nlp, dict) else {}
+        filas = []
+        for item in datos.get('predicciones') or []:
+            if not isinstance(item, dict) or not item.get('modelo'):
+                continue
+            filas.append(cls(
+                analisis=analisis,
+                modelo=str(item['modelo'])[:100],
+                prediccion=str(item.get('prediccion', ''))[:50],
+                clase=cls.clase_de(item.get('prediccion')),
+                probabilidad_co=AnalisisFinal._a_numero(item.get('probabilidad_CO')),
+                probabilidad_crc=AnalisisFinal._a_numero(item.get('probabilidad_CRC')),
+                fecha=analisis.fecha_analisis,
+            ))
+        return filas
+
+class ResumenPaciente(models.Model):
+    """
+    Resumen clínico de un paciente (totales, última visita y último diagnóstico).
+
+    Se mantiene desde las señales de HistoriaClinica y AnalisisFinal para que
+    los listados lo muestren con un JOIN en vez de subconsultas por fila.
+    `manage.py reconstruir_resumen_pacientes` lo recalcula si se desincroniza.
+    """
+    paciente = models.OneToOneField(
+        'Paciente',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='resumen',
+        verbose_name="Paciente"
+    )
+    total_historias = models.PositiveIntegerField(default=0, verbose_name="Historias Clínicas")
+    total_analisis = models.PositiveIntegerField(default=0, verbose_name="Análisis")
+    ultima_visita = models.DateTimeField(blank=True, null=True, verbose_name="Última Visita")
+    fecha_ultimo_analisis = models.DateTimeField(blank=True, null=True, verbose_name="Último Análisis")
+    ultimo_diagnostico = models.CharField(
+        max_length=3,
+        choices=AnalisisFinal.DIAGNOSTICO_FINAL_CHOICES,
+        blank=True,
+        null=True,
+        verbose_name="Último Diagnóstico Final"
+    )
+    fecha_actualizacion = models.DateTimeField(auto_now=True, verbose_name="Última Actualización")
+
+    class Meta:
+        verbose_name = "Resumen de Paciente"
+        verbose_name_plural = "Resúmenes de Pacientes"
+
+    def __str__(self):
+        return f"Resumen de {self.paciente_id}: {self.total_historias} historias, {self.total_analisis} análisis"
+
 class RecursoMedico(models.Model):
     TIPO_CHOICES = (
         ('LIBRO', 'Libro / Guía'),
@@ -249,4 +489,379 @@ class Noticia(models.Model):
         ordering = ['-fecha_publicacion'] # Las más recientes primero
 
     def __str__(self):
-        return self.titulo
\ No newline at end of file
+        return self.titulo
+
+class PrediccionCache(models.Model):
+    """
+    Caché persistente de respuestas del modelo NLP.
+
+    La clave es el hash SHA-256 del texto clínico normalizado junto con la
+    versión del modelo, así un cambio de modelo invalida automáticamente lo guardado.
+    """
+    clave = models.CharField(max_length=64, unique=True, verbose_name="Hash del Texto")
+    version_modelo = models.CharField(max_length=50, verbose_name="Versión del Modelo")
+    resultado = models.JSONField(verbose_name="Respuesta del Modelo (JSON)")
+    fecha_creacion = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Creación")
+    expira_en = models.DateTimeField(db_index=True, verbose_name="Expira en")
+    aciertos = models.PositiveIntegerField(default=0, verbose_name="Aciertos")
+
+    class Meta:
+        verbose_name = "Predicción en Caché"
+        verbose_name_plural = "Predicciones en Caché"
+
+    def __str__(self):
+        return f"{self.clave[:12]}… ({self.version_modelo})"
+
+
+class TrabajoPrediccion(models.Model):
+    """
+    Trabajo de predicción NLP que se procesa fuera del hilo de la petición.
+
+    La vista lo encola y responde de inmediato; la página consulta el estado
+    hasta que el resultado (`predicciones`/`consenso`) esté listo.
+    """
+    ESTADO_CHOICES = (
+        ('PENDIENTE', 'Pendiente'),
+        ('PROCESANDO', 'Procesando'),
+        ('COMPLETADO', 'Completado'),
+        ('ERROR', 'Error'),
+    )
+
+    paciente = models.ForeignKey(
+        'Paciente',
+        on_delete=models.CASCADE,
+        related_name='trabajos_prediccion',
+        blank=True,
+        null=True,
+        verbose_name="Paciente"
+    )
+    texto_clinico = models.TextField(verbose_name="Texto Clínico")
+    estado = models.CharField(
+        max_length=12,
+        choices=ESTADO_CHOICES,
+        default='PENDIENTE',
+        db_index=True,
+        verbose_name="Estado"
+    )
+    resultado = models.JSONField(blank=True, null=True, verbose_name="Resultado del Modelo (JSON)")
+    error = models.TextField(blank=True, null=True, verbose_name="Error")
+    fecha_creacion = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Creación")
+    fecha_inicio = models.DateTimeField(blank=True, null=True, verbose_name="Inicio del Procesamiento")
+    fecha_fin = models.DateTimeField(blank=True, null=True, verbose_name="Fin del Procesamiento")
+
+    class Meta:
+        verbose_name = "Trabajo de Predicción"
+        verbose_name_plural = "Trabajos de Predicción"
+        ordering = ['-fecha_creacion']
+
+    def __str__(self):
+        return f"Trabajo #{self.pk} - {self.get_estado_display()}"
+
+    @property
+    def terminado(self):
+        return self.estado in ('COMPLETADO', 'ERROR')
+
+
+class LotePrediccion(models.Model):
+    """
+    Lote de descripciones clínicas (CSV o JSONL) que se puntúa en segundo plano.
+
+    El progreso se actualiza mientras avanza y al terminar se guarda el CSV
+    de resultados para descargarlo.
+    """
+    ESTADO_CHOICES = (
+        ('PENDIENTE', 'Pendiente'),
+        ('PROCESANDO', 'Procesando'),
+        ('COMPLETADO', 'Completado'),
+        ('ERROR', 'Error'),
+    )
+
+    nombre_archivo = models.CharField(max_length=255, verbose_name="Archivo Original")
+    estado = models.CharField(
+        max_length=12,
+        choices=ESTADO_CHOICES,
+        default='PENDIENTE',
+        verbose_name="Estado"
+    )
+    total_filas = models.PositiveIntegerField(default=0, verbose_name="Total de Filas")
+    procesadas = models.PositiveIntegerField(default=0, verbose_name="Filas Procesadas")
+    con_error = models.PositiveIntegerField(default=0, verbose_name="Filas con Error")
+    resultado_csv = models.TextField(blank=True, default='', verbose_name="Resultado (CSV)")
+    # Filas [id, texto] del archivo: permiten retomar el lote si el proceso se reinicia a mitad
+    entrada = models.JSONField(blank=True, default=list, verbose_name="Filas de Entrada")
+    error = models.TextField(blank=True, null=True, verbose_name="Error")
+    fecha_creacion = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Creación")
+    # Se renueva al reclamar el lote y con cada avance: si deja de moverse, el lote quedó huérfano
+    fecha_actividad = models.DateTimeField(blank=True, null=True, verbose_name="Última Actividad")
+    fecha_fin = models.DateTimeField(blank=True, null=True, verbose_name="Fin del Procesamiento")
+
+    class Meta:
+        verbose_name = "Lote de Predicción"
+        verbose_name_plural = "Lotes de Predicción"
+        ordering = ['-fecha_creacion']
+
+    def __str__(self):
+        return f"Lote #{self.pk} - {self.nombre_archivo} ({self.get_estado_display()})"
+
+    @property
+    def porcentaje(self):
+        if not self.total_filas:
+            return 0
+        return round(self.procesadas * 100 / self.total_filas)
+
+
+class ImportacionPacientes(models.Model):
+    """
+    Importación masiva de pacientes desde un archivo CSV o Excel.
+
+    `filas_leidas` solo avanza cuando un bloque se confirma en la base de datos,
+    así una importación interrumpida se reanuda desde el primer bloque pendiente.
+    """
+    ESTADO_CHOICES = (
+        ('PROCESANDO', 'Procesando'),
+        ('COMPLETADO', 'Completado'),
+        ('ERROR', 'Error'),
+    )
+
+    nombre_archivo = models.CharField(max_length=255, verbose_name="Archivo Original")
+    huella = models.CharField(max_length=64, db_index=True, verbose_name="Huella del Archivo (SHA-256)")
+    estado = models.CharField(
+        max_length=12,
+        choices=ESTADO_CHOICES,
+        default='PROCESANDO',
+        verbose_name="Estado"
+    )
+    filas_leidas = models.PositiveIntegerField(default=0, verbose_name="Filas Leídas")
+    importadas = models.PositiveIntegerField(default=0, verbose_name="Filas Importadas")
+    rechazadas = models.PositiveIntegerField(default=0, verbose_name="Filas Rechazadas")
+    error = models.TextField(blank=True, null=True, verbose_name="Error")
+    fecha_creacion = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Creación")
+    fecha_fin = models.DateTimeField(blank=True, null=True, verbose_name="Fin de la Importación")
+
+    class Meta:
+        verbose_name = "Importación de Pacientes"
+        verbose_name_plural = "Importaciones de Pacientes"
+        ordering = ['-fecha_creacion']
+
+    def __str__(self):
+        return f"Importación #{self.pk} - {self.nombre_archivo} ({self.get_estado_display()})"
+
+
+class FilaRechazada(models.Model):
+    """Fila de una importación que no pasó la validación, con sus errores."""
+    importacion = models.ForeignKey(
+        'ImportacionPacientes',
+        on_delete=models.CASCADE,
+        related_name='filas_rechazadas',
+        verbose_name="Importación"
+    )
+    fila = models.PositiveIntegerField(verbose_name="Fila del Archivo")
+    numero_identificacion = models.CharField(max_length=50, blank=True, default='', verbose_name="Número de Identificación")
+    errores = models.TextField(verbose_name="Errores")
+
+    class Meta:
+        verbose_name = "Fila Rechazada"
+        verbose_name_plural = "Filas Rechazadas"
+        ordering = ['importacion', 'fila']
+
+    def __str__(self):
+        return f"Fila {self.fila} ({self.numero_identificacion})"
+
+
+class Contador(models.Model):
+    """
+    Total de filas de una tabla, mantenido por señales al crear y borrar.
+
+    Evita COUNT(*) sobre tablas grandes en las páginas de inicio; el comando
+    `reconciliar_contadores` lo corrige periódicamente con el conteo real.
+    """
+    nombre = models.CharField(max_length=50, unique=True, verbose_name="Contador")
+    valor = models.BigIntegerField(default=0, verbose_name="Valor")
+    fecha_reconciliacion = models.DateTimeField(blank=True, null=True, verbose_name="Última Reconciliación")
+
+    class Meta:
+        verbose_name = "Contador"
+        verbose_name_plural = "Contadores"
+
+    def __str__(self):
+        return f"{self.nombre}: {self.valor}"
+
+
+class MarcaExportacion(models.Model):
+    """
+    Marca de agua de una exportación incremental: el último id ya exportado.
+    """
+    nombre = models.CharField(max_length=50, unique=True, verbose_name="Exportación")
+    ultimo_id = models.BigIntegerField(default=0, verbose_name="Último ID Exportado")
+    fecha_exportacion = models.DateTimeField(auto_now=True, verbose_name="Última Exportación")
+
+    class Meta:
+        verbose_name = "Marca de Exportación"
+        verbose_name_plural = "Marcas de Exportación"
+
+    def __str__(self):
+        return f"{self.nombre}: hasta #{self.ultimo_id}"
+
+
+class ResultadoTemporal(models.Model):
+    """
+    Resultado de un análisis NLP pendiente de confirmación por el médico.
+
+    Se guarda en el servidor bajo un token aleatorio de corta duración; el
+    formulario de "guardar" solo envía el token, no el JSON completo.
+    """
+    token = models.CharField(max_length=64, unique=True, verbose_name="Token")
+    paciente = models.ForeignKey(
+        'Paciente',
+        on_delete=models.CASCADE,
+        related_name='resultados_temporales',
+        verbose_name="Paciente"
+    )
+    texto_clinico = models.TextField(verbose_name="Texto Clínico")
+    resultado = models.JSONField(verbose_name="Resultado del Modelo (JSON)")
+    expira_en = models.DateTimeField(db_index=True, verbose_name="Expira en")
+
+    class Meta:
+        verbose_name = "Resultado Temporal"
+        verbose_name_plural = "Resultados Temporales"
+
+    def __str__(self):
+        return f"{self.token[:8]}… - {self.paciente_id}"
+
+
+class EstadisticaAnalisis(models.Model):
+    """
+    Conteo precalculado de análisis finales por periodo (día o mes), rango de
+    edad, sexo, diagnóstico final y nivel de acuerdo del consenso NLP.
+
+    Se actualiza de forma incremental (solo con los análisis nuevos) con el
+    comando `actualizar_estadisticas`; la página de estadísticas lee solo esta tabla.
+    """
+    PERIODO_CHOICES = (
+        ('D', 'Día'),
+        ('M', 'Mes'),
+    )
+
+    # (clave, etiqueta, edad mínima, edad máxima)
+    RANGOS_EDAD = (
+        ('0-17', 'Menores de 18', 0, 17),
+        ('18-44', '18 a 44 años', 18, 44),
+        ('45-59', '45 a 59 años', 45, 59),
+        ('60-74', '60 a 74 años', 60, 74),
+        ('75+', '75 años o más', 75, None),
+    )
+
+    NIVEL_ACUERDO_CHOICES = (
+        ('alto', 'Alto (> 80%)'),
+        ('medio', 'Medio (50% - 80%)'),
+        ('bajo', 'Bajo (< 50%)'),
+        ('sin_dato', 'Sin dato'),
+    )
+
+    periodo = models.CharField(max_length=1, choices=PERIODO_CHOICES, verbose_name="Periodo")
+    # Primer día del periodo (el mismo día, o el día 1 del mes)
+    fecha = models.DateField(verbose_name="Fecha")
+    rango_edad = models.CharField(
+        max_length=5,
+        choices=[(clave, etiqueta) for clave, etiqueta, _, _ in RANGOS_EDAD],
+        verbose_name="Rango de Edad"
+    )
+    sexo = models.CharField(max_length=1, choices=Paciente.SEXO_CHOICES, verbose_name="Sexo")
+    diagnostico_final = models.CharField(
+        max_length=3,
+        choices=AnalisisFinal.DIAGNOSTICO_FINAL_CHOICES,
+        verbose_name="Diagnóstico Final"
+    )
+    nivel_acuerdo = models.CharField(max_length=8, choices=NIVEL_ACUERDO_CHOICES, verbose_name="Nivel de Acuerdo")
+    total = models.PositiveIntegerField(default=0, verbose_name="Análisis")
+    # Análisis en los que el consenso NLP coincide con el diagnóstico final
+    concordantes = models.PositiveIntegerField(default=0, verbose_name="Concordantes con el Consenso")
+
+    class Meta:
+        verbose_name = "Estadística de Análisis"
+        verbose_name_plural = "Estadísticas de Análisis"
+        constraints = [
+            # También sirve de índice para las consultas por (periodo, fecha)
+            models.UniqueConstraint(
+                fields=['periodo', 'fecha', 'rango_edad', 'sexo', 'diagnostico_final', 'nivel_acuerdo'],
+                name='estadistica_analisis_unica',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_periodo_display()} {self.fecha} - {self.diagnostico_final}: {self.total}"
+
+
+class CorreoSaliente(models.Model):
+    """
+    Correo en cola de salida (outbox).
+
+    Las vistas solo crean el registro y responden; el envío por SMTP lo hace
+    un worker (en un hilo del proceso o con el comando `enviar_correos`),
+    con reintentos espaciados si el servidor de correo falla.
+    """
+    ESTADO_CHOICES = (
+        ('PENDIENTE', 'Pendiente'),
+        ('ENVIANDO', 'Enviando'),
+        ('ENVIADO', 'Enviado'),
+        ('FALLIDO', 'Fallido'),
+    )
+
+    asunto = models.CharField(max_length=255, verbose_name="Asunto")
+    mensaje = models.TextField(verbose_name="Mensaje")
+    remitente = models.CharField(max_length=254, blank=True, verbose_name="Remitente")
+    destinatarios = models.JSONField(verbose_name="Destinatarios")
+    estado = models.CharField(
+        max_length=10,
+        choices=ESTADO_CHOICES,
+        default='PENDIENTE',
+        verbose_name="Estado"
+    )
+    intentos = models.PositiveSmallIntegerField(default=0, verbose_name="Intentos")
+    proximo_intento = models.DateTimeField(default=timezone.now, verbose_name="Próximo Intento")
+    error = models.TextField(blank=True, null=True, verbose_name="Último Error")
+    fecha_creacion = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Creación")
+    fecha_ultimo_intento = models.DateTimeField(blank=True, null=True, verbose_name="Último Intento")
+    fecha_envio = models.DateTimeField(blank=True, null=True, verbose_name="Fecha de Envío")
+
+    class Meta:
+        verbose_name = "Correo Saliente"
+        verbose_name_plural = "Correos Salientes"
+        ordering = ['-fecha_creacion']
+        indexes = [
+            # El worker busca los pendientes cuyo próximo intento ya llegó
+            models.Index(fields=['estado', 'proximo_intento'], name='correo_estado_intento_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.asunto} -> {', '.join(self.destinatarios)} ({self.get_estado_display()})"
+
+
+class CodigoVerificacion(models.Model):
+    """
+    Código de verificación pendiente (inicio de sesión o recuperación de contraseña).
+
+    Solo guarda el HMAC del código; vence a los pocos minutos, admite un número
+    limitado de intentos y se elimina al usarse. Ver `codigos_verificacion`.
+    """
+    PROPOSITO_CHOICES = (
+        ('login', 'Inicio de sesión'),
+        ('reset', 'Recuperación de contraseña'),
+    )
+
+    email = models.EmailField(verbose_name="Correo")
+    proposito = models.CharField(max_length=5, choices=PROPOSITO_CHOICES, verbose_name="Propósito")
+    codigo_hash = models.CharField(max_length=64, verbose_name="Huella del Código")
+    intentos = models.PositiveSmallIntegerField(default=0, verbose_name="Intentos Fallidos")
+    expira_en = models.DateTimeField(db_index=True, verbose_name="Expira en")
+
+    class Meta:
+        verbose_name = "Código de Verificación"
+        verbose_name_plural = "Códigos de Verificación"
+        constraints = [
+            # Un código vigente por correo y propósito; también es el índice de búsqueda
+            models.UniqueConstraint(fields=['email', 'proposito'], name='codigo_email_proposito_unico'),
+        ]
+
+    def __str__(self):
+        return f"{self.email} ({self.get_proposito_display()})"
@@ -0,0 +1,93 @@
+import asyncio
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from os import getenv
+
+from django.contrib.auth.hashers import make_password
+
+from .resiliencia import VentanaDeslizante
+
+# Intentos permitidos por IP dentro de la ventana (login, registro y cambio de contraseña)
+LOGIN_LIMITE_IP = int(getenv("LOGIN_LIMITE_IP", "20"))
+LOGIN_VENTANA_IP = int(getenv("LOGIN_VENTANA_IP", "60"))
+# Intentos de inicio de sesión permitidos por correo dentro de la ventana
+LOGIN_LIMITE_EMAIL = int(getenv("LOGIN_LIMITE_EMAIL", "5"))
+LOGIN_VENTANA_EMAIL = int(getenv("LOGIN_VENTANA_EMAIL", "300"))
+# Hilos que calculan hashes PBKDF2 a la vez en cada proceso (el resto espera en cola)
+HASH_HILOS = int(getenv("HASH_HILOS", "2"))
+
+_por_ip = VentanaDeslizante(LOGIN_LIMITE_IP, LOGIN_VENTANA_IP)
+_por_email = VentanaDeslizante(LOGIN_LIMITE_EMAIL, LOGIN_VENTANA_EMAIL)
+
+# Un pool acotado: una ráfaga de contraseñas no puede ocupar todos los núcleos
+_pool = ThreadPoolExecutor(max_workers=HASH_HILOS, thread_name_prefix="hash")
+
+_lock = threading.Lock()
+_contadores = {
+    "rechazados_ip": 0,
+    "rechazados_email": 0,
+    "hashes": 0,
+}
+
+
+def _incrementar(nombre):
+    with _lock:
+        _contadores[nombre] += 1
+
+
+def _ip(request):
+    return request.META.get("REMOTE_ADDR") or "desconocida"
+
+
+def limitar(request, email=None):
+    """
+    Aplica los límites por IP y, si se indica, por correo.
+
+    Se llama antes de cualquier hash. Retorna None si el intento se permite,
+    o el mensaje de error que se debe mostrar.
+    """
+    espera = _por_ip.permitir(_ip(request))
+    if espera:
+        _incrementar("rechazados_ip")
+    elif email:
+        espera = _por_email.permitir(email.strip().lower())
+        if espera:
+            _incrementar("rechazados_email")
+
+    if espera:
+        return f"Demasiados intentos. Intenta de nuevo en {math.ceil(espera)} segundos."
+    return None
+
+
+def login_exitoso(email):
+    """Reinicia el límite del correo tras un inicio de sesión correcto."""
+    _por_email.limpiar(email.strip().lower())
+
+
+def verificar_password(user, password):
+    """`user.check_password` ejecutado en el pool acotado de hashes."""
+    _incrementar("hashes")
+    return _pool.submit(user.check_password, password or "").result()
+
+
+async def verificar_password_async(user, password):
+    """Igual que `verificar_password`, sin bloquear el event loop mientras se calcula el hash."""
+    _incrementar("hashes")
+    return await asyncio.wrap_future(_pool.submit(user.check_password, password or ""))
+
+
+def crear_hash(password):
+    """`make_password` ejecutado en el pool acotado de hashes."""
+    _incrementar("hashes")
+    return _pool.submit(make_password, password).result()
+
+
+def estadisticas():
+    """Intentos rechazados por límite frente a hashes calculados en este proceso."""
+    with _lock:
+        datos = dict(_contadores)
+    datos["limite_ip"] = _por_ip.estado()
+    datos["limite_email"] = _por_email.estado()
+    datos["hash_hilos"] = HASH_HILOS
+    return datos
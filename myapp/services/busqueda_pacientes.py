@@ -0,0 +1,47 @@
+import re
+
+from django.db.models import Case, IntegerField, Q, Value, When
+
+from myapp.models import Paciente
+
+# Con menos dígitos el prefijo del teléfono coincide con casi todos los pacientes
+MIN_DIGITOS_TELEFONO = 4
+
+# Orden de resultados de búsqueda: primero los más relevantes y luego el orden del modelo
+ORDEN_RESULTADOS = ('relevancia', 'primer_apellido', 'primer_nombre', 'id')
+
+
+def buscar_pacientes(termino, queryset=None):
+    """
+    Busca pacientes por número de identificación (prefijo), nombres y apellidos
+    (cada palabra en cualquier parte, sin importar tildes ni mayúsculas) y teléfono (prefijo).
+
+    Trabaja sobre las columnas `busqueda_*` de Paciente, que tienen índices de
+    trigramas y de prefijo. Retorna un queryset anotado con `relevancia`
+    (0 = identificación exacta ... 4 = coincidencia parcial en el nombre).
+    """
+    pacientes = Paciente.objects.all() if queryset is None else queryset
+    texto = Paciente.normalizar_busqueda(termino)
+    if not texto:
+        return pacientes.annotate(relevancia=Value(0, output_field=IntegerField()))
+
+    identificacion = Paciente.normalizar_identificacion(termino)
+    digitos = re.sub(r'\D', '', termino)
+
+    filtro = Q()
+    for palabra in texto.split():
+        filtro &= Q(busqueda_nombre__contains=palabra)
+
+    reglas = [When(busqueda_nombre__startswith=texto, then=3),
+              When(busqueda_nombre__contains=f" {texto}", then=3)]
+    if identificacion:
+        filtro |= Q(busqueda_identificacion__startswith=identificacion)
+        reglas = [When(busqueda_identificacion=identificacion, then=0),
+                  When(busqueda_identificacion__startswith=identificacion, then=1)] + reglas
+    if len(digitos) >= MIN_DIGITOS_TELEFONO:
+        filtro |= Q(busqueda_telefono__startswith=digitos)
+        reglas.insert(-2, When(busqueda_telefono__startswith=digitos, then=2))
+
+    return pacientes.filter(filtro).annotate(
+        relevancia=Case(*reglas, default=4, output_field=IntegerField())
+    )
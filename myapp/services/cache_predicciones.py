@@ -0,0 +1,148 @@
+import copy
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import timedelta
+from os import getenv
+
+from django.db.models import F
+from django.utils import timezone
+
+from ..models import PrediccionCache
+
+# Versión del modelo NLP: al cambiarla, las entradas anteriores dejan de coincidir
+NLP_MODEL_VERSION = getenv("NLP_MODEL_VERSION", "v1")
+# Tiempo de vida de una predicción en caché (segundos)
+NLP_CACHE_TTL = int(getenv("NLP_CACHE_TTL", str(7 * 24 * 3600)))
+# Máximo de entradas en la caché en memoria (LRU) de cada proceso
+NLP_CACHE_MAX_ENTRADAS = int(getenv("NLP_CACHE_MAX_ENTRADAS", "512"))
+
+_lock = threading.Lock()
+# clave -> (expira_en_monotonic, resultado)
+_memoria = OrderedDict()
+_contadores = {
+    "aciertos_memoria": 0,
+    "aciertos_db": 0,
+    "fallos": 0,
+    "guardados": 0,
+    "expulsados": 0,
+}
+
+
+def normalizar_texto(texto):
+    """Normaliza el texto clínico (unicode, mayúsculas y espacios) antes de calcular la clave."""
+    texto = unicodedata.normalize("NFC", texto or "")
+    return re.sub(r"\s+", " ", texto).strip().lower()
+
+
+def calcular_clave(texto):
+    """Hash SHA-256 del texto normalizado más la versión del modelo."""
+    base = f"{NLP_MODEL_VERSION}\x00{normalizar_texto(texto)}"
+    return hashlib.sha256(base.encode("utf-8")).hexdigest()
+
+
+def _incrementar(nombre):
+    with _lock:
+        _contadores[nombre] += 1
+
+
+def _guardar_en_memoria(clave, resultado, ttl):
+    # Copia propia: quien guardó el resultado puede seguir modificándolo
+    resultado = copy.deepcopy(resultado)
+    with _lock:
+        _memoria[clave] = (time.monotonic() + ttl, resultado)
+        _memoria.move_to_end(clave)
+        while len(_memoria) > NLP_CACHE_MAX_ENTRADAS:
+            _memoria.popitem(last=False)
+            _contadores["expulsados"] += 1
+
+
+def _leer_de_memoria(clave):
+    with _lock:
+        entrada = _memoria.get(clave)
+        if entrada is None:
+            return None
+        expira, resultado = entrada
+        if expira <= time.monotonic():
+            del _memoria[clave]
+            return None
+        _memoria.move_to_end(clave)
+    # Cada llamada recibe su propia copia, así una vista no cambia lo que ven las demás
+    return copy.deepcopy(resultado)
+
+
+def obtener(texto):
+    """
+    Busca una predicción en caché: primero en memoria y luego en la base de datos.
+
+    Retorna el diccionario de la respuesta o None si no existe o ya expiró.
+    """
+    clave = calcular_clave(texto)
+
+    resultado = _leer_de_memoria(clave)
+    if resultado is not None:
+        _incrementar("aciertos_memoria")
+        return resultado
+
+    try:
+        entrada = PrediccionCache.objects.filter(clave=clave).first()
+        if entrada is not None:
+            if entrada.expira_en > timezone.now():
+                PrediccionCache.objects.filter(pk=entrada.pk).update(aciertos=F("aciertos") + 1)
+                restante = (entrada.expira_en - timezone.now()).total_seconds()
+                _guardar_en_memoria(clave, entrada.resultado, restante)
+                _incrementar("aciertos_db")
+                return entrada.resultado
+            # Entrada vencida: se elimina para que se vuelva a consultar el modelo
+            entrada.delete()
+    except Exception:
+        # Si la base de datos falla, la caché simplemente no responde
+        pass
+
+    _incrementar("fallos")
+    return None
+
+
+def guardar(texto, resultado):
+    """Guarda una respuesta exitosa del modelo en ambos niveles de caché."""
+    clave = calcular_clave(texto)
+    _guardar_en_memoria(clave, resultado, NLP_CACHE_TTL)
+    _incrementar("guardados")
+
+    try:
+        PrediccionCache.objects.update_or_create(
+            clave=clave,
+            defaults={
+                "version_modelo": NLP_MODEL_VERSION,
+                "resultado": resultado,
+                "expira_en": timezone.now() + timedelta(seconds=NLP_CACHE_TTL),
+            },
+        )
+    except Exception:
+        pass
+
+
+def purgar_expirados():
+    """Elimina de la base de datos las entradas vencidas. Retorna cuántas se borraron."""
+    borrados, _ = PrediccionCache.objects.filter(expira_en__lte=timezone.now()).delete()
+    return borrados
+
+
+def limpiar_memoria():
+    """Vacía la caché en memoria del proceso actual."""
+    with _lock:
+        _memoria.clear()
+
+
+def estadisticas():
+    """Contadores de aciertos/fallos de la caché en este proceso."""
+    with _lock:
+        datos = dict(_contadores)
+        datos["entradas_memoria"] = len(_memoria)
+    consultas = datos["aciertos_memoria"] + datos["aciertos_db"] + datos["fallos"]
+    aciertos = datos["aciertos_memoria"] + datos["aciertos_db"]
+    datos["tasa_aciertos"] = round(aciertos / consultas, 4) if consultas else 0.0
+    return datos
@@ -0,0 +1,162 @@
+import hashlib
+import hmac
+import secrets
+from datetime import timedelta
+from os import getenv
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F
+from django.utils import timezone
+
+from ..models import CodigoVerificacion
+
+# Minutos de validez de un código (el correo le dice al usuario "10 minutos")
+CODIGO_VALIDEZ_MINUTOS = int(getenv("CODIGO_VALIDEZ_MINUTOS", "10"))
+# Intentos permitidos por código; al agotarlos hay que pedir uno nuevo
+CODIGO_MAX_INTENTOS = int(getenv("CODIGO_MAX_INTENTOS", "5"))
+# Alias de CACHES donde guardar los códigos (p. ej. Redis compartido por todos los workers).
+# Vacío: se guardan en la tabla CodigoVerificacion. Si la caché falla, también se usa la tabla.
+CODIGOS_VERIFICACION_CACHE = getenv("CODIGOS_VERIFICACION_CACHE", "")
+
+# Propósitos de un código
+LOGIN = 'login'
+RECUPERACION = 'reset'
+
+# Resultados de verificar()
+VALIDO = 'valido'
+INCORRECTO = 'incorrecto'
+VENCIDO = 'vencido'
+
+
+def _huella(email, proposito, codigo):
+    """HMAC del código: ni la caché ni la tabla guardan el código en claro."""
+    mensaje = f"{proposito}\x00{email.lower()}\x00{codigo}".encode('utf-8')
+    return hmac.new(settings.SECRET_KEY.encode('utf-8'), mensaje, hashlib.sha256).hexdigest()
+
+
+def _clave_cache(email, proposito):
+    return f"codigo_verificacion:{proposito}:{hashlib.sha256(email.lower().encode('utf-8')).hexdigest()}"
+
+
+def _cache():
+    return caches[CODIGOS_VERIFICACION_CACHE] if CODIGOS_VERIFICACION_CACHE else None
+
+
+# --- Tabla CodigoVerificacion ---
+
+def _guardar_db(email, proposito, huella):
+    CodigoVerificacion.objects.update_or_create(
+        email=email,
+        proposito=proposito,
+        defaults={
+            'codigo_hash': huella,
+            'intentos': 0,
+            'expira_en': timezone.now() + timedelta(minutes=CODIGO_VALIDEZ_MINUTOS),
+        },
+    )
+
+
+def _verificar_db(email, proposito, huella):
+    codigo = CodigoVerificacion.objects.filter(
+        email=email, proposito=proposito, expira_en__gt=timezone.now(),
+    ).first()
+    if codigo is None:
+        return VENCIDO
+
+    # El intento se reserva antes de comparar, en un solo UPDATE: peticiones en
+    # paralelo no pueden superar CODIGO_MAX_INTENTOS comparaciones (igual que incr en la caché)
+    reservado = CodigoVerificacion.objects.filter(
+        pk=codigo.pk, intentos__lt=CODIGO_MAX_INTENTOS, expira_en__gt=timezone.now(),
+    ).update(intentos=F('intentos') + 1)
+    if not reservado:
+        CodigoVerificacion.objects.filter(pk=codigo.pk, intentos__gte=CODIGO_MAX_INTENTOS).delete()
+        return VENCIDO
+
+    if hmac.compare_digest(codigo.codigo_hash, huella):
+        # Un solo uso: solo una petición logra borrar la fila
+        borrados, _ = CodigoVerificacion.objects.filter(pk=codigo.pk, codigo_hash=huella).delete()
+        return VALIDO if borrados else VENCIDO
+    return INCORRECTO
+
+
+# --- Caché compartida ---
+
+def _guardar_cache(cache, email, proposito, huella):
+    clave = _clave_cache(email, proposito)
+    segundos = CODIGO_VALIDEZ_MINUTOS * 60
+    cache.set_many({clave: huella, f"{clave}:intentos": 0}, segundos)
+
+
+def _verificar_cache(cache, email, proposito, huella):
+    clave = _clave_cache(email, proposito)
+    guardada = cache.get(clave)
+    if guardada is None:
+        return None
+    try:
+        intentos = cache.incr(f"{clave}:intentos")
+    except ValueError:
+        # El contador venció antes que el código
+        intentos = CODIGO_MAX_INTENTOS + 1
+    if intentos > CODIGO_MAX_INTENTOS:
+        cache.delete_many([clave, f"{clave}:intentos"])
+        return VENCIDO
+
+    if hmac.compare_digest(guardada, huella):
+        # Un solo uso: solo una petición logra borrar la clave
+        return VALIDO if cache.delete(clave) else VENCIDO
+    return INCORRECTO
+
+
+# --- API ---
+
+def generar(email, proposito):
+    """
+    Crea un código de 6 dígitos para `email` y lo retorna.
+
+    Reemplaza cualquier código anterior del mismo propósito; no escribe en AppUser.
+    """
+    codigo = f"{secrets.randbelow(900000) + 100000}"
+    huella = _huella(email, proposito, codigo)
+
+    cache = _cache()
+    if cache is not None:
+        try:
+            _guardar_cache(cache, email, proposito, huella)
+            return codigo
+        except Exception:
+            # Caché no disponible: el código se guarda en la tabla
+            pass
+
+    _guardar_db(email, proposito, huella)
+    return codigo
+
+
+def verificar(email, proposito, codigo):
+    """
+    Comprueba el código y, si es correcto, lo consume.
+
+    Retorna VALIDO, INCORRECTO, o VENCIDO (no existe, expiró, ya se usó o agotó los intentos).
+    """
+    if not email or not codigo:
+        return INCORRECTO
+    huella = _huella(email, proposito, codigo.strip())
+
+    cache = _cache()
+    if cache is not None:
+        try:
+            resultado = _verificar_cache(cache, email, proposito, huella)
+            if resultado is not None:
+                return resultado
+        except Exception:
+            # Caché no disponible: se consulta la tabla
+            pass
+
+    # Sin caché, o el código se guardó en la tabla porque la caché falló al generarlo
+    return _verificar_db(email, proposito, huella)
+
+
+def purgar_vencidos():
+    """Elimina de la tabla los códigos vencidos. Retorna cuántos se eliminaron."""
+    borrados, _ = CodigoVerificacion.objects.filter(expira_en__lte=timezone.now()).delete()
+    return borrados
@@ -0,0 +1,82 @@
+import threading
+import time
+from os import getenv
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from ..models import AnalisisFinal, Contador, Paciente
+
+# Segundos que cada proceso reutiliza los contadores leídos de la base de datos
+CONTADORES_CACHE_TTL = int(getenv("CONTADORES_CACHE_TTL", "30"))
+
+# Nombre del contador -> modelo que cuenta
+CONTADORES = {
+    'pacientes': Paciente,
+    'analisis': AnalisisFinal,
+}
+
+_lock = threading.Lock()
+# (expira_en_monotonic, {nombre: valor})
+_memoria = None
+
+
+def limpiar_memoria():
+    global _memoria
+    with _lock:
+        _memoria = None
+
+
+def incrementar(nombre, delta=1):
+    """
+    Suma `delta` al contador dentro de la transacción actual (UPDATE atómico).
+
+    Si el contador aún no existe se crea con el conteo real, que ya incluye el cambio.
+    """
+    if not Contador.objects.filter(nombre=nombre).update(valor=F('valor') + delta):
+        reconciliar([nombre])
+    # La caché de este proceso se descarta cuando el cambio queda confirmado
+    transaction.on_commit(limpiar_memoria)
+
+
+def reconciliar(nombres=None):
+    """
+    Reemplaza los contadores por el conteo real de cada tabla.
+
+    Retorna {nombre: (valor_anterior, valor_nuevo)}.
+    """
+    cambios = {}
+    for nombre in nombres or CONTADORES:
+        with transaction.atomic():
+            contador, _ = Contador.objects.select_for_update().get_or_create(nombre=nombre)
+            anterior = contador.valor
+            contador.valor = CONTADORES[nombre].objects.count()
+            contador.fecha_reconciliacion = timezone.now()
+            contador.save(update_fields=['valor', 'fecha_reconciliacion'])
+        cambios[nombre] = (anterior, contador.valor)
+    limpiar_memoria()
+    return cambios
+
+
+def obtener_todos():
+    """
+    Retorna {nombre: valor} de todos los contadores.
+
+    Se lee de la memoria del proceso mientras no venza CONTADORES_CACHE_TTL;
+    si no, una sola consulta a la tabla de contadores (nunca COUNT(*) sobre las tablas).
+    """
+    global _memoria
+    with _lock:
+        if _memoria is not None and _memoria[0] > time.monotonic():
+            return dict(_memoria[1])
+
+    valores = dict(Contador.objects.filter(nombre__in=CONTADORES).values_list('nombre', 'valor'))
+    faltantes = [nombre for nombre in CONTADORES if nombre not in valores]
+    if faltantes:
+        # Primera vez: se inicializan con el conteo real
+        valores.update({nombre: nuevo for nombre, (_, nuevo) in reconciliar(faltantes).items()})
+
+    with _lock:
+        _memoria = (time.monotonic() + CONTADORES_CACHE_TTL, valores)
+    return dict(valores)
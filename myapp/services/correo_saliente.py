@@ -0,0 +1,216 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from os import getenv
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from ..models import CorreoSaliente
+
+# Si es "1", los correos se envían en un hilo del mismo proceso de Django, que también
+# programa los reintentos; lo que quedó en cola antes de un reinicio sale con el próximo correo.
+# Con "0" quedan en cola para el comando `enviar_correos`.
+CORREO_ENVIO_EN_PROCESO = getenv("CORREO_ENVIO_EN_PROCESO", "1") == "1"
+# Correos que se reclaman y se envían por la misma conexión SMTP en cada ronda
+CORREO_TAMANO_LOTE = int(getenv("CORREO_TAMANO_LOTE", "50"))
+# Intentos antes de marcar el correo como FALLIDO
+CORREO_MAX_INTENTOS = int(getenv("CORREO_MAX_INTENTOS", "5"))
+# Espera antes del primer reintento (s); se duplica en cada intento fallido
+CORREO_REINTENTO_SEGUNDOS = int(getenv("CORREO_REINTENTO_SEGUNDOS", "30"))
+CORREO_REINTENTO_MAXIMO_SEGUNDOS = 3600
+# Minutos en ENVIANDO tras los cuales un correo se considera abandonado (p. ej. por un reinicio)
+CORREO_ATASCADO_MINUTOS = int(getenv("CORREO_ATASCADO_MINUTOS", "10"))
+# Días que se conservan los correos ENVIADO y FALLIDO antes de purgarlos
+CORREO_RETENCION_DIAS = int(getenv("CORREO_RETENCION_DIAS", "7"))
+
+_executor = None
+
+_lock = threading.Lock()
+# Temporizador del próximo reintento en este proceso y su vencimiento (time.monotonic)
+_temporizador = None
+_temporizador_vence = None
+# Próxima purga de correos terminados en este proceso (time.monotonic)
+_proxima_purga = 0.0
+
+
+def _obtener_executor():
+    global _executor
+    if _executor is None:
+        # Un solo hilo: una sola conexión SMTP a la vez, los correos salen en orden
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="correo")
+    return _executor
+
+
+def encolar(asunto, mensaje, destinatarios, remitente=None):
+    """
+    Deja un correo en la cola de salida y retorna el registro.
+
+    No abre ninguna conexión SMTP: la petición responde en cuanto el registro
+    queda guardado.
+    """
+    correo = CorreoSaliente.objects.create(
+        asunto=asunto,
+        mensaje=mensaje,
+        remitente=remitente or settings.DEFAULT_FROM_EMAIL,
+        destinatarios=list(destinatarios),
+    )
+
+    if CORREO_ENVIO_EN_PROCESO:
+        # Se envía al hilo solo cuando el registro ya es visible para otras conexiones
+        transaction.on_commit(lambda: _obtener_executor().submit(_enviar_en_hilo))
+
+    return correo
+
+
+def _enviar_en_hilo():
+    global _proxima_purga
+    close_old_connections()
+    conexion = get_connection()
+    try:
+        # Sin el comando `enviar_correos`, nadie más recupera los correos que un reinicio dejó en ENVIANDO
+        reencolar_atascados(CORREO_ATASCADO_MINUTOS)
+        # ni purga los terminados (una vez por hora)
+        if time.monotonic() >= _proxima_purga:
+            _proxima_purga = time.monotonic() + 3600
+            purgar_terminados()
+        # Vacía la cola por la misma conexión y la cierra al terminar
+        while enviar_pendientes(conexion=conexion):
+            pass
+        _programar_siguiente_ronda()
+    finally:
+        conexion.close()
+        close_old_connections()
+
+
+def _programar_siguiente_ronda():
+    """
+    Deja un temporizador para la próxima ronda: el reintento pendiente más cercano,
+    o el momento en que un correo en ENVIANDO pasaría a considerarse abandonado.
+
+    Sin esto, un correo reprogramado con espera solo se reintentaría cuando otra
+    petición encolara un correo nuevo.
+    """
+    global _temporizador, _temporizador_vence
+    ahora = timezone.now()
+    momentos = [
+        CorreoSaliente.objects.filter(estado='PENDIENTE')
+        .order_by('proximo_intento').values_list('proximo_intento', flat=True).first(),
+        CorreoSaliente.objects.filter(estado='ENVIANDO')
+        .order_by('fecha_ultimo_intento').values_list('fecha_ultimo_intento', flat=True).first(),
+    ]
+    if momentos[1] is not None:
+        momentos[1] += timedelta(minutes=CORREO_ATASCADO_MINUTOS, seconds=1)
+    momentos = [momento for momento in momentos if momento is not None]
+    if not momentos:
+        return
+
+    espera = max((min(momentos) - ahora).total_seconds(), 0) + 1
+    with _lock:
+        if (_temporizador is not None and _temporizador.is_alive()
+                and _temporizador_vence <= time.monotonic() + espera):
+            # Ya hay una ronda programada antes
+            return
+        if _temporizador is not None:
+            _temporizador.cancel()
+        _temporizador = threading.Timer(espera, lambda: _obtener_executor().submit(_enviar_en_hilo))
+        _temporizador.daemon = True
+        _temporizador_vence = time.monotonic() + espera
+        _temporizador.start()
+
+
+def _reclamar(limite):
+    """Pasa a ENVIANDO hasta `limite` correos listos para enviarse y los retorna."""
+    ahora = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            CorreoSaliente.objects.select_for_update(skip_locked=True)
+            .filter(estado='PENDIENTE', proximo_intento__lte=ahora)
+            .order_by('proximo_intento')
+            .values_list('pk', flat=True)[:limite]
+        )
+        if not ids:
+            return []
+        CorreoSaliente.objects.filter(pk__in=ids).update(estado='ENVIANDO', fecha_ultimo_intento=ahora)
+    return list(CorreoSaliente.objects.filter(pk__in=ids).order_by('proximo_intento'))
+
+
+def _espera_reintento(intentos):
+    return timedelta(seconds=min(CORREO_REINTENTO_SEGUNDOS * 2 ** (intentos - 1), CORREO_REINTENTO_MAXIMO_SEGUNDOS))
+
+
+def _registrar_fallo(correo, error):
+    correo.intentos += 1
+    correo.error = str(error)
+    if correo.intentos >= CORREO_MAX_INTENTOS:
+        correo.estado = 'FALLIDO'
+        # El cuerpo puede llevar un código de verificación: no se guarda más de lo necesario
+        correo.mensaje = ''
+    else:
+        correo.estado = 'PENDIENTE'
+        correo.proximo_intento = timezone.now() + _espera_reintento(correo.intentos)
+    correo.save(update_fields=['intentos', 'error', 'estado', 'proximo_intento', 'mensaje'])
+
+
+def enviar_pendientes(limite=None, conexion=None):
+    """
+    Envía una ronda de correos pendientes. Retorna cuántos se intentaron enviar.
+
+    `conexion` (de `get_connection()`) se abre si hace falta y se deja abierta
+    para que quien llama la reutilice en la siguiente ronda; si el envío falla
+    se cierra, y se vuelve a abrir con el siguiente correo.
+    """
+    correos = _reclamar(limite or CORREO_TAMANO_LOTE)
+    if not correos:
+        return 0
+
+    propia = conexion is None
+    if propia:
+        conexion = get_connection()
+
+    try:
+        for correo in correos:
+            try:
+                conexion.open()
+                EmailMessage(
+                    correo.asunto, correo.mensaje, correo.remitente or None, correo.destinatarios,
+                    connection=conexion,
+                ).send()
+            except Exception as e:
+                # La conexión puede haber quedado inutilizable (timeout, desconexión del servidor)
+                conexion.close()
+                _registrar_fallo(correo, e)
+                continue
+
+            correo.estado = 'ENVIADO'
+            correo.intentos += 1
+            correo.error = None
+            correo.fecha_envio = timezone.now()
+            # El cuerpo puede llevar un código de verificación: una vez enviado se borra
+            correo.mensaje = ''
+            correo.save(update_fields=['estado', 'intentos', 'error', 'fecha_envio', 'mensaje'])
+    finally:
+        if propia:
+            conexion.close()
+
+    return len(correos)
+
+
+def reencolar_atascados(minutos):
+    """Devuelve a PENDIENTE los correos que llevan demasiado tiempo en ENVIANDO."""
+    limite = timezone.now() - timedelta(minutes=minutos)
+    return CorreoSaliente.objects.filter(estado='ENVIANDO', fecha_ultimo_intento__lt=limite).update(
+        estado='PENDIENTE',
+    )
+
+
+def purgar_terminados(dias=None):
+    """Elimina los correos ENVIADO y FALLIDO creados hace más de `dias`. Retorna cuántos se eliminaron."""
+    limite = timezone.now() - timedelta(days=CORREO_RETENCION_DIAS if dias is None else dias)
+    borrados, _ = CorreoSaliente.objects.filter(
+        estado__in=('ENVIADO', 'FALLIDO'), fecha_creacion__lt=limite,
+    ).delete()
+    return borrados
@@ -0,0 +1,223 @@
+import threading
+import time
+from collections import defaultdict
+from os import getenv
+
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from ..models import AnalisisFinal, EstadisticaAnalisis, MarcaExportacion
+from .exportacion_casos import tope_confirmado
+
+# Marca de agua (último análisis ya sumado) dentro de MarcaExportacion
+NOMBRE_MARCA = 'estadisticas'
+
+# Análisis que se leen y se suman por transacción al actualizar
+ESTADISTICAS_TAMANO_LOTE = int(getenv("ESTADISTICAS_TAMANO_LOTE", "5000"))
+
+# Segundos que cada proceso reutiliza una consulta de estadísticas ya calculada
+ESTADISTICAS_CACHE_TTL = int(getenv("ESTADISTICAS_CACHE_TTL", "300"))
+# Consultas distintas (periodo y rango de fechas) que se guardan como máximo por proceso
+ESTADISTICAS_CACHE_MAXIMO = 256
+
+DIMENSIONES = ('periodo', 'fecha', 'rango_edad', 'sexo', 'diagnostico_final', 'nivel_acuerdo')
+
+_lock = threading.Lock()
+# {(periodo, desde, hasta): (expira_en_monotonic, datos)}
+_memoria = {}
+
+
+def limpiar_memoria():
+    with _lock:
+        _memoria.clear()
+
+
+def rango_edad(fecha_nacimiento, fecha):
+    """Clave del rango de edad que tenía el paciente en `fecha` (la edad al momento del análisis)."""
+    edad = fecha.year - fecha_nacimiento.year - ((fecha.month, fecha.day) < (fecha_nacimiento.month, fecha_nacimiento.day))
+    for clave, _, minima, maxima in EstadisticaAnalisis.RANGOS_EDAD:
+        if edad >= minima and (maxima is None or edad <= maxima):
+            return clave
+    # Fecha de nacimiento posterior al análisis (dato mal registrado)
+    return EstadisticaAnalisis.RANGOS_EDAD[0][0]
+
+
+def nivel_acuerdo(porcentaje):
+    """Mismos cortes que el filtro de porcentaje de acuerdo del admin."""
+    if porcentaje is None:
+        return 'sin_dato'
+    if porcentaje > 80:
+        return 'alto'
+    if porcentaje >= 50:
+        return 'medio'
+    return 'bajo'
+
+
+def _acumular(filas):
+    """Agrupa las filas de análisis en {dimensiones: [total, concordantes]} por día y por mes."""
+    acumulado = defaultdict(lambda: [0, 0])
+    for fecha_analisis, fecha_nacimiento, sexo, diagnostico, consenso, porcentaje in filas:
+        dia = timezone.localdate(fecha_analisis)
+        comunes = (rango_edad(fecha_nacimiento, dia), sexo, diagnostico, nivel_acuerdo(porcentaje))
+        concordante = 1 if consenso == diagnostico else 0
+        for clave in (('D', dia) + comunes, ('M', dia.replace(day=1)) + comunes):
+            acumulado[clave][0] += 1
+            acumulado[clave][1] += concordante
+    return acumulado
+
+
+def _sumar(acumulado):
+    """
+    Suma `acumulado` a las filas de EstadisticaAnalisis con un solo upsert.
+
+    Debe llamarse con la marca bloqueada: las filas existentes se leen y se
+    reescriben con el total nuevo, así que no puede haber dos sumas a la vez.
+    """
+    if not acumulado:
+        return
+    fechas = {(periodo, fecha) for periodo, fecha, *_ in acumulado}
+    filtro = Q()
+    for periodo in ('D', 'M'):
+        del_periodo = [fecha for p, fecha in fechas if p == periodo]
+        if del_periodo:
+            filtro |= Q(periodo=periodo, fecha__in=del_periodo)
+    for fila in EstadisticaAnalisis.objects.filter(filtro).values_list(*DIMENSIONES, 'total', 'concordantes'):
+        clave = tuple(fila[:len(DIMENSIONES)])
+        if clave in acumulado:
+            acumulado[clave][0] += fila[-2]
+            acumulado[clave][1] += fila[-1]
+
+    EstadisticaAnalisis.objects.bulk_create(
+        [
+            EstadisticaAnalisis(**dict(zip(DIMENSIONES, clave)), total=total, concordantes=concordantes)
+            for clave, (total, concordantes) in acumulado.items()
+        ],
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=list(DIMENSIONES),
+        update_fields=['total', 'concordantes'],
+    )
+
+
+def actualizar(tamano_lote=None, progreso=None):
+    """
+    Suma a las estadísticas los análisis creados desde la última actualización.
+
+    Cada lote se procesa en una transacción que también avanza la marca, así
+    que una interrupción no duplica ni pierde análisis. Los análisis de los
+    últimos ANALISIS_MARGEN_MINUTOS se dejan para la próxima actualización, por
+    si alguno con id menor aún no se confirmó. Retorna cuántos se sumaron.
+    """
+    tamano_lote = tamano_lote or ESTADISTICAS_TAMANO_LOTE
+    # El tope se fija al inicio: lo que llegue durante la actualización queda para la próxima
+    tope = tope_confirmado()
+    procesados = 0
+
+    while True:
+        with transaction.atomic():
+            marca, _ = MarcaExportacion.objects.select_for_update().get_or_create(nombre=NOMBRE_MARCA)
+            if marca.ultimo_id >= tope:
+                break
+            filas = list(
+                AnalisisFinal.objects.filter(pk__gt=marca.ultimo_id, pk__lte=tope)
+                .order_by('pk')
+                .values_list(
+                    'pk', 'fecha_analisis', 'paciente__fecha_nacimiento', 'paciente__sexo',
+                    'diagnostico_final', 'consenso_resultado', 'porcentaje_acuerdo',
+                )[:tamano_lote]
+            )
+            if not filas:
+                marca.ultimo_id = tope
+                marca.save(update_fields=['ultimo_id', 'fecha_exportacion'])
+                break
+            _sumar(_acumular(fila[1:] for fila in filas))
+            marca.ultimo_id = filas[-1][0]
+            marca.save(update_fields=['ultimo_id', 'fecha_exportacion'])
+
+        procesados += len(filas)
+        if progreso:
+            progreso(procesados)
+
+    if procesados:
+        limpiar_memoria()
+    return procesados
+
+
+def reconstruir(tamano_lote=None, progreso=None):
+    """
+    Borra las estadísticas y las vuelve a calcular desde el primer análisis.
+
+    Necesario si se editó el diagnóstico de análisis ya sumados o se eliminaron
+    análisis: la actualización incremental solo ve los análisis nuevos.
+    """
+    with transaction.atomic():
+        MarcaExportacion.objects.select_for_update().get_or_create(nombre=NOMBRE_MARCA)
+        EstadisticaAnalisis.objects.all().delete()
+        MarcaExportacion.objects.filter(nombre=NOMBRE_MARCA).update(ultimo_id=0)
+    limpiar_memoria()
+    return actualizar(tamano_lote, progreso)
+
+
+def _agrupar(consulta, dimension, etiquetas=None):
+    """Totales por `dimension` (y CCR/CO dentro de cada valor) con una consulta agrupada."""
+    totales = {}
+    filas = (
+        consulta.values(dimension, 'diagnostico_final')
+        .annotate(suma=Sum('total'), suma_concordantes=Sum('concordantes'))
+        .order_by()
+    )
+    for fila in filas:
+        clave = fila[dimension]
+        actual = totales.setdefault(clave, {'total': 0, 'ccr': 0, 'co': 0, 'concordantes': 0})
+        actual['total'] += fila['suma']
+        actual['concordantes'] += fila['suma_concordantes']
+        actual['ccr' if fila['diagnostico_final'] == 'CCR' else 'co'] += fila['suma']
+
+    if etiquetas is None:
+        return [dict(fecha=clave.isoformat(), **totales[clave]) for clave in sorted(totales)]
+    # Mismo orden que las opciones del modelo
+    return [dict(clave=clave, etiqueta=etiqueta, **totales[clave]) for clave, etiqueta in etiquetas if clave in totales]
+
+
+def consultar(periodo='M', desde=None, hasta=None):
+    """
+    Estadísticas de los análisis entre `desde` y `hasta` (fechas, inclusive).
+
+    `periodo` es 'D' (serie por día) o 'M' (serie por mes). Solo lee la tabla
+    precalculada y el resultado se guarda en memoria ESTADISTICAS_CACHE_TTL segundos.
+    """
+    clave = (periodo, desde, hasta)
+    with _lock:
+        guardado = _memoria.get(clave)
+        if guardado is not None and guardado[0] > time.monotonic():
+            return guardado[1]
+
+    consulta = EstadisticaAnalisis.objects.filter(periodo=periodo)
+    if desde:
+        # En la serie mensual se incluye el mes completo de `desde`
+        consulta = consulta.filter(fecha__gte=desde.replace(day=1) if periodo == 'M' else desde)
+    if hasta:
+        consulta = consulta.filter(fecha__lte=hasta)
+
+    por_sexo = _agrupar(consulta, 'sexo', EstadisticaAnalisis._meta.get_field('sexo').choices)
+    datos = {
+        'periodo': periodo,
+        'total': sum(fila['total'] for fila in por_sexo),
+        'ccr': sum(fila['ccr'] for fila in por_sexo),
+        'co': sum(fila['co'] for fila in por_sexo),
+        'concordantes': sum(fila['concordantes'] for fila in por_sexo),
+        'serie': _agrupar(consulta, 'fecha'),
+        'por_rango_edad': _agrupar(
+            consulta, 'rango_edad', [(c, e) for c, e, _, _ in EstadisticaAnalisis.RANGOS_EDAD]
+        ),
+        'por_sexo': por_sexo,
+        'por_acuerdo': _agrupar(consulta, 'nivel_acuerdo', EstadisticaAnalisis.NIVEL_ACUERDO_CHOICES),
+    }
+
+    with _lock:
+        if len(_memoria) >= ESTADISTICAS_CACHE_MAXIMO:
+            # Muchos rangos de fechas distintos: se descarta todo en vez de crecer sin límite
+            _memoria.clear()
+        _memoria[clave] = (time.monotonic() + ESTADISTICAS_CACHE_TTL, datos)
+    return datos
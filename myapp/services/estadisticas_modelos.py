@@ -0,0 +1,49 @@
+from datetime import date, datetime, time, timedelta
+
+from django.db.models import Avg, Count, F, Q
+from django.utils import timezone
+
+from ..models import PrediccionModelo
+
+
+def _inicio_del_dia(valor):
+    if isinstance(valor, date) and not isinstance(valor, datetime):
+        return timezone.make_aware(datetime.combine(valor, time.min))
+    return valor
+
+
+def exactitud_por_modelo(desde=None, hasta=None):
+    """
+    Compara cada modelo NLP contra el diagnóstico final del médico.
+
+    Todo se calcula en una sola consulta agrupada por modelo sobre
+    PrediccionModelo (usa el índice (modelo, fecha) cuando se filtra por periodo).
+    """
+    consulta = PrediccionModelo.objects.all()
+    if desde:
+        consulta = consulta.filter(fecha__gte=_inicio_del_dia(desde))
+    if hasta:
+        # Una fecha sin hora incluye todo ese día
+        if not isinstance(hasta, datetime):
+            hasta = hasta + timedelta(days=1)
+        consulta = consulta.filter(fecha__lt=_inicio_del_dia(hasta))
+
+    filas = consulta.values('modelo').annotate(
+        total=Count('id'),
+        aciertos=Count('id', filter=Q(clase=F('analisis__diagnostico_final'))),
+        verdaderos_ccr=Count('id', filter=Q(clase='CCR', analisis__diagnostico_final='CCR')),
+        falsos_ccr=Count('id', filter=Q(clase='CCR', analisis__diagnostico_final='CO')),
+        verdaderos_co=Count('id', filter=Q(clase='CO', analisis__diagnostico_final='CO')),
+        falsos_co=Count('id', filter=Q(clase='CO', analisis__diagnostico_final='CCR')),
+        probabilidad_crc_media=Avg('probabilidad_crc'),
+    ).order_by('modelo')
+
+    resultado = []
+    for fila in filas:
+        positivos = fila['verdaderos_ccr'] + fila['falsos_co']
+        negativos = fila['verdaderos_co'] + fila['falsos_ccr']
+        fila['exactitud'] = round(fila['aciertos'] / fila['total'], 4) if fila['total'] else None
+        fila['sensibilidad'] = round(fila['verdaderos_ccr'] / positivos, 4) if positivos else None
+        fila['especificidad'] = round(fila['verdaderos_co'] / negativos, 4) if negativos else None
+        resultado.append(fila)
+    return resultado
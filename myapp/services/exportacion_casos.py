@@ -0,0 +1,117 @@
+import csv
+import json
+from datetime import timedelta
+from os import getenv
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from ..models import AnalisisFinal, MarcaExportacion
+
+NOMBRE_MARCA = 'casos_etiquetados'
+# Minutos que se esperan antes de dar por confirmado un análisis (ver tope_confirmado)
+ANALISIS_MARGEN_MINUTOS = int(getenv("ANALISIS_MARGEN_MINUTOS", "5"))
+# Filas que el cursor del servidor entrega por cada viaje a la base de datos
+TAMANO_BLOQUE = 2000
+
+COLUMNAS = (
+    'analisis_id',
+    'paciente_id',
+    'fecha_analisis',
+    'texto_clinico',
+    'sintomas_actuales',
+    'tratamientos_actuales',
+    'diagnostico_principal',
+    'otras_comorbilidades',
+    'diagnostico_final',
+    'consenso_resultado',
+    'porcentaje_acuerdo',
+    'max_probabilidad_crc',
+    'predicciones_nlp',
+)
+
+
+def consulta_casos(desde_id=0, hasta_id=None):
+    """
+    Casos etiquetados (id > desde_id y <= hasta_id) con su historia clínica.
+
+    Solo trae las columnas del dataset, con la historia en el mismo JOIN.
+    """
+    consulta = AnalisisFinal.objects.filter(pk__gt=desde_id).order_by('pk').values_list(
+        'pk',
+        'paciente_id',
+        'fecha_analisis',
+        'texto_clinico',
+        'historia__sintomas_actuales',
+        'historia__tratamientos_actuales',
+        'historia__diagnostico_principal',
+        'historia__otras_comorbilidades',
+        'diagnostico_final',
+        'consenso_resultado',
+        'porcentaje_acuerdo',
+        'max_probabilidad_crc',
+        'predicciones_nlp',
+    )
+    if hasta_id is not None:
+        consulta = consulta.filter(pk__lte=hasta_id)
+    return consulta
+
+
+def _filas(consulta):
+    # iterator() usa cursores del lado del servidor en PostgreSQL: memoria constante
+    for fila in consulta.iterator(chunk_size=TAMANO_BLOQUE):
+        registro = dict(zip(COLUMNAS, fila))
+        registro['fecha_analisis'] = registro['fecha_analisis'].isoformat()
+        yield registro
+
+
+class _Eco:
+    """Objeto tipo archivo que devuelve lo escrito, para generar CSV línea por línea."""
+
+    def write(self, valor):
+        return valor
+
+
+def lineas_csv(consulta):
+    escritor = csv.writer(_Eco())
+    yield escritor.writerow(COLUMNAS)
+    for registro in _filas(consulta):
+        registro['predicciones_nlp'] = json.dumps(registro['predicciones_nlp'], ensure_ascii=False)
+        yield escritor.writerow([registro[c] for c in COLUMNAS])
+
+
+def lineas_jsonl(consulta):
+    for registro in _filas(consulta):
+        yield json.dumps(registro, ensure_ascii=False) + '\n'
+
+
+def lineas(formato, consulta):
+    return lineas_jsonl(consulta) if formato == 'jsonl' else lineas_csv(consulta)
+
+
+def tope_confirmado():
+    """
+    Mayor id de análisis hasta el que una marca de agua puede avanzar.
+
+    Los ids se asignan al insertar, no al confirmar la transacción: un análisis
+    con id menor puede hacerse visible después de otro con id mayor, y si la marca
+    ya lo pasó no se vuelve a leer. Por eso solo cuentan los análisis registrados
+    hace más de ANALISIS_MARGEN_MINUTOS; los más recientes quedan para la próxima vez.
+    """
+    limite = timezone.now() - timedelta(minutes=ANALISIS_MARGEN_MINUTOS)
+    return AnalisisFinal.objects.filter(fecha_analisis__lt=limite).aggregate(tope=Max('pk'))['tope'] or 0
+
+
+def rango_incremental():
+    """Retorna (desde_id, hasta_id) para exportar lo nuevo desde la última marca."""
+    marca = MarcaExportacion.objects.filter(nombre=NOMBRE_MARCA).first()
+    desde_id = marca.ultimo_id if marca else 0
+    # El tope se fija al inicio: lo que llegue durante la exportación queda para la próxima
+    hasta_id = tope_confirmado()
+    return desde_id, max(hasta_id, desde_id)
+
+
+def guardar_marca(ultimo_id):
+    with transaction.atomic():
+        MarcaExportacion.objects.update_or_create(nombre=NOMBRE_MARCA, defaults={'ultimo_id': ultimo_id})
@@ -0,0 +1,244 @@
+import csv
+import hashlib
+import os
+from datetime import datetime
+from itertools import islice
+from os import getenv
+
+from django.db import transaction
+from django.utils import timezone
+
+from ..forms import PacienteImportacionForm
+from ..models import FilaRechazada, ImportacionPacientes, Paciente
+from . import contadores
+
+# Filas que se validan y se escriben juntas en una misma transacción
+IMPORTACION_TAMANO_LOTE = int(getenv("IMPORTACION_TAMANO_LOTE", "1000"))
+
+# Campos que se actualizan cuando el número de identificación ya existe
+CAMPOS_ACTUALIZABLES = [
+    campo.name for campo in Paciente._meta.concrete_fields
+    if campo.name not in ('id', 'numero_identificacion')
+]
+
+# Valores por defecto para columnas que suelen faltar en los archivos de origen
+VALORES_POR_DEFECTO = {
+    'tipo_identificacion': 'CC',
+    'pais_nacimiento': 'Colombia',
+}
+
+
+class ArchivoImportacionInvalido(Exception):
+    pass
+
+
+def calcular_huella(ruta):
+    """SHA-256 del archivo, para reconocerlo al reanudar una importación."""
+    huella = hashlib.sha256()
+    with open(ruta, 'rb') as archivo:
+        for bloque in iter(lambda: archivo.read(1024 * 1024), b''):
+            huella.update(bloque)
+    return huella.hexdigest()
+
+
+def _mapa_columnas(encabezados):
+    """
+    Relaciona cada encabezado del archivo con un campo de Paciente.
+
+    Acepta el nombre del campo ("primer_nombre") o su etiqueta ("Primer Nombre"),
+    sin importar mayúsculas ni tildes.
+    """
+    conocidos = {}
+    for campo in PacienteImportacionForm.base_fields:
+        conocidos[campo] = campo
+        etiqueta = Paciente._meta.get_field(campo).verbose_name
+        conocidos[Paciente.normalizar_busqueda(etiqueta).replace(' ', '_')] = campo
+
+    mapa = {}
+    for posicion, encabezado in enumerate(encabezados):
+        clave = Paciente.normalizar_busqueda(encabezado).replace(' ', '_')
+        if clave in conocidos:
+            mapa[posicion] = conocidos[clave]
+
+    if 'numero_identificacion' not in mapa.values():
+        raise ArchivoImportacionInvalido("El archivo no tiene la columna numero_identificacion.")
+    return mapa
+
+
+def _valor_celda(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, datetime):
+        return valor.date().isoformat()
+    if isinstance(valor, float) and valor.is_integer():
+        # Excel guarda los números de identificación como flotantes (1234.0)
+        return str(int(valor))
+    return str(valor).strip()
+
+
+def _filas_csv(ruta):
+    with open(ruta, newline='', encoding='utf-8-sig') as archivo:
+        muestra = archivo.read(4096)
+        archivo.seek(0)
+        try:
+            dialecto = csv.Sniffer().sniff(muestra, delimiters=',;\t')
+        except csv.Error:
+            dialecto = csv.excel
+        yield from csv.reader(archivo, dialecto)
+
+
+def _filas_excel(ruta):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ArchivoImportacionInvalido("Para importar archivos Excel se requiere el paquete openpyxl.")
+
+    # read_only recorre la hoja por filas sin cargarla completa en memoria
+    libro = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        yield from libro.active.iter_rows(values_only=True)
+    finally:
+        libro.close()
+
+
+def leer_registros(ruta):
+    """
+    Recorre el archivo (CSV o .xlsx) sin cargarlo completo y produce tuplas
+    (numero_de_fila, registro) con las columnas ya traducidas a campos de Paciente.
+    """
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension in ('.xlsx', '.xlsm'):
+        filas = _filas_excel(ruta)
+    elif extension in ('.csv', '.txt'):
+        filas = _filas_csv(ruta)
+    else:
+        raise ArchivoImportacionInvalido("El archivo debe ser CSV o Excel (.xlsx).")
+
+    encabezados = next(filas, None)
+    if not encabezados:
+        raise ArchivoImportacionInvalido("El archivo está vacío.")
+    mapa = _mapa_columnas([_valor_celda(e) for e in encabezados])
+
+    # La fila 1 es el encabezado: los números coinciden con los de la hoja de cálculo
+    for numero, fila in enumerate(filas, start=2):
+        valores = [_valor_celda(v) for v in fila]
+        if not any(valores):
+            continue
+        registro = dict(VALORES_POR_DEFECTO)
+        for posicion, campo in mapa.items():
+            if posicion < len(valores) and valores[posicion] != '':
+                registro[campo] = valores[posicion]
+        yield numero, registro
+
+
+def validar_registro(registro, formulario=None):
+    """
+    Valida un registro con las reglas de PacienteForm. Retorna (paciente, errores).
+
+    `formulario` permite reutilizar un mismo PacienteImportacionForm entre filas.
+    """
+    if formulario is None:
+        formulario = PacienteImportacionForm(data=registro)
+    else:
+        formulario.reiniciar(registro)
+    if not formulario.is_valid():
+        errores = "; ".join(
+            f"{campo}: {' '.join(mensajes)}" for campo, mensajes in formulario.errors.items()
+        )
+        return None, errores
+
+    paciente = formulario.instance
+    paciente.actualizar_busqueda()
+    return paciente, None
+
+
+def importar_bloque(importacion, bloque):
+    """
+    Valida y escribe un bloque de filas en una sola transacción.
+
+    Los pacientes se insertan con upsert sobre numero_identificacion; si una
+    identificación se repite dentro del bloque se conserva la última fila.
+    """
+    pacientes = {}
+    rechazos = []
+    formulario = PacienteImportacionForm(data={})
+    for numero, registro in bloque:
+        paciente, errores = validar_registro(registro, formulario)
+        identificacion = str(registro.get('numero_identificacion', ''))[:50]
+        if errores:
+            rechazos.append(FilaRechazada(
+                importacion=importacion, fila=numero,
+                numero_identificacion=identificacion, errores=errores,
+            ))
+            continue
+        anterior = pacientes.pop(paciente.numero_identificacion, None)
+        if anterior is not None:
+            rechazos.append(FilaRechazada(
+                importacion=importacion, fila=anterior[0],
+                numero_identificacion=identificacion,
+                errores=f"Identificación repetida más adelante en el archivo (fila {numero}).",
+            ))
+        pacientes[paciente.numero_identificacion] = (numero, paciente)
+
+    with transaction.atomic():
+        Paciente.objects.bulk_create(
+            [paciente for _, paciente in pacientes.values()],
+            batch_size=IMPORTACION_TAMANO_LOTE,
+            update_conflicts=True,
+            unique_fields=['numero_identificacion'],
+            update_fields=CAMPOS_ACTUALIZABLES,
+        )
+        FilaRechazada.objects.bulk_create(rechazos, batch_size=IMPORTACION_TAMANO_LOTE)
+
+        # El avance se guarda en la misma transacción que los datos del bloque
+        importacion.filas_leidas += len(bloque)
+        importacion.importadas += len(pacientes)
+        importacion.rechazadas += len(rechazos)
+        importacion.save(update_fields=['filas_leidas', 'importadas', 'rechazadas'])
+
+
+def importar_archivo(ruta, tamano_lote=None, nueva=False, progreso=None):
+    """
+    Importa pacientes desde `ruta` por bloques de `tamano_lote` filas.
+
+    Si el mismo archivo tiene una importación sin terminar se reanuda desde
+    la última fila confirmada (salvo que `nueva` sea True). `progreso`, si se
+    indica, se llama con la importación después de cada bloque.
+    """
+    tamano_lote = tamano_lote or IMPORTACION_TAMANO_LOTE
+    huella = calcular_huella(ruta)
+
+    importacion = None
+    if not nueva:
+        importacion = ImportacionPacientes.objects.filter(huella=huella).exclude(estado='COMPLETADO').first()
+    if importacion is None:
+        importacion = ImportacionPacientes.objects.create(nombre_archivo=os.path.basename(ruta), huella=huella)
+    else:
+        importacion.estado = 'PROCESANDO'
+        importacion.error = None
+        importacion.save(update_fields=['estado', 'error'])
+
+    try:
+        registros = leer_registros(ruta)
+        # Se saltan las filas que ya se confirmaron en un intento anterior
+        registros = islice(registros, importacion.filas_leidas, None)
+        while True:
+            bloque = list(islice(registros, tamano_lote))
+            if not bloque:
+                break
+            importar_bloque(importacion, bloque)
+            if progreso:
+                progreso(importacion)
+    except Exception as e:
+        importacion.estado = 'ERROR'
+        importacion.error = str(e)
+        importacion.save(update_fields=['estado', 'error'])
+        raise
+    finally:
+        # bulk_create no emite señales: el contador de pacientes se corrige con el conteo real
+        contadores.reconciliar(['pacientes'])
+
+    importacion.estado = 'COMPLETADO'
+    importacion.fecha_fin = timezone.now()
+    importacion.save(update_fields=['estado', 'fecha_fin'])
+    return importacion
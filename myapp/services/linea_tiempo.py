@@ -0,0 +1,117 @@
+from django.db.models import CharField, F, Q, Value
+from django.db.models.functions import Left
+from django.utils.dateparse import parse_datetime
+
+from ..models import AnalisisFinal, HistoriaClinica
+from .paginacion import codificar_cursor, decodificar_cursor
+
+# Caracteres de cada texto que se muestran antes de expandir la tarjeta
+LINEA_TIEMPO_CARACTERES = 300
+
+HISTORIA = 'historia'
+ANALISIS = 'analisis'
+
+# Orden de la línea de tiempo: más reciente primero; a igual fecha, historia antes que análisis
+ORDEN = ('-fecha', '-tipo', '-id')
+
+
+def _despues_del_cursor(tipo, campo_fecha, cursor):
+    """
+    Filtro "posterior al cursor" para una de las dos tablas.
+
+    Como `tipo` es constante dentro de cada tabla, la comparación
+    (fecha, tipo, id) < (f, t, i) se simplifica a una condición sobre (fecha, id).
+    """
+    fecha, tipo_cursor, id_cursor = cursor
+    if tipo < tipo_cursor:
+        return Q(**{f"{campo_fecha}__lte": fecha})
+    if tipo > tipo_cursor:
+        return Q(**{f"{campo_fecha}__lt": fecha})
+    return Q(**{f"{campo_fecha}__lt": fecha}) | Q(**{campo_fecha: fecha, "id__lt": id_cursor})
+
+
+def _decodificar(cursor):
+    valores = decodificar_cursor(cursor, ORDEN) if cursor else None
+    if not valores:
+        return None
+    fecha = parse_datetime(str(valores[0]))
+    if fecha is None or valores[1] not in (HISTORIA, ANALISIS) or not isinstance(valores[2], int):
+        return None
+    return fecha, valores[1], valores[2]
+
+
+def _recortar(texto):
+    if texto and len(texto) > LINEA_TIEMPO_CARACTERES:
+        return texto[:LINEA_TIEMPO_CARACTERES].rstrip() + "…"
+    return texto
+
+
+def pagina_linea_tiempo(paciente, tamano, cursor=None):
+    """
+    Retorna (registros, cursor_siguiente) de la línea de tiempo del paciente.
+
+    Una sola consulta UNION ALL ordena historias y análisis por fecha y corta
+    la página; después se cargan solo los registros de esa página, con los
+    textos largos recortados en la base de datos.
+    """
+    historias = HistoriaClinica.objects.filter(paciente=paciente)
+    analisis = AnalisisFinal.objects.filter(paciente=paciente)
+
+    posicion = _decodificar(cursor)
+    if posicion is not None:
+        historias = historias.filter(_despues_del_cursor(HISTORIA, 'fecha_visita', posicion))
+        analisis = analisis.filter(_despues_del_cursor(ANALISIS, 'fecha_analisis', posicion))
+
+    claves = (
+        historias.annotate(tipo=Value(HISTORIA, output_field=CharField()), fecha=F('fecha_visita'))
+        .values('id', 'tipo', 'fecha').order_by()
+        .union(
+            analisis.annotate(tipo=Value(ANALISIS, output_field=CharField()), fecha=F('fecha_analisis'))
+            .values('id', 'tipo', 'fecha').order_by(),
+            all=True,
+        )
+        .order_by(*ORDEN)[:tamano + 1]
+    )
+    claves = list(claves)
+    cursor_siguiente = codificar_cursor(claves[tamano - 1], ORDEN) if len(claves) > tamano else None
+    claves = claves[:tamano]
+
+    largo = LINEA_TIEMPO_CARACTERES + 1
+    ids_historias = [c['id'] for c in claves if c['tipo'] == HISTORIA]
+    ids_analisis = [c['id'] for c in claves if c['tipo'] == ANALISIS]
+    detalles = {}
+    if ids_historias:
+        for historia in HistoriaClinica.objects.filter(pk__in=ids_historias).only('id', 'fecha_visita').annotate(
+            sintomas_corto=Left('sintomas_actuales', largo),
+            diagnostico_corto=Left('diagnostico_principal', largo),
+        ):
+            detalles[(HISTORIA, historia.pk)] = historia
+    if ids_analisis:
+        for analisis_final in AnalisisFinal.objects.filter(pk__in=ids_analisis).only(
+            'id', 'fecha_analisis', 'diagnostico_final', 'consenso_resultado',
+            'porcentaje_acuerdo', 'max_probabilidad_crc',
+        ):
+            detalles[(ANALISIS, analisis_final.pk)] = analisis_final
+
+    registros = []
+    for clave in claves:
+        objeto = detalles.get((clave['tipo'], clave['id']))
+        if objeto is None:
+            # Eliminado entre las dos consultas
+            continue
+        registro = {'tipo': clave['tipo'], 'id': clave['id'], 'fecha': clave['fecha'], 'objeto': objeto}
+        if clave['tipo'] == HISTORIA:
+            registro['sintomas'] = _recortar(objeto.sintomas_corto)
+            registro['diagnostico'] = _recortar(objeto.diagnostico_corto)
+        registros.append(registro)
+
+    return registros, cursor_siguiente
+
+
+def obtener_registro(paciente, tipo, registro_id):
+    """Carga un registro completo de la línea de tiempo (al expandir su tarjeta)."""
+    if tipo == HISTORIA:
+        return HistoriaClinica.objects.filter(paciente=paciente, pk=registro_id).first()
+    if tipo == ANALISIS:
+        return AnalisisFinal.objects.filter(paciente=paciente, pk=registro_id).first()
+    return None
@@ -0,0 +1,288 @@
+import csv
+import io
+import json
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from os import getenv
+
+from django.db import close_old_connections, connections
+from django.utils import timezone
+
+from ..models import LotePrediccion
+from .prediccion_service import obtener_predicciones
+
+# Hilos que consultan el modelo en paralelo dentro de un lote (debe ser menor que
+# NLP_MAX_CONCURRENTES para dejar cupo a los análisis interactivos)
+NLP_LOTE_HILOS = int(getenv("NLP_LOTE_HILOS", "4"))
+# Máximo de filas aceptadas por archivo
+NLP_LOTE_MAX_FILAS = int(getenv("NLP_LOTE_MAX_FILAS", "5000"))
+# Minutos sin avance tras los cuales un lote en PROCESANDO se considera abandonado (p. ej. por un reinicio)
+NLP_LOTE_ATASCADO_MINUTOS = int(getenv("NLP_LOTE_ATASCADO_MINUTOS", "10"))
+# Segundos entre revisiones de lotes huérfanos en cada proceso
+NLP_LOTE_REVISION_SEGUNDOS = int(getenv("NLP_LOTE_REVISION_SEGUNDOS", "60"))
+
+# Columnas aceptadas para el texto clínico y el identificador de la fila
+COLUMNAS_TEXTO = ('texto', 'texto_clinico', 'descripcion', 'text')
+COLUMNAS_ID = ('id', 'identificador', 'numero_identificacion')
+
+# Un solo hilo coordina los lotes: así nunca hay más de NLP_LOTE_HILOS consultas de lotes a la vez
+_executor_lotes = ThreadPoolExecutor(max_workers=1, thread_name_prefix="nlp-lote")
+
+_lock_revision = threading.Lock()
+_proxima_revision = 0.0
+
+
+class ArchivoLoteInvalido(Exception):
+    pass
+
+
+def _elegir_columna(campos, opciones):
+    normalizados = {campo.strip().lower(): campo for campo in campos if campo}
+    for opcion in opciones:
+        if opcion in normalizados:
+            return normalizados[opcion]
+    return None
+
+
+def leer_filas(nombre_archivo, contenido):
+    """
+    Lee un archivo CSV o JSONL y retorna una lista de tuplas (id, texto).
+
+    En CSV se busca una columna de texto conocida (o se usa la primera); en JSONL
+    cada línea debe ser un objeto con la clave `texto` (o `text`).
+    """
+    if isinstance(contenido, bytes):
+        contenido = contenido.decode('utf-8-sig')
+
+    filas = []
+    if nombre_archivo.lower().endswith(('.jsonl', '.ndjson')):
+        for numero, linea in enumerate(contenido.splitlines(), start=1):
+            if not linea.strip():
+                continue
+            try:
+                objeto = json.loads(linea)
+            except ValueError:
+                raise ArchivoLoteInvalido(f"La línea {numero} no es un JSON válido.")
+            if not isinstance(objeto, dict):
+                raise ArchivoLoteInvalido(f"La línea {numero} debe ser un objeto JSON con la clave `texto`.")
+            texto = next((objeto.get(c) for c in COLUMNAS_TEXTO if objeto.get(c)), None)
+            identificador = next((objeto.get(c) for c in COLUMNAS_ID if objeto.get(c)), numero)
+            filas.append((str(identificador), (texto or '').strip()))
+    else:
+        lector = csv.DictReader(io.StringIO(contenido))
+        if not lector.fieldnames:
+            raise ArchivoLoteInvalido("El archivo CSV está vacío.")
+        columna_texto = _elegir_columna(lector.fieldnames, COLUMNAS_TEXTO) or lector.fieldnames[0]
+        columna_id = _elegir_columna(lector.fieldnames, COLUMNAS_ID)
+        for numero, registro in enumerate(lector, start=1):
+            identificador = registro.get(columna_id) if columna_id else numero
+            filas.append((str(identificador), (registro.get(columna_texto) or '').strip()))
+
+    if not filas:
+        raise ArchivoLoteInvalido("El archivo no contiene filas.")
+    if len(filas) > NLP_LOTE_MAX_FILAS:
+        raise ArchivoLoteInvalido(f"El archivo supera el máximo de {NLP_LOTE_MAX_FILAS} filas.")
+    return filas
+
+
+def _predecir_fila(texto):
+    if not texto:
+        return {"error": "Fila sin texto clínico."}
+    try:
+        return obtener_predicciones(texto)
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def _trabajador(pendientes, terminadas):
+    """Toma filas de la cola hasta vaciarla; al final cierra su conexión a la base de datos."""
+    try:
+        while True:
+            try:
+                indice, texto = pendientes.get_nowait()
+            except queue.Empty:
+                return
+            terminadas.put((indice, _predecir_fila(texto)))
+    finally:
+        connections.close_all()
+
+
+def predecir_filas(filas, hilos=None, al_avanzar=None):
+    """
+    Consulta el modelo para cada fila usando un pool de hilos acotado.
+
+    Retorna la lista de resultados en el mismo orden que `filas`. Si se pasa
+    `al_avanzar`, se llama con (procesadas, con_error) cada vez que termina una fila.
+    """
+    pendientes = queue.Queue()
+    terminadas = queue.Queue()
+    for indice, (_, texto) in enumerate(filas):
+        pendientes.put((indice, texto))
+
+    resultados = [None] * len(filas)
+    con_error = 0
+    hilos = min(hilos or NLP_LOTE_HILOS, len(filas)) or 1
+
+    with ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="nlp-fila") as pool:
+        for _ in range(hilos):
+            pool.submit(_trabajador, pendientes, terminadas)
+
+        for procesadas in range(1, len(filas) + 1):
+            indice, resultado = terminadas.get()
+            resultados[indice] = resultado
+            if "error" in resultado:
+                con_error += 1
+            if al_avanzar:
+                al_avanzar(procesadas, con_error)
+
+    return resultados
+
+
+def escribir_csv(filas, resultados, destino):
+    """Escribe en `destino` el CSV con consenso, acuerdo y probabilidades por modelo."""
+    # Columnas por modelo en el orden en que aparecen en las respuestas
+    modelos = []
+    for resultado in resultados:
+        for item in resultado.get("predicciones", []) if "error" not in resultado else []:
+            if item.get("modelo") not in modelos:
+                modelos.append(item.get("modelo"))
+
+    encabezado = ['id', 'texto', 'resultado_general', 'porcentaje_acuerdo']
+    for modelo in modelos:
+        encabezado += [f"{modelo}_prediccion", f"{modelo}_probabilidad_CO", f"{modelo}_probabilidad_CRC"]
+    encabezado.append('error')
+
+    escritor = csv.writer(destino)
+    escritor.writerow(encabezado)
+
+    for (identificador, texto), resultado in zip(filas, resultados):
+        if "error" in resultado:
+            escritor.writerow([identificador, texto, '', ''] + [''] * (3 * len(modelos)) + [resultado["error"]])
+            continue
+
+        consenso = resultado.get("consenso", {})
+        por_modelo = {item.get("modelo"): item for item in resultado.get("predicciones", [])}
+        fila = [identificador, texto, consenso.get("resultado_general", ''), consenso.get("porcentaje_acuerdo", '')]
+        for modelo in modelos:
+            item = por_modelo.get(modelo, {})
+            fila += [item.get("prediccion", ''), item.get("probabilidad_CO", ''), item.get("probabilidad_CRC", '')]
+        fila.append('')
+        escritor.writerow(fila)
+
+
+def crear_lote(nombre_archivo, contenido):
+    """Valida el archivo, crea el LotePrediccion y lo envía a procesar en segundo plano."""
+    filas = leer_filas(nombre_archivo, contenido)
+    lote = LotePrediccion.objects.create(
+        nombre_archivo=nombre_archivo,
+        total_filas=len(filas),
+        entrada=[list(fila) for fila in filas],
+    )
+    recuperar_huerfanos()
+    _executor_lotes.submit(_procesar_en_hilo, lote.pk)
+    return lote
+
+
+def _procesar_en_hilo(lote_id):
+    close_old_connections()
+    try:
+        procesar_lote(lote_id)
+    finally:
+        close_old_connections()
+
+
+def procesar_lote(lote_id):
+    """
+    Reclama un lote PENDIENTE y lo procesa. Retorna True si este proceso lo procesó.
+
+    El reclamo es un UPDATE condicional, así dos procesos nunca puntúan el mismo lote.
+    """
+    reclamado = LotePrediccion.objects.filter(pk=lote_id, estado='PENDIENTE').update(
+        estado='PROCESANDO', procesadas=0, con_error=0, fecha_actividad=timezone.now(),
+    )
+    if not reclamado:
+        return False
+
+    # El progreso se guarda como máximo cada medio segundo para no saturar la base de datos
+    ultimo_guardado = [0.0]
+
+    def al_avanzar(procesadas, con_error):
+        ahora = time.monotonic()
+        if ahora - ultimo_guardado[0] >= 0.5:
+            ultimo_guardado[0] = ahora
+            LotePrediccion.objects.filter(pk=lote_id).update(
+                procesadas=procesadas, con_error=con_error, fecha_actividad=timezone.now(),
+            )
+
+    try:
+        filas = [tuple(fila) for fila in LotePrediccion.objects.values_list('entrada', flat=True).get(pk=lote_id)]
+        if not filas:
+            # Lote creado antes de que se guardaran las filas de entrada
+            raise ArchivoLoteInvalido("Las filas del lote no se conservaron; vuelve a subir el archivo.")
+        resultados = predecir_filas(filas, al_avanzar=al_avanzar)
+        salida = io.StringIO()
+        escribir_csv(filas, resultados, salida)
+    except Exception as e:
+        LotePrediccion.objects.filter(pk=lote_id).update(
+            estado='ERROR', error=str(e), entrada=[], fecha_fin=timezone.now()
+        )
+        return True
+
+    LotePrediccion.objects.filter(pk=lote_id).update(
+        estado='COMPLETADO',
+        procesadas=len(filas),
+        con_error=sum(1 for r in resultados if "error" in r),
+        resultado_csv=salida.getvalue(),
+        # Las filas de entrada solo sirven para retomar el lote
+        entrada=[],
+        fecha_fin=timezone.now(),
+    )
+    return True
+
+
+def reencolar_atascados(minutos):
+    """Devuelve a PENDIENTE los lotes en PROCESANDO que no avanzan hace más de `minutos`."""
+    limite = timezone.now() - timedelta(minutes=minutos)
+    return LotePrediccion.objects.filter(estado='PROCESANDO', fecha_actividad__lt=limite).update(
+        estado='PENDIENTE',
+        fecha_actividad=None,
+    )
+
+
+def procesar_pendientes(limite=None):
+    """Procesa los lotes pendientes en orden de llegada. Retorna cuántos se procesaron."""
+    ids = LotePrediccion.objects.filter(estado='PENDIENTE').order_by('fecha_creacion').values_list('pk', flat=True)
+    if limite:
+        ids = ids[:limite]
+
+    procesados = 0
+    for lote_id in list(ids):
+        if procesar_lote(lote_id):
+            procesados += 1
+    return procesados
+
+
+def recuperar_huerfanos():
+    """
+    Reencola los lotes atascados y envía al hilo de lotes los PENDIENTE que nadie atiende.
+
+    Recupera los lotes que un reinicio del proceso dejó a medias. Se ejecuta como
+    máximo una vez cada NLP_LOTE_REVISION_SEGUNDOS por proceso (la primera, en cuanto se usa).
+    """
+    global _proxima_revision
+    with _lock_revision:
+        if time.monotonic() < _proxima_revision:
+            return
+        _proxima_revision = time.monotonic() + NLP_LOTE_REVISION_SEGUNDOS
+
+    reencolar_atascados(NLP_LOTE_ATASCADO_MINUTOS)
+    # Los recién creados ya tienen su envío al hilo; reenviar uno de más no lo procesa dos veces
+    limite = timezone.now() - timedelta(seconds=NLP_LOTE_REVISION_SEGUNDOS)
+    ids = LotePrediccion.objects.filter(estado='PENDIENTE', fecha_creacion__lt=limite).order_by(
+        'fecha_creacion'
+    ).values_list('pk', flat=True)
+    for lote_id in list(ids):
+        _executor_lotes.submit(_procesar_en_hilo, lote_id)
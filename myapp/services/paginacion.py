@@ -0,0 +1,130 @@
+import base64
+import datetime
+import json
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+class _CodificadorCursor(DjangoJSONEncoder):
+    # DjangoJSONEncoder recorta las fechas a milisegundos; el cursor necesita el valor exacto
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class Pagina:
+    def __init__(self, objetos, cursor_siguiente=None, cursor_anterior=None):
+        self.objetos = objetos
+        self.cursor_siguiente = cursor_siguiente
+        self.cursor_anterior = cursor_anterior
+
+    def __iter__(self):
+        return iter(self.objetos)
+
+    def __len__(self):
+        return len(self.objetos)
+
+
+def _campos(orden):
+    return [(campo.lstrip('-'), campo.startswith('-')) for campo in orden]
+
+
+def _valor(objeto, campo):
+    return objeto[campo] if isinstance(objeto, dict) else getattr(objeto, campo)
+
+
+def codificar_cursor(objeto, orden):
+    valores = [_valor(objeto, campo) for campo, _ in _campos(orden)]
+    datos = json.dumps(valores, cls=_CodificadorCursor).encode('utf-8')
+    return base64.urlsafe_b64encode(datos).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(cursor, orden, modelo=None):
+    """
+    Retorna los valores del cursor convertidos al tipo de cada campo de `modelo`
+    (o tal como vienen en el JSON si no se indica), o None si no es válido.
+    """
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+    except (ValueError, TypeError):
+        return None
+
+    campos = _campos(orden)
+    if not isinstance(valores, list) or len(valores) != len(campos):
+        return None
+
+    if modelo is None:
+        return valores
+
+    convertidos = []
+    for (campo, _), valor in zip(campos, valores):
+        try:
+            valor = modelo._meta.get_field(campo).to_python(valor)
+        except FieldDoesNotExist:
+            pass
+        except Exception:
+            return None
+        convertidos.append(valor)
+    return convertidos
+
+
+def _filtro_despues_de(valores, campos, hacia_adelante):
+    """
+    Condición "fila posterior a `valores`" en el orden indicado, expandida como
+    (a > x) OR (a = x AND b > y) OR ...
+
+    El OR por sí solo no es un rango sobre el índice compuesto; por eso se
+    agrega la cota redundante a >= x, que la base de datos usa como inicio del
+    recorrido del índice y las páginas profundas no se filtran desde el principio.
+    """
+    filtro = Q()
+    for i, (campo, descendente) in enumerate(campos):
+        iguales = {campos[j][0]: valores[j] for j in range(i)}
+        operador = 'gt' if descendente != hacia_adelante else 'lt'
+        filtro |= Q(**iguales, **{f"{campo}__{operador}": valores[i]})
+
+    primero, descendente = campos[0]
+    cota = 'gte' if descendente != hacia_adelante else 'lte'
+    return Q(**{f"{primero}__{cota}": valores[0]}) & filtro
+
+
+def paginar_por_clave(queryset, orden, tamano, despues=None, antes=None):
+    """
+    Paginación por cursor (keyset) sobre `orden`, que debe terminar en un campo único.
+
+    A diferencia de OFFSET, cada página cuesta lo mismo sin importar en qué
+    posición de la tabla esté. Los campos de `orden` no deben admitir NULL.
+    """
+    campos = _campos(orden)
+    modelo = queryset.model
+
+    if antes:
+        valores = decodificar_cursor(antes, orden, modelo)
+        if valores is not None:
+            orden_inverso = [campo if descendente else f"-{campo}" for campo, descendente in campos]
+            filas = list(
+                queryset.filter(_filtro_despues_de(valores, campos, False)).order_by(*orden_inverso)[:tamano + 1]
+            )
+            hay_anteriores = len(filas) > tamano
+            objetos = list(reversed(filas[:tamano]))
+            return Pagina(
+                objetos,
+                cursor_siguiente=codificar_cursor(objetos[-1], orden) if objetos else None,
+                cursor_anterior=codificar_cursor(objetos[0], orden) if objetos and hay_anteriores else None,
+            )
+
+    valores = decodificar_cursor(despues, orden, modelo) if despues else None
+    if valores is not None:
+        queryset = queryset.filter(_filtro_despues_de(valores, campos, True))
+
+    filas = list(queryset.order_by(*orden)[:tamano + 1])
+    objetos = filas[:tamano]
+    return Pagina(
+        objetos,
+        cursor_siguiente=codificar_cursor(objetos[-1], orden) if len(filas) > tamano else None,
+        cursor_anterior=codificar_cursor(objetos[0], orden) if objetos and valores is not None else None,
+    )
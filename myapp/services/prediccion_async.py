@@ -0,0 +1,122 @@
+import asyncio
+import copy
+from os import getenv
+
+import httpx
+from asgiref.sync import sync_to_async
+
+from . import cache_predicciones
+from . import prediccion_service
+
+# Conexiones keep-alive del cliente asíncrono (un solo worker ASGI puede tener muchas en curso)
+NLP_ASYNC_POOL_SIZE = int(getenv("NLP_ASYNC_POOL_SIZE", "50"))
+# Máximo de inferencias simultáneas por event loop (la espera por un cupo es NLP_ESPERA_CUPO)
+NLP_ASYNC_MAX_CONCURRENTES = int(getenv("NLP_ASYNC_MAX_CONCURRENTES", "50"))
+
+_cliente = None
+_cliente_loop = None
+_semaforo = None
+# clave -> tarea en curso, para compartir la misma consulta entre peticiones simultáneas
+_vuelos = {}
+
+
+def _obtener_cliente():
+    """
+    Retorna el cliente HTTP asíncrono del event loop actual.
+
+    httpx.AsyncClient queda ligado al loop donde se crea; si el loop cambia
+    (por ejemplo, en pruebas) se crea uno nuevo.
+    """
+    global _cliente, _cliente_loop, _semaforo
+    loop = asyncio.get_running_loop()
+    if _cliente is None or _cliente_loop is not loop:
+        _cliente = httpx.AsyncClient(
+            timeout=httpx.Timeout(
+                prediccion_service.NLP_READ_TIMEOUT,
+                connect=prediccion_service.NLP_CONNECT_TIMEOUT,
+            ),
+            limits=httpx.Limits(
+                max_connections=NLP_ASYNC_POOL_SIZE,
+                max_keepalive_connections=NLP_ASYNC_POOL_SIZE,
+            ),
+            transport=httpx.AsyncHTTPTransport(retries=prediccion_service.NLP_MAX_RETRIES),
+        )
+        _cliente_loop = loop
+        _semaforo = asyncio.Semaphore(NLP_ASYNC_MAX_CONCURRENTES)
+        _vuelos.clear()
+    return _cliente
+
+
+async def _consultar_fastapi_async(texto):
+    cliente = _obtener_cliente()
+    circuito = prediccion_service._circuito
+
+    # Mismo bulkhead que la versión síncrona: sin cupo en NLP_ESPERA_CUPO segundos se rechaza.
+    # Se espera el cupo antes de consultar el circuito, para no tomar la llamada de prueba y no usarla
+    try:
+        await asyncio.wait_for(_semaforo.acquire(), timeout=prediccion_service.NLP_ESPERA_CUPO)
+    except asyncio.TimeoutError:
+        return {"error": "El servicio de predicción está saturado. Intenta de nuevo en unos segundos."}
+
+    try:
+        # El circuito es el mismo que usan las vistas síncronas del proceso
+        if not circuito.permite_peticion():
+            return {"error": "El servicio de predicción no está disponible temporalmente. Intenta de nuevo más tarde."}
+
+        registrado = False
+        try:
+            response = await cliente.post(prediccion_service.FASTAPI_URL, json={"text": texto})
+            if response.status_code >= 500:
+                circuito.registrar_fallo()
+            else:
+                circuito.registrar_exito()
+            registrado = True
+        except Exception as e:
+            circuito.registrar_fallo()
+            registrado = True
+            return {"error": f"No se pudo conectar a FastAPI: {str(e)}"}
+        finally:
+            if not registrado:
+                # Cancelada (CancelledError) sin respuesta: la prueba del circuito queda libre para otra llamada
+                circuito.liberar_prueba()
+    finally:
+        _semaforo.release()
+
+    if response.status_code == 200:
+        try:
+            return response.json()
+        except ValueError as e:
+            return {"error": f"No se pudo conectar a FastAPI: {str(e)}"}
+
+    return {"error": f"FastAPI respondió con código {response.status_code}"}
+
+
+async def _consultar_y_guardar(texto):
+    resultado = await _consultar_fastapi_async(texto)
+    if "error" not in resultado:
+        await sync_to_async(cache_predicciones.guardar)(texto, resultado)
+    return resultado
+
+
+async def obtener_predicciones_async(texto):
+    """
+    Versión asíncrona de `obtener_predicciones` para las vistas ASGI.
+
+    Usa la misma caché y el mismo circuito que la versión síncrona; las
+    consultas simultáneas del mismo texto comparten una sola llamada a FastAPI.
+    """
+    resultado = await sync_to_async(cache_predicciones.obtener)(texto)
+    if resultado is not None:
+        return resultado
+
+    _obtener_cliente()
+    clave = cache_predicciones.calcular_clave(texto)
+    tarea = _vuelos.get(clave)
+    if tarea is None:
+        tarea = asyncio.ensure_future(_consultar_y_guardar(texto))
+        _vuelos[clave] = tarea
+        tarea.add_done_callback(lambda _: _vuelos.pop(clave, None))
+
+    # shield: si una petición se cancela, las demás siguen esperando el resultado.
+    # Cada petición recibe su propia copia, como en VueloUnico
+    return copy.deepcopy(await asyncio.shield(tarea))
@@ -1,18 +1,101 @@
 import requests
 import os
 from os import getenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-# FASTAPI_URL = "http://localhost:8001/predict_all" 
+from . import cache_predicciones
+from .resiliencia import Cortacircuitos, LimiteConcurrencia, VueloUnico
+
+# FASTAPI_URL = "http://localhost:8001/predict_all"
 FASTAPI_URL = os.getenv("API_URL")
 
+# --- Configuración del pool de conexiones hacia FastAPI ---
+# Número de conexiones persistentes (keep-alive) que se mantienen abiertas por proceso
+NLP_POOL_SIZE = int(getenv("NLP_POOL_SIZE", "10"))
+# Tiempo máximo para establecer la conexión TCP/TLS (segundos)
+NLP_CONNECT_TIMEOUT = float(getenv("NLP_CONNECT_TIMEOUT", "3.05"))
+# Tiempo máximo esperando la respuesta del modelo (segundos)
+NLP_READ_TIMEOUT = float(getenv("NLP_READ_TIMEOUT", "25"))
+# Reintentos ante errores de conexión o respuestas 502/503/504
+NLP_MAX_RETRIES = int(getenv("NLP_MAX_RETRIES", "2"))
+# Factor de espera exponencial entre reintentos (0.5 -> 0.5s, 1s, 2s...)
+NLP_BACKOFF_FACTOR = float(getenv("NLP_BACKOFF_FACTOR", "0.5"))
+
+# --- Protección ante un modelo lento o caído ---
+# Máximo de llamadas simultáneas a FastAPI por proceso (bulkhead)
+NLP_MAX_CONCURRENTES = int(getenv("NLP_MAX_CONCURRENTES", "8"))
+# Segundos que una llamada espera por un cupo antes de rechazarse
+NLP_ESPERA_CUPO = float(getenv("NLP_ESPERA_CUPO", "1"))
+# Fallos seguidos que abren el circuito
+NLP_UMBRAL_FALLOS = int(getenv("NLP_UMBRAL_FALLOS", "5"))
+# Segundos que el circuito permanece abierto antes de probar de nuevo
+NLP_TIEMPO_APERTURA = float(getenv("NLP_TIEMPO_APERTURA", "30"))
+
+
+def _crear_sesion():
+    """
+    Crea una sesión HTTP reutilizable con pool de conexiones y reintentos acotados.
+
+    La sesión mantiene las conexiones abiertas (keep-alive), así cada análisis
+    evita un nuevo handshake TCP+TLS contra el servidor del modelo.
+    """
+    reintentos = Retry(
+        total=NLP_MAX_RETRIES,
+        connect=NLP_MAX_RETRIES,
+        read=0,  # No se reintenta si el modelo ya estaba procesando (evita duplicar inferencias)
+        status=NLP_MAX_RETRIES,
+        backoff_factor=NLP_BACKOFF_FACTOR,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset(["POST"]),
+        raise_on_status=False,
+    )
+    adaptador = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=NLP_POOL_SIZE,
+        max_retries=reintentos,
+    )
+
+    sesion = requests.Session()
+    sesion.mount("http://", adaptador)
+    sesion.mount("https://", adaptador)
+    sesion.headers.update({"Connection": "keep-alive"})
+    return sesion
+
+
+# Sesión compartida a nivel de módulo (una por proceso de Django)
+_sesion = _crear_sesion()
+_limite = LimiteConcurrencia(NLP_MAX_CONCURRENTES, NLP_ESPERA_CUPO)
+_circuito = Cortacircuitos(NLP_UMBRAL_FALLOS, NLP_TIEMPO_APERTURA)
+# Deduplica consultas simultáneas del mismo texto normalizado
+_vuelos = VueloUnico()
+
+
+def _consultar_fastapi(texto):
+    # Sin cupo disponible se rechaza la llamada en lugar de bloquear el worker
+    if not _limite.adquirir():
+        return {"error": "El servicio de predicción está saturado. Intenta de nuevo en unos segundos."}
 
-def obtener_predicciones(texto):
     try:
-        response = requests.post(
-            FASTAPI_URL,
-            json={"text": texto},
-            timeout=25
-        )
+        # Con el circuito abierto se falla de inmediato sin esperar al modelo
+        if not _circuito.permite_peticion():
+            return {"error": "El servicio de predicción no está disponible temporalmente. Intenta de nuevo más tarde."}
+
+        try:
+            response = _sesion.post(
+                FASTAPI_URL,
+                json={"text": texto},
+                timeout=(NLP_CONNECT_TIMEOUT, NLP_READ_TIMEOUT)
+            )
+        except Exception as e:
+            _circuito.registrar_fallo()
+            return {"error": f"No se pudo conectar a FastAPI: {str(e)}"}
+
+        # Solo los errores del servidor cuentan como fallo del servicio
+        if response.status_code >= 500:
+            _circuito.registrar_fallo()
+        else:
+            _circuito.registrar_exito()
 
         if response.status_code == 200:
             return response.json()
@@ -21,3 +104,39 @@ def obtener_predicciones(texto):
 
     except Exception as e:
         return {"error": f"No se pudo conectar a FastAPI: {str(e)}"}
+
+    finally:
+        _limite.liberar()
+
+
+def estado_servicio():
+    """Estado del circuito y del límite de concurrencia hacia FastAPI en este proceso."""
+    return {
+        "circuito": _circuito.estado(),
+        "concurrencia": _limite.estado(),
+        "coalescencia": _vuelos.estado(),
+        "cache": cache_predicciones.estadisticas(),
+    }
+
+
+def obtener_predicciones(texto):
+    """
+    Obtiene las predicciones del modelo NLP para un texto clínico.
+
+    Primero consulta la caché (memoria y base de datos); solo si no hay una
+    respuesta vigente se llama a FastAPI. Si otra petición ya está consultando
+    el mismo texto, se espera y se comparte su resultado en lugar de repetir la
+    inferencia. Las respuestas con error no se guardan.
+    """
+    resultado = cache_predicciones.obtener(texto)
+    if resultado is not None:
+        return resultado
+
+    def consultar_y_guardar():
+        resultado = _consultar_fastapi(texto)
+        if "error" not in resultado:
+            cache_predicciones.guardar(texto, resultado)
+        return resultado
+
+    espera_maxima = NLP_ESPERA_CUPO + NLP_CONNECT_TIMEOUT + NLP_READ_TIMEOUT
+    return _vuelos.ejecutar(cache_predicciones.calcular_clave(texto), consultar_y_guardar, espera_maxima)
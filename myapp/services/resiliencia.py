@@ -0,0 +1,240 @@
+import copy
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+class LimiteConcurrencia:
+    """
+    Bulkhead: limita cuántas llamadas al modelo NLP pueden estar en curso por proceso.
+
+    Si no hay cupo dentro de `espera` segundos la llamada se rechaza, así los
+    workers de Django no se quedan bloqueados esperando al modelo.
+    """
+
+    def __init__(self, maximo, espera):
+        self.maximo = maximo
+        self.espera = espera
+        self._semaforo = threading.BoundedSemaphore(maximo)
+        self._lock = threading.Lock()
+        self.en_curso = 0
+        self.rechazadas = 0
+
+    def adquirir(self):
+        if not self._semaforo.acquire(timeout=self.espera):
+            with self._lock:
+                self.rechazadas += 1
+            return False
+        with self._lock:
+            self.en_curso += 1
+        return True
+
+    def liberar(self):
+        with self._lock:
+            self.en_curso -= 1
+        self._semaforo.release()
+
+    def estado(self):
+        with self._lock:
+            return {
+                "maximo": self.maximo,
+                "en_curso": self.en_curso,
+                "rechazadas": self.rechazadas,
+            }
+
+
+class Cortacircuitos:
+    """
+    Circuit breaker para el servidor del modelo.
+
+    - CERRADO: las llamadas pasan; tras `umbral_fallos` fallos seguidos se abre.
+    - ABIERTO: las llamadas fallan de inmediato durante `tiempo_apertura` segundos.
+    - SEMI_ABIERTO: se deja pasar una sola llamada de prueba; si funciona se
+      cierra, si falla vuelve a abrirse.
+    """
+
+    CERRADO = "CERRADO"
+    ABIERTO = "ABIERTO"
+    SEMI_ABIERTO = "SEMI_ABIERTO"
+
+    def __init__(self, umbral_fallos, tiempo_apertura):
+        self.umbral_fallos = umbral_fallos
+        self.tiempo_apertura = tiempo_apertura
+        self._lock = threading.Lock()
+        self._estado = self.CERRADO
+        self._fallos_seguidos = 0
+        self._abierto_desde = 0.0
+        self._prueba_en_curso = False
+        self._contadores = {
+            "exitos": 0,
+            "fallos": 0,
+            "rechazadas": 0,
+            "aperturas": 0,
+        }
+
+    def _actualizar_estado(self):
+        # Pasado el tiempo de apertura se permite probar de nuevo
+        if self._estado == self.ABIERTO and time.monotonic() - self._abierto_desde >= self.tiempo_apertura:
+            self._estado = self.SEMI_ABIERTO
+            self._prueba_en_curso = False
+
+    def permite_peticion(self):
+        with self._lock:
+            self._actualizar_estado()
+            if self._estado == self.CERRADO:
+                return True
+            if self._estado == self.SEMI_ABIERTO and not self._prueba_en_curso:
+                self._prueba_en_curso = True
+                return True
+            self._contadores["rechazadas"] += 1
+            return False
+
+    def registrar_exito(self):
+        with self._lock:
+            self._contadores["exitos"] += 1
+            self._fallos_seguidos = 0
+            self._estado = self.CERRADO
+            self._prueba_en_curso = False
+
+    def liberar_prueba(self):
+        """Devuelve la llamada de prueba sin contar éxito ni fallo (p. ej. si se canceló)."""
+        with self._lock:
+            self._prueba_en_curso = False
+
+    def registrar_fallo(self):
+        with self._lock:
+            self._contadores["fallos"] += 1
+            self._fallos_seguidos += 1
+            if self._estado == self.SEMI_ABIERTO or self._fallos_seguidos >= self.umbral_fallos:
+                if self._estado != self.ABIERTO:
+                    self._contadores["aperturas"] += 1
+                self._estado = self.ABIERTO
+                self._abierto_desde = time.monotonic()
+                self._prueba_en_curso = False
+
+    def estado(self):
+        with self._lock:
+            self._actualizar_estado()
+            datos = dict(self._contadores)
+            datos["estado"] = self._estado
+            datos["fallos_seguidos"] = self._fallos_seguidos
+            if self._estado == self.ABIERTO:
+                restante = self.tiempo_apertura - (time.monotonic() - self._abierto_desde)
+                datos["segundos_para_reintento"] = round(max(restante, 0), 1)
+            return datos
+
+
+class _Vuelo:
+    def __init__(self):
+        self.terminado = threading.Event()
+        self.resultado = None
+        self.excepcion = None
+
+
+class VueloUnico:
+    """
+    Single-flight: las llamadas concurrentes con la misma clave comparten una
+    única ejecución de la función y todas reciben su resultado.
+
+    Si la función del líder lanza una excepción, las llamadas que lo esperaban
+    reciben la misma excepción. Cada una recibe su propia copia del resultado.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._vuelos = {}
+        self.ejecutadas = 0
+        self.compartidas = 0
+
+    def ejecutar(self, clave, funcion, espera=None):
+        with self._lock:
+            vuelo = self._vuelos.get(clave)
+            lider = vuelo is None
+            if lider:
+                vuelo = _Vuelo()
+                self._vuelos[clave] = vuelo
+                self.ejecutadas += 1
+            else:
+                self.compartidas += 1
+
+        if not lider:
+            # Si el líder tarda más de lo esperado, se ejecuta la función por cuenta propia
+            if vuelo.terminado.wait(espera):
+                if vuelo.excepcion is not None:
+                    raise vuelo.excepcion
+                return copy.deepcopy(vuelo.resultado)
+            return funcion()
+
+        try:
+            resultado = funcion()
+            # Copia propia del vuelo: el líder puede modificar el suyo mientras los demás copian
+            vuelo.resultado = copy.deepcopy(resultado)
+            return resultado
+        except BaseException as e:
+            vuelo.excepcion = e
+            raise
+        finally:
+            with self._lock:
+                self._vuelos.pop(clave, None)
+            vuelo.terminado.set()
+
+    def estado(self):
+        with self._lock:
+            return {
+                "en_vuelo": len(self._vuelos),
+                "ejecutadas": self.ejecutadas,
+                "compartidas": self.compartidas,
+            }
+
+
+class VentanaDeslizante:
+    """
+    Limitador por clave (IP, correo...): como máximo `limite` eventos en los
+    últimos `segundos`, contados con una ventana deslizante en memoria del proceso.
+
+    Guarda a lo sumo `max_claves` claves; las menos recientes se descartan.
+    """
+
+    def __init__(self, limite, segundos, max_claves=10000):
+        self.limite = limite
+        self.segundos = segundos
+        self.max_claves = max_claves
+        self._lock = threading.Lock()
+        self._eventos = OrderedDict()
+        self.permitidos = 0
+        self.rechazados = 0
+
+    def permitir(self, clave):
+        """Registra un evento de `clave`. Retorna 0 si se permite, o los segundos que faltan para poder reintentar."""
+        ahora = time.monotonic()
+        with self._lock:
+            eventos = self._eventos.get(clave)
+            if eventos is None:
+                eventos = self._eventos[clave] = deque(maxlen=self.limite)
+            while eventos and eventos[0] <= ahora - self.segundos:
+                eventos.popleft()
+
+            if len(eventos) >= self.limite:
+                self.rechazados += 1
+                return eventos[0] + self.segundos - ahora
+
+            eventos.append(ahora)
+            self._eventos.move_to_end(clave)
+            while len(self._eventos) > self.max_claves:
+                self._eventos.popitem(last=False)
+            self.permitidos += 1
+            return 0
+
+    def limpiar(self, clave):
+        with self._lock:
+            self._eventos.pop(clave, None)
+
+    def estado(self):
+        with self._lock:
+            return {
+                "limite": self.limite,
+                "segundos": self.segundos,
+                "claves": len(self._eventos),
+                "permitidos": self.permitidos,
+                "rechazados": self.rechazados,
+            }
@@ -0,0 +1,58 @@
+import random
+import secrets
+from datetime import timedelta
+from os import getenv
+
+from django.utils import timezone
+
+from ..models import ResultadoTemporal
+
+# Minutos que un resultado espera la confirmación del médico antes de expirar
+NLP_RESULTADO_TTL_MINUTOS = int(getenv("NLP_RESULTADO_TTL_MINUTOS", "30"))
+# Probabilidad de purgar los vencidos en cada escritura (evita depender solo del comando)
+PROBABILIDAD_PURGA = 0.05
+
+
+def guardar(paciente, texto, resultado):
+    """Guarda el resultado en el servidor y retorna el token para el formulario."""
+    if random.random() < PROBABILIDAD_PURGA:
+        purgar_expirados()
+
+    token = secrets.token_urlsafe(32)
+    ResultadoTemporal.objects.create(
+        token=token,
+        paciente=paciente,
+        texto_clinico=texto,
+        resultado=resultado,
+        expira_en=timezone.now() + timedelta(minutes=NLP_RESULTADO_TTL_MINUTOS),
+    )
+    return token
+
+
+def consumir(token, paciente):
+    """
+    Retorna el ResultadoTemporal vigente del token para ese paciente y lo borra, o None.
+
+    El token no sirve para otro paciente ni después de expirar. Se llama dentro de
+    la transacción que guarda el análisis: la fila queda bloqueada y solo una
+    petición logra borrarla, así dos envíos del mismo token no guardan dos análisis.
+    Si la transacción se revierte, el token vuelve a ser válido.
+    """
+    if not token:
+        return None
+    temporal = ResultadoTemporal.objects.select_for_update().filter(
+        token=token,
+        paciente=paciente,
+        expira_en__gt=timezone.now(),
+    ).first()
+    if temporal is None:
+        return None
+
+    borrados, _ = ResultadoTemporal.objects.filter(pk=temporal.pk).delete()
+    return temporal if borrados else None
+
+
+def purgar_expirados():
+    """Elimina los resultados vencidos. Retorna cuántos se borraron."""
+    borrados, _ = ResultadoTemporal.objects.filter(expira_en__lte=timezone.now()).delete()
+    return borrados
@@ -0,0 +1,85 @@
+from django.db.models import Case, Count, F, Max, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Greatest
+
+from ..models import AnalisisFinal, HistoriaClinica, Paciente, ResumenPaciente
+
+CAMPOS = ('total_historias', 'total_analisis', 'ultima_visita', 'fecha_ultimo_analisis', 'ultimo_diagnostico')
+
+
+def _agregado(modelo, expresion):
+    return Subquery(
+        modelo.objects.filter(paciente=OuterRef('pk')).order_by().values('paciente')
+        .annotate(valor=expresion).values('valor')
+    )
+
+
+def anotar_resumen(pacientes):
+    """Anota en `pacientes` los valores del resumen calculados desde las tablas clínicas."""
+    return pacientes.annotate(
+        r_total_historias=Coalesce(_agregado(HistoriaClinica, Count('pk')), 0),
+        r_total_analisis=Coalesce(_agregado(AnalisisFinal, Count('pk')), 0),
+        r_ultima_visita=_agregado(HistoriaClinica, Max('fecha_visita')),
+        r_fecha_ultimo_analisis=_agregado(AnalisisFinal, Max('fecha_analisis')),
+        r_ultimo_diagnostico=Subquery(
+            AnalisisFinal.objects.filter(paciente=OuterRef('pk'))
+            .order_by('-fecha_analisis', '-pk').values('diagnostico_final')[:1]
+        ),
+    )
+
+
+def valores_resumen(paciente):
+    """Valores del resumen de un paciente anotado con `anotar_resumen`."""
+    return {campo: getattr(paciente, f"r_{campo}") for campo in CAMPOS}
+
+
+def recalcular(paciente_id, crear=True):
+    """
+    Recalcula el resumen de un paciente desde cero.
+
+    Con `crear=False` solo actualiza un resumen existente (se usa al borrar,
+    cuando el paciente mismo puede estar eliminándose en cascada).
+    """
+    paciente = anotar_resumen(Paciente.objects.filter(pk=paciente_id).only('pk')).first()
+    if paciente is None:
+        return None
+    if not crear:
+        ResumenPaciente.objects.filter(paciente_id=paciente_id).update(**valores_resumen(paciente))
+        return None
+    resumen, _ = ResumenPaciente.objects.update_or_create(paciente_id=paciente_id, defaults=valores_resumen(paciente))
+    return resumen
+
+
+def _obtener_o_crear(paciente_id):
+    """Retorna True si el resumen ya existía; si no, lo crea ya calculado (incluye el registro nuevo)."""
+    if ResumenPaciente.objects.filter(paciente_id=paciente_id).exists():
+        return True
+    paciente = anotar_resumen(Paciente.objects.filter(pk=paciente_id).only('pk')).first()
+    _, creado = ResumenPaciente.objects.get_or_create(paciente_id=paciente_id, defaults=valores_resumen(paciente))
+    return not creado
+
+
+def registrar_historia(historia):
+    """Suma una historia nueva al resumen con un UPDATE atómico (seguro ante altas simultáneas)."""
+    if not _obtener_o_crear(historia.paciente_id):
+        return
+    fecha = Value(historia.fecha_visita)
+    ResumenPaciente.objects.filter(paciente_id=historia.paciente_id).update(
+        total_historias=F('total_historias') + 1,
+        ultima_visita=Greatest(Coalesce('ultima_visita', fecha), fecha),
+    )
+
+
+def registrar_analisis(analisis):
+    """Suma un análisis nuevo al resumen; su diagnóstico pasa a ser el último si es el más reciente."""
+    if not _obtener_o_crear(analisis.paciente_id):
+        return
+    fecha = Value(analisis.fecha_analisis)
+    es_el_mas_reciente = Q(fecha_ultimo_analisis__isnull=True) | Q(fecha_ultimo_analisis__lte=analisis.fecha_analisis)
+    ResumenPaciente.objects.filter(paciente_id=analisis.paciente_id).update(
+        total_analisis=F('total_analisis') + 1,
+        ultimo_diagnostico=Case(
+            When(es_el_mas_reciente, then=Value(analisis.diagnostico_final)),
+            default=F('ultimo_diagnostico'),
+        ),
+        fecha_ultimo_analisis=Greatest(Coalesce('fecha_ultimo_analisis', fecha), fecha),
+    )
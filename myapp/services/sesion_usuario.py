@@ -0,0 +1,109 @@
+import copy
+import hashlib
+import threading
+import time
+from os import getenv
+
+from django.core.cache import caches
+
+from ..models import AppUser
+
+# Clave de la sesión con el correo del usuario que completó la verificación
+CLAVE_SESION = "authenticated_user"
+
+# Segundos que se reutiliza un AppUser ya leído entre peticiones
+USUARIO_CACHE_TTL = int(getenv("USUARIO_CACHE_TTL", "30"))
+# Usuarios que se guardan como máximo en la memoria de cada proceso
+USUARIO_CACHE_MAX_ENTRADAS = 1024
+# Alias de CACHES compartido por todos los workers (p. ej. Redis). Vacío: memoria de
+# cada proceso, y `invalidar` solo alcanza al proceso que guardó el cambio; los demás
+# pueden servir el perfil anterior (o un usuario eliminado) hasta USUARIO_CACHE_TTL.
+USUARIO_CACHE = getenv("USUARIO_CACHE", "")
+
+_lock = threading.Lock()
+# email -> (expira_en_monotonic, AppUser)
+_memoria = {}
+
+
+def _cache():
+    return caches[USUARIO_CACHE] if USUARIO_CACHE else None
+
+
+def _clave_cache(email):
+    return f"sesion_usuario:{hashlib.sha256(email.encode('utf-8')).hexdigest()}"
+
+
+def invalidar(email):
+    """Descarta el usuario guardado (p. ej. al guardar su perfil), en la caché compartida si la hay."""
+    with _lock:
+        _memoria.pop(email, None)
+
+    cache = _cache()
+    if cache is not None:
+        try:
+            cache.delete(_clave_cache(email))
+        except Exception:
+            # Caché no disponible: la entrada vence sola en USUARIO_CACHE_TTL
+            pass
+
+
+def limpiar_memoria():
+    with _lock:
+        _memoria.clear()
+
+
+def _obtener_compartido(cache, email):
+    clave = _clave_cache(email)
+    try:
+        usuario = cache.get(clave)
+    except Exception:
+        usuario = None
+    if usuario is not None:
+        # Cada lectura de la caché ya es una copia independiente
+        return usuario
+
+    usuario = AppUser.objects.filter(email=email).first()
+    if usuario is not None:
+        try:
+            cache.set(clave, usuario, USUARIO_CACHE_TTL)
+        except Exception:
+            pass
+    return usuario
+
+
+def obtener(email):
+    """
+    Retorna el AppUser con ese correo, o None si no existe.
+
+    Se lee de USUARIO_CACHE o, sin ella, de la memoria del proceso mientras no
+    venza USUARIO_CACHE_TTL. Cada llamada recibe su propia copia, así los
+    cambios de una petición no afectan a otras.
+    """
+    if not email:
+        return None
+
+    cache = _cache()
+    if cache is not None:
+        return _obtener_compartido(cache, email)
+
+    with _lock:
+        guardado = _memoria.get(email)
+        if guardado is not None and guardado[0] > time.monotonic():
+            return copy.copy(guardado[1])
+
+    usuario = AppUser.objects.filter(email=email).first()
+    if usuario is None:
+        return None
+
+    with _lock:
+        if len(_memoria) >= USUARIO_CACHE_MAX_ENTRADAS:
+            _memoria.clear()
+        _memoria[email] = (time.monotonic() + USUARIO_CACHE_TTL, usuario)
+    return copy.copy(usuario)
+
+
+def usuario_de_la_peticion(request):
+    """AppUser de la sesión, resuelto una sola vez por petición."""
+    if not hasattr(request, "_usuario_sesion"):
+        request._usuario_sesion = obtener(request.session.get(CLAVE_SESION))
+    return request._usuario_sesion
@@ -0,0 +1,166 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from os import getenv
+
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from ..models import TrabajoPrediccion
+from . import cache_predicciones
+from .prediccion_service import obtener_predicciones
+
+# Si es "1", los trabajos se procesan en hilos del mismo proceso de Django.
+# Con "0" quedan en cola para el comando `procesar_predicciones`.
+NLP_TRABAJOS_EN_PROCESO = getenv("NLP_TRABAJOS_EN_PROCESO", "1") == "1"
+# Hilos del worker en proceso
+NLP_TRABAJOS_HILOS = int(getenv("NLP_TRABAJOS_HILOS", "4"))
+# Minutos en PROCESANDO tras los cuales un trabajo se considera abandonado (p. ej. por un reinicio)
+NLP_TRABAJOS_ATASCADO_MINUTOS = int(getenv("NLP_TRABAJOS_ATASCADO_MINUTOS", "10"))
+# Segundos entre revisiones de trabajos huérfanos en cada proceso (solo en modo en proceso)
+NLP_TRABAJOS_REVISION_SEGUNDOS = int(getenv("NLP_TRABAJOS_REVISION_SEGUNDOS", "60"))
+
+_executor = None
+
+_lock_revision = threading.Lock()
+_proxima_revision = 0.0
+
+
+def _obtener_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=NLP_TRABAJOS_HILOS,
+            thread_name_prefix="nlp-trabajo",
+        )
+    return _executor
+
+
+def encolar(texto, paciente=None):
+    """
+    Crea un trabajo de predicción y lo deja en cola.
+
+    Si la predicción ya está en caché, el trabajo se crea directamente como
+    COMPLETADO y no se encola.
+    """
+    resultado = cache_predicciones.obtener(texto)
+    if resultado is not None:
+        ahora = timezone.now()
+        return TrabajoPrediccion.objects.create(
+            paciente=paciente,
+            texto_clinico=texto,
+            estado='COMPLETADO',
+            resultado=resultado,
+            fecha_inicio=ahora,
+            fecha_fin=ahora,
+        )
+
+    trabajo = TrabajoPrediccion.objects.create(paciente=paciente, texto_clinico=texto)
+
+    if NLP_TRABAJOS_EN_PROCESO:
+        recuperar_huerfanos()
+        # Se envía al pool solo cuando el registro ya es visible para otros hilos
+        transaction.on_commit(lambda: _obtener_executor().submit(_procesar_en_hilo, trabajo.pk))
+
+    return trabajo
+
+
+def _procesar_en_hilo(trabajo_id):
+    close_old_connections()
+    try:
+        procesar_trabajo(trabajo_id)
+    finally:
+        close_old_connections()
+
+
+def procesar_trabajo(trabajo_id):
+    """
+    Reclama un trabajo PENDIENTE y consulta el modelo NLP.
+
+    El reclamo es un UPDATE condicional, así dos workers nunca procesan
+    el mismo trabajo. Retorna True si este worker lo procesó.
+    """
+    reclamado = TrabajoPrediccion.objects.filter(pk=trabajo_id, estado='PENDIENTE').update(
+        estado='PROCESANDO',
+        fecha_inicio=timezone.now(),
+    )
+    if not reclamado:
+        return False
+
+    try:
+        trabajo = TrabajoPrediccion.objects.get(pk=trabajo_id)
+
+        try:
+            resultado = obtener_predicciones(trabajo.texto_clinico)
+        except Exception as e:
+            resultado = {"error": f"Error al conectar con el modelo: {str(e)}"}
+
+        if "error" in resultado:
+            trabajo.estado = 'ERROR'
+            trabajo.error = resultado["error"]
+        else:
+            trabajo.estado = 'COMPLETADO'
+            trabajo.resultado = resultado
+
+        trabajo.fecha_fin = timezone.now()
+        trabajo.save(update_fields=['estado', 'resultado', 'error', 'fecha_fin'])
+    except Exception as e:
+        # Un trabajo reclamado nunca se queda en PROCESANDO: la página dejaría de esperar solo con ERROR
+        TrabajoPrediccion.objects.filter(pk=trabajo_id, estado='PROCESANDO').update(
+            estado='ERROR',
+            error=f"Error al procesar el trabajo: {str(e)}",
+            fecha_fin=timezone.now(),
+        )
+    return True
+
+
+def procesar_pendientes(limite=None):
+    """Procesa los trabajos pendientes en orden de llegada. Retorna cuántos se procesaron."""
+    pendientes = TrabajoPrediccion.objects.filter(estado='PENDIENTE').order_by('fecha_creacion')
+    ids = pendientes.values_list('pk', flat=True)
+    if limite:
+        ids = ids[:limite]
+
+    procesados = 0
+    for trabajo_id in list(ids):
+        if procesar_trabajo(trabajo_id):
+            procesados += 1
+    return procesados
+
+
+def reencolar_atascados(minutos):
+    """Devuelve a PENDIENTE los trabajos que llevan demasiado tiempo en PROCESANDO."""
+    limite = timezone.now() - timedelta(minutes=minutos)
+    return TrabajoPrediccion.objects.filter(estado='PROCESANDO', fecha_inicio__lt=limite).update(
+        estado='PENDIENTE',
+        fecha_inicio=None,
+    )
+
+
+def recuperar_huerfanos():
+    """
+    Reencola los trabajos atascados y envía al pool los PENDIENTE que ningún hilo atiende.
+
+    Solo aplica en modo en proceso, donde no corre el comando `procesar_predicciones`:
+    recupera los trabajos que un reinicio dejó a medias. Se ejecuta como máximo una
+    vez cada NLP_TRABAJOS_REVISION_SEGUNDOS por proceso (la primera, en cuanto se usa).
+    """
+    global _proxima_revision
+    if not NLP_TRABAJOS_EN_PROCESO:
+        return
+    with _lock_revision:
+        if time.monotonic() < _proxima_revision:
+            return
+        _proxima_revision = time.monotonic() + NLP_TRABAJOS_REVISION_SEGUNDOS
+
+    reencolar_atascados(NLP_TRABAJOS_ATASCADO_MINUTOS)
+    # Los recién creados ya tienen su envío al pool; reenviar uno de más no lo procesa dos veces
+    limite = timezone.now() - timedelta(seconds=NLP_TRABAJOS_REVISION_SEGUNDOS)
+    ids = list(
+        TrabajoPrediccion.objects.filter(estado='PENDIENTE', fecha_creacion__lt=limite)
+        .order_by('fecha_creacion')
+        .values_list('pk', flat=True)[:NLP_TRABAJOS_HILOS * 25]
+    )
+    for trabajo_id in ids:
+        _obtener_executor().submit(_procesar_en_hilo, trabajo_id)
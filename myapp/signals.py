@@ -0,0 +1,57 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import AnalisisFinal, AppUser, HistoriaClinica, Paciente
+from .services import contadores, resumen_pacientes, sesion_usuario
+
+
+@receiver(post_save, sender=Paciente)
+def paciente_guardado(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        contadores.incrementar('pacientes')
+
+
+@receiver(post_delete, sender=Paciente)
+def paciente_eliminado(sender, instance, **kwargs):
+    contadores.incrementar('pacientes', -1)
+
+
+@receiver(post_save, sender=HistoriaClinica)
+def historia_guardada(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        resumen_pacientes.registrar_historia(instance)
+    else:
+        resumen_pacientes.recalcular(instance.paciente_id)
+
+
+@receiver(post_save, sender=AnalisisFinal)
+def analisis_guardado(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        resumen_pacientes.registrar_analisis(instance)
+        contadores.incrementar('analisis')
+    else:
+        resumen_pacientes.recalcular(instance.paciente_id)
+
+
+@receiver(post_delete, sender=HistoriaClinica)
+def historia_eliminada(sender, instance, **kwargs):
+    resumen_pacientes.recalcular(instance.paciente_id, crear=False)
+
+
+@receiver(post_delete, sender=AnalisisFinal)
+def analisis_eliminado(sender, instance, **kwargs):
+    resumen_pacientes.recalcular(instance.paciente_id, crear=False)
+    contadores.incrementar('analisis', -1)
+
+
+@receiver(post_save, sender=AppUser)
+@receiver(post_delete, sender=AppUser)
+def usuario_cambiado(sender, instance, **kwargs):
+    # El usuario guardado en memoria para las peticiones deja de valer al confirmar el cambio
+    email = instance.email
+    transaction.on_commit(lambda: sesion_usuario.invalidar(email))
@@ -0,0 +1,129 @@
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+# Marcas en el HTML que indican que la vista mostró un error al usuario
+MARCAS_ERROR = ('class="error-box"', 'class="msg-box msg-error"')
+PATRON_TRABAJO = re.compile(r"estado_prediccion/(\d+)/")
+PATRON_CSRF = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+
+def percentil(valores_ordenados, p):
+    """Percentil por rango más cercano sobre una lista ya ordenada."""
+    if not valores_ordenados:
+        return 0.0
+    indice = max(int(round(p / 100 * len(valores_ordenados) + 0.5)) - 1, 0)
+    return valores_ordenados[min(indice, len(valores_ordenados) - 1)]
+
+
+class Resultados:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencias = {}
+        self.errores = {}
+
+    def registrar(self, escenario, latencia, ok):
+        with self._lock:
+            self.latencias.setdefault(escenario, []).append(latencia)
+            if not ok:
+                self.errores[escenario] = self.errores.get(escenario, 0) + 1
+
+    def resumen(self, duracion):
+        filas = []
+        for escenario, latencias in sorted(self.latencias.items()):
+            ordenadas = sorted(latencias)
+            filas.append({
+                "escenario": escenario,
+                "peticiones": len(ordenadas),
+                "errores": self.errores.get(escenario, 0),
+                "p50": percentil(ordenadas, 50),
+                "p95": percentil(ordenadas, 95),
+                "p99": percentil(ordenadas, 99),
+                "rps": len(ordenadas) / duracion if duracion else 0.0,
+            })
+        return filas
+
+
+class UsuarioVirtual:
+    """
+    Simula a un médico usando la aplicación por HTTP con su propia sesión
+    (cookies y conexión keep-alive), como lo haría un navegador.
+    """
+
+    def __init__(self, url_base, paciente_id=None, prefijo_async=False, sesion=None,
+                 textos_unicos=True, espera_sondeo=0.5, timeout=60):
+        self.url_base = url_base.rstrip('/')
+        self.paciente_id = paciente_id
+        self.prefijo = '/async' if prefijo_async else ''
+        self.textos_unicos = textos_unicos
+        self.espera_sondeo = espera_sondeo
+        self.timeout = timeout
+        self.http = requests.Session()
+        if sesion:
+            self.http.cookies.set('sessionid', sesion)
+
+    def _texto(self):
+        caso = uuid.uuid4() if self.textos_unicos else 'fijo'
+        return f"Hombre de 62 años con rectorragia y pérdida de peso. CEA de 7 ng/mL. Caso {caso}"
+
+    def _post_formulario(self, ruta, datos):
+        url = self.url_base + ruta
+        # GET previo para obtener la cookie y el token CSRF, igual que el navegador
+        pagina = self.http.get(url, timeout=self.timeout)
+        token = PATRON_CSRF.search(pagina.text)
+        datos = dict(datos, csrfmiddlewaretoken=token.group(1) if token else '')
+        return self.http.post(url, data=datos, headers={'Referer': url}, timeout=self.timeout)
+
+    def hacer_prediccion(self):
+        respuesta = self._post_formulario(f"{self.prefijo}/hacer-prediccion/", {'texto_clinico': self._texto()})
+        return respuesta.status_code == 200 and not any(m in respuesta.text for m in MARCAS_ERROR)
+
+    def analisis(self):
+        ruta = f"{self.prefijo}/analisis_descrip_clinica/{self.paciente_id}/"
+        respuesta = self._post_formulario(ruta, {'accion': 'analizar', 'texto_clinico': self._texto()})
+
+        # La vista síncrona encola un trabajo: se consulta hasta que el resultado esté listo
+        trabajo = PATRON_TRABAJO.search(respuesta.text)
+        limite = time.monotonic() + self.timeout
+        while trabajo and time.monotonic() < limite:
+            time.sleep(self.espera_sondeo)
+            respuesta = self.http.get(
+                f"{self.url_base}{ruta}?trabajo={trabajo.group(1)}", timeout=self.timeout
+            )
+            trabajo = PATRON_TRABAJO.search(respuesta.text)
+
+        return (respuesta.status_code == 200 and not trabajo
+                and not any(m in respuesta.text for m in MARCAS_ERROR))
+
+
+def ejecutar_carga(url_base, usuarios, duracion, escenarios, **opciones):
+    """
+    Ejecuta `usuarios` usuarios virtuales en paralelo durante `duracion` segundos.
+
+    Cada usuario recorre `escenarios` en ciclo ('hacer_prediccion', 'analisis').
+    Retorna (resultados, duracion_real).
+    """
+    resultados = Resultados()
+    fin = time.monotonic() + duracion
+
+    def usuario(numero):
+        virtual = UsuarioVirtual(url_base, **opciones)
+        paso = numero
+        while time.monotonic() < fin:
+            escenario = escenarios[paso % len(escenarios)]
+            paso += 1
+            inicio = time.monotonic()
+            try:
+                ok = getattr(virtual, escenario)()
+            except requests.RequestException:
+                ok = False
+            resultados.registrar(escenario, time.monotonic() - inicio, ok)
+
+    inicio = time.monotonic()
+    with ThreadPoolExecutor(max_workers=usuarios) as pool:
+        list(pool.map(usuario, range(usuarios)))
+    return resultados, time.monotonic() - inicio
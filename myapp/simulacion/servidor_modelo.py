@@ -0,0 +1,122 @@
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Modelos que devuelve el servidor simulado (mismos nombres de campo que FastAPI)
+MODELOS = ('BETO', 'BioBERT', 'RoBERTa-clinico')
+
+
+def respuesta_simulada(texto):
+    """Construye una respuesta con la misma forma que `/predict_all`."""
+    # Semilla fija por texto: el mismo texto siempre produce la misma predicción
+    azar = random.Random(texto)
+    predicciones = []
+    for modelo in MODELOS:
+        probabilidad_crc = round(azar.uniform(0, 100), 2)
+        predicciones.append({
+            "modelo": modelo,
+            "prediccion": "CRC" if probabilidad_crc >= 50 else "CO",
+            "probabilidad_CO": round(100 - probabilidad_crc, 2),
+            "probabilidad_CRC": probabilidad_crc,
+        })
+
+    votos_crc = sum(1 for p in predicciones if p["prediccion"] == "CRC")
+    votos_co = len(predicciones) - votos_crc
+    return {
+        "predicciones": predicciones,
+        "consenso": {
+            "resultado_general": "CRC" if votos_crc > votos_co else "CO",
+            "porcentaje_acuerdo": round(max(votos_crc, votos_co) * 100 / len(predicciones), 2),
+            "votos_CO": votos_co,
+            "votos_CRC": votos_crc,
+        },
+    }
+
+
+class PerfilLatencia:
+    """
+    Distribución de la latencia simulada del modelo.
+
+    - fija: siempre `media` segundos.
+    - uniforme: entre `media - desviacion` y `media + desviacion`.
+    - normal: normal(media, desviacion), nunca negativa.
+    - lognormal: cola larga con mediana `media` (desviacion es sigma del logaritmo).
+    """
+
+    DISTRIBUCIONES = ('fija', 'uniforme', 'normal', 'lognormal')
+
+    def __init__(self, distribucion='fija', media=0.5, desviacion=0.0):
+        if distribucion not in self.DISTRIBUCIONES:
+            raise ValueError(f"Distribución desconocida: {distribucion}")
+        self.distribucion = distribucion
+        self.media = media
+        self.desviacion = desviacion
+
+    def muestra(self):
+        if self.distribucion == 'uniforme':
+            valor = random.uniform(self.media - self.desviacion, self.media + self.desviacion)
+        elif self.distribucion == 'normal':
+            valor = random.gauss(self.media, self.desviacion)
+        elif self.distribucion == 'lognormal':
+            valor = random.lognormvariate(math.log(max(self.media, 1e-6)), self.desviacion)
+        else:
+            valor = self.media
+        return max(valor, 0.0)
+
+
+class _Manejador(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, como el servidor real
+    perfil = PerfilLatencia()
+    tasa_error = 0.0
+
+    def _responder(self, codigo, datos):
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def do_POST(self):
+        longitud = int(self.headers.get("Content-Length", 0))
+        cuerpo = json.loads(self.rfile.read(longitud) or b"{}")
+
+        if self.path.rstrip("/") != "/predict_all":
+            self._responder(404, b'{"detail": "Not Found"}')
+            return
+
+        time.sleep(self.perfil.muestra())
+
+        if random.random() < self.tasa_error:
+            codigo = random.choice((500, 503))
+            self._responder(codigo, json.dumps({"detail": "Error simulado del modelo"}).encode("utf-8"))
+            return
+
+        self._responder(200, json.dumps(respuesta_simulada(cuerpo.get("text", ""))).encode("utf-8"))
+
+    def log_message(self, *args):
+        pass
+
+
+def crear_servidor(puerto=0, latencia=0.5, distribucion='fija', desviacion=0.0, tasa_error=0.0, host="127.0.0.1"):
+    """Crea (sin iniciar) el servidor simulado con el perfil de latencia y errores indicado."""
+    manejador = type("Manejador", (_Manejador,), {
+        "perfil": PerfilLatencia(distribucion, latencia, desviacion),
+        "tasa_error": tasa_error,
+    })
+    servidor = ThreadingHTTPServer((host, puerto), manejador)
+    servidor.daemon_threads = True
+    return servidor
+
+
+def iniciar_servidor(puerto=0, latencia=0.5, host="127.0.0.1", **opciones):
+    """
+    Inicia el servidor simulado en un hilo de fondo.
+
+    Retorna (servidor, url_predict_all). Con puerto=0 se elige uno libre.
+    """
+    servidor = crear_servidor(puerto, latencia, host=host, **opciones)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f"http://{host}:{servidor.server_address[1]}/predict_all"
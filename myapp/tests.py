@@ -1,3 +1,77 @@
-from django.test import TestCase
+from datetime import date
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.test import AsyncClient, TestCase
+
+from .models import AppUser, CodigoVerificacion, Paciente, TrabajoPrediccion
+from .services import codigos_verificacion, resultados_temporales, trabajos_prediccion
+
+
+class LoginAsyncTests(TestCase):
+    def setUp(self):
+        AppUser.objects.create(
+            first_name="Ana", last_name="Pérez", email="ana@example.com", password="clave-segura",
+        )
+
+    async def test_login_con_sesion_existente(self):
+        """Con una cookie de sesión ya guardada, la vista asíncrona no debe tocar la sesión en modo síncrono."""
+        cliente = AsyncClient()
+        sesion = await sync_to_async(lambda: cliente.session)()
+        await sesion.aset("otro_dato", "valor")
+        await sesion.asave()
+        cliente.cookies["sessionid"] = sesion.session_key
+
+        respuesta = await cliente.post(
+            "/async/login/", {"email": "ana@example.com", "password": "clave-segura"},
+        )
+
+        self.assertEqual(respuesta.status_code, 302)
+        sesion_final = await sync_to_async(lambda: cliente.session)()
+        self.assertEqual(await sesion_final.aget("user_email"), "ana@example.com")
+
+
+class CodigosVerificacionTests(TestCase):
+    def test_intentos_agotados_invalidan_el_codigo(self):
+        email = "ana@example.com"
+        codigo = codigos_verificacion.generar(email, codigos_verificacion.LOGIN)
+        incorrecto = "000000" if codigo != "000000" else "111111"
+
+        for _ in range(codigos_verificacion.CODIGO_MAX_INTENTOS):
+            self.assertEqual(
+                codigos_verificacion.verificar(email, codigos_verificacion.LOGIN, incorrecto),
+                codigos_verificacion.INCORRECTO,
+            )
+
+        # Sin intentos disponibles ni el código correcto se compara
+        self.assertEqual(
+            codigos_verificacion.verificar(email, codigos_verificacion.LOGIN, codigo),
+            codigos_verificacion.VENCIDO,
+        )
+        self.assertFalse(CodigoVerificacion.objects.filter(email=email).exists())
+
+
+class ResultadosTemporalesTests(TestCase):
+    def test_token_de_un_solo_uso(self):
+        paciente = Paciente.objects.create(
+            tipo_identificacion="CC", numero_identificacion="1001", primer_nombre="Ana",
+            primer_apellido="Pérez", estado_civil="SOLTERO", fecha_nacimiento=date(1980, 5, 1),
+            pais_nacimiento="Colombia", sexo="F", direccion_residencia="Calle 1", telefono="3000000000",
+        )
+        token = resultados_temporales.guardar(paciente, "texto", {"consenso": "CO"})
+
+        self.assertIsNotNone(resultados_temporales.consumir(token, paciente))
+        self.assertIsNone(resultados_temporales.consumir(token, paciente))
+
+
+class TrabajosPrediccionTests(TestCase):
+    def test_fallo_tras_el_reclamo_deja_el_trabajo_en_error(self):
+        trabajo = TrabajoPrediccion.objects.create(texto_clinico="texto")
+
+        with mock.patch.object(trabajos_prediccion, "obtener_predicciones", return_value={"consenso": "CO"}), \
+                mock.patch.object(TrabajoPrediccion, "save", side_effect=RuntimeError("sin conexión")):
+            self.assertTrue(trabajos_prediccion.procesar_trabajo(trabajo.pk))
+
+        trabajo.refresh_from_db()
+        self.assertEqual(trabajo.estado, "ERROR")
+        self.assertIn("sin conexión", trabajo.error)
@@ -12,12 +12,27 @@ urlpatterns = [
     path('logout/', views.logout_view, name="logout"),
     path('home/', views.home, name='home'),
     path("hacer-prediccion/", views.hacer_prediccion, name="hacer_prediccion"),
+    path("prediccion-lote/", views.prediccion_lote, name="prediccion_lote"),
+    path("prediccion-lote/<int:lote_id>/estado/", views.estado_lote, name="estado_lote"),
+    path("prediccion-lote/<int:lote_id>/descargar/", views.descargar_lote, name="descargar_lote"),
+    path("estado-servicio-nlp/", views.estado_servicio_nlp, name="estado_servicio_nlp"),
+    path("metricas-autenticacion/", views.metricas_autenticacion, name="metricas_autenticacion"),
+    path("exactitud-modelos/", views.exactitud_modelos, name="exactitud_modelos"),
+    path("estadisticas/", views.estadisticas, name="estadisticas"),
+    path("estadisticas/datos/", views.estadisticas_datos, name="estadisticas_datos"),
+    path("exportar-casos/", views.exportar_casos, name="exportar_casos"),
     path('error_404/', views.error_404, name='error_404'),
     path('crear_paciente/', views.crear_paciente, name='crear_paciente'),
     path('lista_pacientes/', views.lista_pacientes, name='lista_pacientes'),
     path('agregar_historia_clinica/<int:pk>/', views.agregar_historia_clinica, name='agregar_historia_clinica'),
     path('analisis_descrip_clinica/<int:pk>/', views.analisis_descrip_clinica, name='analisis_descrip_clinica'),
+    path('estado_prediccion/<int:trabajo_id>/', views.estado_prediccion, name='estado_prediccion'),
+    path('async/login/', views.login_view_async, name='login_async'),
+    path('async/hacer-prediccion/', views.hacer_prediccion_async, name='hacer_prediccion_async'),
+    path('async/analisis_descrip_clinica/<int:pk>/', views.analisis_descrip_clinica_async, name='analisis_descrip_clinica_async'),
     path('historial_clinico/<int:pk>/', views.historial_clinico, name='historial_clinico'),
+    path('historial_clinico/<int:pk>/linea/', views.historial_clinico_linea, name='historial_clinico_linea'),
+    path('historial_clinico/<int:pk>/registro/<str:tipo>/<int:registro_id>/', views.historial_clinico_registro, name='historial_clinico_registro'),
     path('perfil/', views.perfil_view, name='perfil'),
     path('biblioteca_medica/', views.biblioteca_medica, name='biblioteca_medica'),
     path('noticias/', views.noticias_view, name='noticias'),
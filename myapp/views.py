@@ -1,18 +1,32 @@
-from itertools import zip_longest
-import json
 import re
 from django.shortcuts import render, redirect, get_object_or_404
-from .models import AppUser, Paciente, HistoriaClinica, RecursoMedico, Noticia
-from django.contrib.auth.hashers import make_password
-from django.core.mail import send_mail
-from .services.prediccion_service import obtener_predicciones
+from .models import AppUser, Paciente, HistoriaClinica, RecursoMedico, Noticia, TrabajoPrediccion, LotePrediccion, PrediccionModelo
+from .services.prediccion_service import obtener_predicciones, estado_servicio
+from .services.prediccion_async import obtener_predicciones_async
+from .services import trabajos_prediccion, lote_prediccion, resultados_temporales
+from .services.estadisticas_modelos import exactitud_por_modelo
+from .services import exportacion_casos
+from .services.paginacion import paginar_por_clave
+from .services import busqueda_pacientes, linea_tiempo, contadores, estadisticas_analisis, correo_saliente, codigos_verificacion, autenticacion, sesion_usuario
+from .decorators import sesion_requerida
 from .forms import PacienteForm, HistoriaClinicaForm, AnalisisFinal, PerfilForm, SoporteForm
 from datetime import date
 from django.db import transaction
 from django.forms import inlineformset_factory
-from django.http import JsonResponse
+from django.http import JsonResponse, HttpResponse, Http404, StreamingHttpResponse
+from asgiref.sync import sync_to_async
 from django.template.loader import render_to_string
-from django.db.models import Q
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.conf import settings
+
+ORDEN_PACIENTES = ('primer_apellido', 'primer_nombre', 'id')
+
+# Mensaje que se muestra según el resultado de verificar un código
+_ERRORES_CODIGO = {
+    codigos_verificacion.INCORRECTO: "Código incorrecto.",
+    codigos_verificacion.VENCIDO: "El código venció o superó el número de intentos. Solicita uno nuevo.",
+}
 
 def handler404(request, exception):
     return redirect('error_404')
@@ -47,13 +61,38 @@ def welcome(request):
     """
     return render(request, 'welcome.html')
 
+def _enviar_codigo_login(user):
+    """Genera el código de inicio de sesión y deja en cola el correo que lo envía."""
+    codigo = codigos_verificacion.generar(user.email, codigos_verificacion.LOGIN)
+    correo_saliente.encolar(
+        "🔐 Tu código de verificación - NEX",
+        f"""
+        Hola {user.first_name}.
+
+        Hemos recibido una solicitud para acceder a tu cuenta en NEX. 
+        Para completar el inicio de sesión, ingresa el siguiente código de verificación:
+
+        🔑 {codigo}
+
+        Este código es válido por {codigos_verificacion.CODIGO_VALIDEZ_MINUTOS} minutos. Si no solicitaste este acceso, puedes ignorar este mensaje.
+
+        Si necesitas ayuda, contáctanos en cancerproyecto0@gmail.com.
+
+        Saludos,  
+        El equipo de NEX
+        """,
+        [user.email],
+        remitente=user.email,
+    )
+
 def login_view(request):
     """
     Vista que gestiona el inicio de sesión de los usuarios.
 
     Esta función maneja la autenticación de usuarios verificando su correo y contraseña.
-    Si las credenciales son correctas, genera un código de verificación y lo envía por
-    correo electrónico para completar el inicio de sesión.
+    Si las credenciales son correctas, genera un código de verificación y deja en la
+    cola de salida el correo que lo envía (ver `correo_saliente`), para completar el
+    inicio de sesión sin esperar al servidor SMTP.
 
     Parámetros:
     -----------
@@ -74,42 +113,61 @@ def login_view(request):
         email = request.POST.get("email")
         password = request.POST.get("password")
 
+        # Límite por IP y por correo antes de calcular el hash de la contraseña
+        error = autenticacion.limitar(request, email)
+        if error:
+            return render(request, "login.html", {"error": error}, status=429)
+
         try:
             user = AppUser.objects.get(email=email)
         except AppUser.DoesNotExist:
             return render(request, "login.html", {"error": "Correo no registrado."})
 
         # Verificar contraseña
-        if not user.check_password(password):
+        if not autenticacion.verificar_password(user, password):
             return render(request, "login.html", {"error": "Contraseña incorrecta."})
 
-        # Generar y enviar código de verificación
-        user.generate_verification_code()
-        send_mail(
-            "🔐 Tu código de verificación - NEX",
-            f"""
-            Hola {user.first_name}.
+        # Contraseña correcta: se reinicia el límite de intentos del correo
+        autenticacion.login_exitoso(user.email)
 
-            Hemos recibido una solicitud para acceder a tu cuenta en NEX. 
-            Para completar el inicio de sesión, ingresa el siguiente código de verificación:
+        # Generar el código y dejar el correo en cola (se envía fuera de la petición)
+        _enviar_codigo_login(user)
 
-            🔑 {user.verification_code}
+        # Guardar el email en la sesión temporalmente
+        request.session["user_email"] = user.email  
+        return redirect("verify_code")  
 
-            Este código es válido por 10 minutos. Si no solicitaste este acceso, puedes ignorar este mensaje.
+    return render(request, "login.html")
 
-            Si necesitas ayuda, contáctanos en cancerproyecto0@gmail.com.
+async def login_view_async(request):
+    """
+    Versión asíncrona de `login_view` para el servidor ASGI.
 
-            Saludos,  
-            El equipo de NEX
-            """,
-            user.email,  
-            [user.email],
-            fail_silently=False,
-        )
+    El hash de la contraseña se calcula en el pool acotado de `autenticacion`,
+    así el event loop sigue atendiendo otras peticiones mientras tanto.
+    """
+    if request.method == "POST":
+        email = request.POST.get("email")
+        password = request.POST.get("password")
 
-        # Guardar el email en la sesión temporalmente
-        request.session["user_email"] = user.email  
-        return redirect("verify_code")  
+        # Límite por IP y por correo antes de calcular el hash de la contraseña
+        error = autenticacion.limitar(request, email)
+        if error:
+            return render(request, "login.html", {"error": error}, status=429)
+
+        user = await AppUser.objects.filter(email=email).afirst()
+        if user is None:
+            return render(request, "login.html", {"error": "Correo no registrado."})
+
+        if not await autenticacion.verificar_password_async(user, password):
+            return render(request, "login.html", {"error": "Contraseña incorrecta."})
+
+        autenticacion.login_exitoso(user.email)
+        await sync_to_async(_enviar_codigo_login)(user)
+
+        # Acceso asíncrono: con una sesión existente el backend de BD consultaría la tabla
+        await request.session.aset("user_email", user.email)
+        return redirect("verify_code")
 
     return render(request, "login.html")
 
@@ -168,12 +226,17 @@ def register(request):
         if AppUser.objects.filter(email=email).exists():
             return render(request, 'register.html', {'error': 'El correo ya está en uso'})
 
+        # Límite por IP antes de calcular el hash de la contraseña
+        error = autenticacion.limitar(request)
+        if error:
+            return render(request, 'register.html', {'error': error}, status=429)
+
         # Guarda el usuario con la contraseña encriptada
         user = AppUser(
             first_name=first_name,
             last_name=last_name,
             email=email,
-            password=make_password(password)  # Encripta la contraseña
+            password=autenticacion.crear_hash(password)  # Encripta la contraseña
         )
         user.save()
 
@@ -211,12 +274,11 @@ def verify_code(request):
     if request.method == "POST":
         code = request.POST.get("code")
 
-        try:
-            user = AppUser.objects.get(email=email, verification_code=code)
-            request.session["authenticated_user"] = user.email  # Marca al usuario como autenticado
+        resultado = codigos_verificacion.verificar(email, codigos_verificacion.LOGIN, code)
+        if resultado == codigos_verificacion.VALIDO:
+            request.session["authenticated_user"] = email  # Marca al usuario como autenticado
             return redirect("home")  # Redirige a la página de inicio
-        except AppUser.DoesNotExist:
-            return render(request, "verify_code.html", {"error": "Código incorrecto."})
+        return render(request, "verify_code.html", {"error": _ERRORES_CODIGO[resultado]})
 
     return render(request, "verify_code.html")
 
@@ -238,7 +300,7 @@ def forgot_password(request):
     Retorna:
     --------
     django.http.HttpResponse
-        - Si el correo está registrado, genera un código, lo envía y redirige a `verify_reset_code`.
+        - Si el correo está registrado, genera un código, encola el correo y redirige a `verify_reset_code`.
         - Si el correo no está registrado, muestra `forgot_password.html` con un mensaje de error.
         - Si la solicitud no es POST, muestra el formulario `forgot_password.html`.
     """
@@ -250,9 +312,9 @@ def forgot_password(request):
         except AppUser.DoesNotExist:
             return render(request, "forgot_password.html", {"error": "Correo no registrado."})
 
-        # Generar y enviar código de verificación
-        user.generate_verification_code()
-        send_mail(
+        # Generar el código y dejar el correo en cola (se envía fuera de la petición)
+        codigo = codigos_verificacion.generar(user.email, codigos_verificacion.RECUPERACION)
+        correo_saliente.encolar(
             "🔐 Recuperación de contraseña - NEX",
             f"""
             Hola {user.first_name},
@@ -260,16 +322,15 @@ def forgot_password(request):
             Has solicitado restablecer tu contraseña en NEX.  
             Usa el siguiente código para continuar con el proceso:
 
-            🔑 {user.verification_code}
+            🔑 {codigo}
 
             Si no solicitaste esto, ignora este mensaje.
 
             Saludos,  
             El equipo de NEX
             """,
-            user.email,
             [user.email],
-            fail_silently=False,
+            remitente=user.email,
         )
 
         request.session["reset_email"] = user.email  # Guardar email temporalmente
@@ -308,12 +369,11 @@ def verify_reset_code(request):
     if request.method == "POST":
         code = request.POST.get("code")
 
-        try:
-            user = AppUser.objects.get(email=email, verification_code=code)
+        resultado = codigos_verificacion.verificar(email, codigos_verificacion.RECUPERACION, code)
+        if resultado == codigos_verificacion.VALIDO:
             request.session["verified_reset"] = True  # Marcar como verificado
             return redirect("reset_password")  # Redirigir al cambio de contraseña
-        except AppUser.DoesNotExist:
-            return render(request, "verify_reset_code.html", {"error": "Código incorrecto."})
+        return render(request, "verify_reset_code.html", {"error": _ERRORES_CODIGO[resultado]})
 
     return render(request, "verify_reset_code.html")
 
@@ -371,10 +431,15 @@ def reset_password(request):
             return render(request, 'reset_password.html', {'error': 'Incluir al menos 1 carácter especial.'})
 
 
-        user = AppUser.objects.get(email=email)
-        user.password = make_password(new_password)  # Guardar la nueva contraseña encriptada
-        user.verification_code = None  # Eliminar el código usado
-        user.save()
+        # Límite por IP antes de calcular el hash de la contraseña
+        error = autenticacion.limitar(request)
+        if error:
+            return render(request, 'reset_password.html', {'error': error}, status=429)
+
+        # Solo se reescribe la contraseña (encriptada); el código ya se consumió al verificarlo
+        AppUser.objects.filter(email=email).update(password=autenticacion.crear_hash(new_password))
+        # update() no emite señales: se descarta a mano el usuario guardado en memoria
+        sesion_usuario.invalidar(email)
 
         # Limpiar sesión
         del request.session["reset_email"]
@@ -404,6 +469,7 @@ def logout_view(request):
     request.session.flush()  # Elimina todas las variables de sesión
     return redirect("login")  # Redirige al login
 
+@sesion_requerida
 def home(request):
     """
     Vista que muestra la página principal de la aplicación.
@@ -422,16 +488,12 @@ def home(request):
         - Si el usuario está autenticado, renderiza `home.html`.
         - Si no está autenticado, lo redirige a `login`.
     """
-    if not request.session.get("authenticated_user"):
-        return redirect("login")
-
-    # --- LÓGICA PARA CONTAR REGISTROS ---
-    total_pacientes = Paciente.objects.count()      # Cuenta total de pacientes
-    total_predicciones = AnalisisFinal.objects.count() # Cuenta total de predicciones
+    # --- CONTADORES (mantenidos por señales, sin COUNT(*) sobre las tablas) ---
+    totales = contadores.obtener_todos()
 
     context = {
-        "total_pacientes": total_pacientes,
-        "total_predicciones": total_predicciones
+        "total_pacientes": totales["pacientes"],      # Cuenta total de pacientes
+        "total_predicciones": totales["analisis"]     # Cuenta total de predicciones
     }
 
     return render(request, "home.html", context)
@@ -459,6 +521,167 @@ def hacer_prediccion(request):
 
     return render(request, "hacer_prediccion.html", contexto)
 
+@sesion_requerida
+def prediccion_lote(request):
+    """
+    Vista para puntuar un archivo CSV o JSONL de descripciones clínicas.
+
+    El archivo se procesa en segundo plano con un pool de hilos acotado; la
+    página consulta el progreso y, al terminar, permite descargar el CSV de resultados.
+    """
+    contexto = {
+        "lote": None,
+        "error": None,
+        "lotes_recientes": LotePrediccion.objects.only(
+            "id", "nombre_archivo", "estado", "total_filas", "procesadas", "fecha_creacion"
+        )[:10],
+    }
+
+    if request.method == "POST":
+        archivo = request.FILES.get("archivo")
+
+        if not archivo:
+            contexto["error"] = "Debes seleccionar un archivo CSV o JSONL."
+        else:
+            try:
+                contexto["lote"] = lote_prediccion.crear_lote(archivo.name, archivo.read())
+            except lote_prediccion.ArchivoLoteInvalido as e:
+                contexto["error"] = str(e)
+            except UnicodeDecodeError:
+                contexto["error"] = "El archivo debe estar codificado en UTF-8."
+
+    elif request.GET.get("lote"):
+        contexto["lote"] = LotePrediccion.objects.defer("resultado_csv", "entrada").filter(pk=request.GET["lote"]).first()
+
+    return render(request, "prediccion_lote.html", contexto)
+
+@sesion_requerida(json=True)
+def estado_lote(request, lote_id):
+    """Endpoint JSON con el progreso de un lote de predicción."""
+    lote = get_object_or_404(LotePrediccion.objects.defer("resultado_csv", "entrada"), pk=lote_id)
+    if lote.estado in ('PENDIENTE', 'PROCESANDO'):
+        # La espera de la página recupera los lotes que un reinicio dejó a medias
+        lote_prediccion.recuperar_huerfanos()
+
+    return JsonResponse({
+        "id": lote.pk,
+        "estado": lote.estado,
+        "total_filas": lote.total_filas,
+        "procesadas": lote.procesadas,
+        "con_error": lote.con_error,
+        "porcentaje": lote.porcentaje,
+        "terminado": lote.estado in ('COMPLETADO', 'ERROR'),
+        "error": lote.error,
+    })
+
+@sesion_requerida
+def descargar_lote(request, lote_id):
+    """Descarga el CSV de resultados de un lote terminado."""
+    lote = get_object_or_404(LotePrediccion, pk=lote_id, estado='COMPLETADO')
+
+    nombre = lote.nombre_archivo.rsplit('.', 1)[0].replace('"', '')
+    response = HttpResponse(lote.resultado_csv, content_type="text/csv; charset=utf-8")
+    response["Content-Disposition"] = f'attachment; filename="resultados_{nombre}.csv"'
+    return response
+
+@sesion_requerida(json=True)
+def estado_servicio_nlp(request):
+    """Endpoint JSON con el estado del circuito, la concurrencia y la caché del servicio NLP."""
+    return JsonResponse(estado_servicio())
+
+@sesion_requerida(json=True)
+def metricas_autenticacion(request):
+    """Endpoint JSON con los intentos rechazados por límite y los hashes calculados en este proceso."""
+    return JsonResponse(autenticacion.estadisticas())
+
+@sesion_requerida(json=True)
+def exactitud_modelos(request):
+    """
+    Endpoint JSON con la exactitud de cada modelo NLP frente al diagnóstico final.
+
+    Acepta `desde` y `hasta` (AAAA-MM-DD) para limitar el periodo.
+    """
+    try:
+        desde = date.fromisoformat(request.GET["desde"]) if request.GET.get("desde") else None
+        hasta = date.fromisoformat(request.GET["hasta"]) if request.GET.get("hasta") else None
+    except ValueError:
+        return JsonResponse({"error": "Las fechas deben tener el formato AAAA-MM-DD."}, status=400)
+
+    return JsonResponse({"modelos": exactitud_por_modelo(desde, hasta)})
+
+def _parametros_estadisticas(request):
+    """Lee `periodo` (dia o mes), `desde` y `hasta` (AAAA-MM-DD). Lanza ValueError si no son válidos."""
+    periodo = 'D' if request.GET.get("periodo") == 'dia' else 'M'
+    desde = date.fromisoformat(request.GET["desde"]) if request.GET.get("desde") else None
+    hasta = date.fromisoformat(request.GET["hasta"]) if request.GET.get("hasta") else None
+    return periodo, desde, hasta
+
+@sesion_requerida
+def estadisticas(request):
+    """
+    Página de estadísticas de CCR/CO por periodo, rango de edad, sexo y nivel de acuerdo.
+
+    Lee solo las estadísticas precalculadas (ver el comando actualizar_estadisticas).
+    """
+    error = None
+    try:
+        periodo, desde, hasta = _parametros_estadisticas(request)
+    except ValueError:
+        error = "Las fechas deben tener el formato AAAA-MM-DD."
+        periodo, desde, hasta = 'M', None, None
+
+    datos = estadisticas_analisis.consultar(periodo, desde, hasta)
+    maximo = max([punto['total'] for punto in datos['serie']], default=0)
+
+    return render(request, 'estadisticas.html', {
+        'datos': datos,
+        'maximo_serie': maximo,
+        'periodo': 'dia' if periodo == 'D' else 'mes',
+        'desde': desde,
+        'hasta': hasta,
+        'error': error,
+    })
+
+@sesion_requerida(json=True)
+def estadisticas_datos(request):
+    """
+    Endpoint JSON con las mismas estadísticas de la página, para gráficas.
+
+    Acepta `periodo` (dia o mes), `desde` y `hasta` (AAAA-MM-DD).
+    """
+    try:
+        periodo, desde, hasta = _parametros_estadisticas(request)
+    except ValueError:
+        return JsonResponse({"error": "Las fechas deben tener el formato AAAA-MM-DD."}, status=400)
+
+    return JsonResponse(estadisticas_analisis.consultar(periodo, desde, hasta))
+
+@sesion_requerida(json=True)
+def exportar_casos(request):
+    """
+    Descarga en streaming los casos etiquetados para reentrenar los modelos.
+
+    Parámetro GET: `desde_id` (exporta los análisis con id mayor). Es de solo
+    lectura: no mueve la marca del comando `exportar_casos --incremental`. Para
+    continuar en la próxima descarga, usar como `desde_id` el encabezado `X-Hasta-Id`.
+    """
+    formato = 'csv' if request.GET.get("formato") == 'csv' else 'jsonl'
+
+    try:
+        desde_id = int(request.GET.get("desde_id", 0))
+    except ValueError:
+        return JsonResponse({"error": "desde_id debe ser un número."}, status=400)
+    # Mismo tope que la exportación incremental: no se salta análisis aún sin confirmar
+    hasta_id = max(exportacion_casos.tope_confirmado(), desde_id)
+
+    lineas = exportacion_casos.lineas(formato, exportacion_casos.consulta_casos(desde_id, hasta_id))
+
+    tipo = "text/csv; charset=utf-8" if formato == 'csv' else "application/x-ndjson; charset=utf-8"
+    response = StreamingHttpResponse(lineas, content_type=tipo)
+    response["Content-Disposition"] = f'attachment; filename="casos_etiquetados_desde_{desde_id}.{formato}"'
+    response["X-Hasta-Id"] = str(hasta_id)
+    return response
+
 def crear_paciente(request):
     if request.method == 'POST':
         # Instanciar el formulario principal con los datos POST
@@ -481,18 +704,33 @@ def crear_paciente(request):
     return render(request, 'crear_paciente.html', context)
 
 def lista_pacientes(request):
-    # Obtener el término de búsqueda de la URL (ej: ?q=12345)
+    # Obtener el término de búsqueda de la URL (ej: ?q=12345 o ?q=munoz)
     busqueda = request.GET.get('q')
 
-    # Si hay búsqueda, filtramos por numero_identificacion
+    # Si hay búsqueda, filtramos por identificación, nombres o teléfono (más relevantes primero)
     if busqueda:
-        pacientes = Paciente.objects.filter(numero_identificacion__icontains=busqueda)
+        pacientes = busqueda_pacientes.buscar_pacientes(busqueda)
+        orden = busqueda_pacientes.ORDEN_RESULTADOS
     else:
         # Si no hay búsqueda, traemos todos
         pacientes = Paciente.objects.all()
+        orden = ORDEN_PACIENTES
+
+    # El resumen clínico llega en la misma consulta (JOIN), sin consultas por fila
+    pacientes = pacientes.select_related('resumen')
+
+    # Paginación por cursor (índice paciente_orden_idx cuando no hay búsqueda)
+    pagina = paginar_por_clave(
+        pacientes,
+        orden,
+        settings.PACIENTES_POR_PAGINA,
+        despues=request.GET.get('despues'),
+        antes=request.GET.get('antes'),
+    )
 
     context = {
-        'pacientes': pacientes,
+        'pacientes': pagina.objetos,
+        'pagina': pagina,
         'titulo': 'Lista de Pacientes Registrados'
     }
     
@@ -536,11 +774,19 @@ def analisis_descrip_clinica(request, pk):
         "paciente": paciente_obj,
         "texto_ingresado": "",
         "resultado_api": None, # Objeto python para mostrar en HTML
-        "json_str": "",        # String JSON para pasar en input oculto
+        "token_resultado": "", # Token del resultado guardado en el servidor
         "error": None,
-        "mensaje_exito": None
+        "mensaje_exito": None,
+        "trabajo": None        # Trabajo en cola mientras el modelo responde
     }
 
+    # --- Resultado de un trabajo encolado (la página vuelve aquí al terminar) ---
+    trabajo_id = request.GET.get("trabajo")
+    if request.method == "GET" and trabajo_id:
+        trabajo = TrabajoPrediccion.objects.filter(pk=trabajo_id, paciente=paciente_obj).first()
+        if trabajo:
+            _cargar_trabajo_en_contexto(trabajo, contexto)
+
     if request.method == "POST":
         accion = request.POST.get("accion") # Identificamos qué botón se oprimió
 
@@ -553,81 +799,242 @@ def analisis_descrip_clinica(request, pk):
                 contexto["error"] = "Debes ingresar una descripción clínica."
             else:
                 try:
-                    # Llamamos a tu función NLP
-                    resultado = obtener_predicciones(texto)
-
-                    if "error" in resultado:
-                        contexto["error"] = resultado["error"]
-                    else:
-                        # Pasamos el resultado al contexto para pintarlo en la tabla
-                        contexto["resultado_api"] = resultado
-                        
-                        # Convertimos a string para guardarlo en un input hidden y no perderlo
-                        contexto["json_str"] = json.dumps(resultado)
-                        
+                    # Encolamos la consulta al modelo NLP; el hilo de la petición no espera la inferencia
+                    trabajo = trabajos_prediccion.encolar(texto, paciente=paciente_obj)
+                    _cargar_trabajo_en_contexto(trabajo, contexto)
+
                 except Exception as e:
                     contexto["error"] = f"Error al conectar con el modelo: {str(e)}"
 
         # --- CASO 2: GUARDAR (El médico confirmó el diagnóstico) ---
         elif accion == "guardar":
-            # Recuperamos los datos de los inputs ocultos (hidden)
-            texto = request.POST.get("texto_clinico_hidden")
-            json_str = request.POST.get("json_resultado_hidden")
-            diagnostico_medico = request.POST.get("diagnostico_final") # 'CCR' o 'CO'
+            _guardar_analisis(paciente_obj, request.POST, contexto)
+
+    return render(request, "analisis_descrip_clinica.html", contexto)
+
+def _guardar_analisis(paciente_obj, datos, contexto):
+    """Registra el AnalisisFinal con el diagnóstico que confirmó el médico."""
+    # El resultado del modelo se recupera del servidor a partir del token del formulario
+    token = datos.get("token_resultado")
+    diagnostico_medico = datos.get("diagnostico_final") # 'CCR' o 'CO'
+
+    if not diagnostico_medico:
+         contexto["error"] = "Debes seleccionar un diagnóstico final antes de guardar."
+    else:
+        try:
+            with transaction.atomic():
+                # El token es de un solo uso: se consume antes de crear el análisis
+                temporal = resultados_temporales.consumir(token, paciente_obj)
+
+                if temporal is None:
+                    contexto["error"] = "El resultado del análisis expiró o ya fue guardado. Vuelve a analizar la descripción."
+                    return
+
+                nuevo_analisis = AnalisisFinal(
+                    paciente=paciente_obj,
+                    predicciones_nlp=temporal.resultado,
+                    diagnostico_final=diagnostico_medico, # Guardamos lo que decidió el médico
+                    texto_clinico=temporal.texto_clinico,
+                    # La historia de la visita es la más reciente del paciente
+                    historia=paciente_obj.historias.order_by('-fecha_visita').only('pk').first()
+                )
+                nuevo_analisis.save()
+
+                # Una fila por modelo para las analíticas de comparación entre modelos
+                PrediccionModelo.objects.bulk_create(PrediccionModelo.construir_desde(nuevo_analisis))
+
+            contexto["mensaje_exito"] = "Historia guardada exitosamente. El diagnóstico final fue registrado."
+            # Limpiamos el formulario
+            contexto["texto_ingresado"] = ""
+            contexto["resultado_api"] = None
+
+        except Exception as e:
+             contexto["error"] = f"Error al guardar en base de datos: {str(e)}"
+
+async def hacer_prediccion_async(request):
+    """
+    Versión asíncrona de `hacer_prediccion` para el servidor ASGI.
+
+    La consulta al modelo se espera con `await`, así un mismo worker ASGI
+    atiende muchas predicciones en curso sin bloquear un hilo por cada una.
+    """
+    contexto = {
+        "texto_ingresado": "",
+        "resultado_api": None,
+        "error": None
+    }
+
+    if request.method == "POST":
+        texto = request.POST.get("texto_clinico", "").strip()
+        contexto["texto_ingresado"] = texto
 
-            if not diagnostico_medico:
-                 contexto["error"] = "Debes seleccionar un diagnóstico final antes de guardar."
+        if texto == "":
+            contexto["error"] = "Debes ingresar una descripción clínica."
+        else:
+            resultado = await obtener_predicciones_async(texto)
+
+            if "error" in resultado:
+                contexto["error"] = resultado["error"]
             else:
-                try:
-                    # Convertimos el string JSON de vuelta a diccionario/JSON
-                    predicciones_json = json.loads(json_str)
+                contexto["resultado_api"] = resultado
 
-                    nuevo_analisis = AnalisisFinal(
-                        paciente=paciente_obj,
-                        predicciones_nlp=predicciones_json,
-                        diagnostico_final=diagnostico_medico # Guardamos lo que decidió el médico
+    return render(request, "hacer_prediccion.html", contexto)
+
+async def analisis_descrip_clinica_async(request, pk):
+    """
+    Versión asíncrona de `analisis_descrip_clinica` para el servidor ASGI.
+
+    A diferencia de la versión síncrona, "analizar" no encola un trabajo: espera
+    directamente la respuesta del modelo sin ocupar un hilo del worker.
+    """
+    try:
+        paciente_obj = await Paciente.objects.aget(pk=pk)
+    except Paciente.DoesNotExist:
+        raise Http404("Paciente no encontrado")
+
+    contexto = {
+        "paciente": paciente_obj,
+        "texto_ingresado": "",
+        "resultado_api": None, # Objeto python para mostrar en HTML
+        "token_resultado": "", # Token del resultado guardado en el servidor
+        "error": None,
+        "mensaje_exito": None
+    }
+
+    if request.method == "POST":
+        accion = request.POST.get("accion")
+
+        if accion == "analizar":
+            texto = request.POST.get("texto_clinico", "").strip()
+            contexto["texto_ingresado"] = texto
+
+            if not texto:
+                contexto["error"] = "Debes ingresar una descripción clínica."
+            else:
+                resultado = await obtener_predicciones_async(texto)
+
+                if "error" in resultado:
+                    contexto["error"] = resultado["error"]
+                else:
+                    contexto["resultado_api"] = resultado
+                    contexto["token_resultado"] = await sync_to_async(resultados_temporales.guardar)(
+                        paciente_obj, texto, resultado
                     )
-                    nuevo_analisis.save()
 
-                    contexto["mensaje_exito"] = "Historia guardada exitosamente. El diagnóstico final fue registrado."
-                    # Limpiamos el formulario
-                    contexto["texto_ingresado"] = ""
-                    contexto["resultado_api"] = None
-                
-                except Exception as e:
-                     contexto["error"] = f"Error al guardar en base de datos: {str(e)}"
+        elif accion == "guardar":
+            await sync_to_async(_guardar_analisis)(paciente_obj, request.POST, contexto)
 
     return render(request, "analisis_descrip_clinica.html", contexto)
 
+def _cargar_trabajo_en_contexto(trabajo, contexto):
+    """Pasa al contexto el resultado, el error o el trabajo pendiente según su estado."""
+    contexto["texto_ingresado"] = trabajo.texto_clinico
+
+    if trabajo.estado == 'COMPLETADO':
+        # Pasamos el resultado al contexto para pintarlo en la tabla
+        contexto["resultado_api"] = trabajo.resultado
+        # El resultado queda en el servidor; el formulario solo lleva el token
+        contexto["token_resultado"] = resultados_temporales.guardar(
+            contexto["paciente"], trabajo.texto_clinico, trabajo.resultado
+        )
+    elif trabajo.estado == 'ERROR':
+        contexto["error"] = trabajo.error
+    else:
+        contexto["trabajo"] = trabajo
+
+@sesion_requerida(json=True)
+def estado_prediccion(request, trabajo_id):
+    """
+    Endpoint JSON que la página consulta periódicamente para saber si el
+    trabajo de predicción ya terminó.
+    """
+    trabajo = get_object_or_404(TrabajoPrediccion, pk=trabajo_id)
+    if not trabajo.terminado:
+        # Sin el comando `procesar_predicciones`, la espera de la página recupera los trabajos huérfanos
+        trabajos_prediccion.recuperar_huerfanos()
+
+    datos = {
+        "id": trabajo.pk,
+        "estado": trabajo.estado,
+        "terminado": trabajo.terminado,
+    }
+    if trabajo.estado == 'COMPLETADO':
+        datos["resultado"] = trabajo.resultado
+    elif trabajo.estado == 'ERROR':
+        datos["error"] = trabajo.error
+
+    return JsonResponse(datos)
+
+def _contar(modelo):
+    # Subconsulta COUNT(*) por paciente, para anotarla en la misma consulta del paciente
+    return Coalesce(Subquery(
+        modelo.objects.filter(paciente=OuterRef('pk')).order_by().values('paciente')
+        .annotate(total=Count('pk')).values('total')
+    ), 0)
+
 def historial_clinico(request, pk):
-    paciente = get_object_or_404(Paciente, pk=pk)
-    
-    # Obtenemos ambas listas ordenadas por fecha descendente
-    historias = paciente.historias.all().order_by('-fecha_visita')
-    analisis = paciente.analisis_finales.all().order_by('-fecha_analisis')
-    
-    # "Emparejamos" las listas. 
-    # Esto crea pares: (Historia 1, Analisis 1), (Historia 2, Analisis 2)...
-    registros_combinados = zip_longest(historias, analisis, fillvalue=None)
+    # El paciente y los totales de historias y análisis se obtienen en una sola consulta
+    paciente = get_object_or_404(
+        Paciente.objects.annotate(
+            total_historias=_contar(HistoriaClinica),
+            total_analisis=_contar(AnalisisFinal),
+        ),
+        pk=pk,
+    )
+
+    # Primera página de la línea de tiempo (historias y análisis mezclados por fecha)
+    registros, cursor_siguiente = linea_tiempo.pagina_linea_tiempo(paciente, settings.HISTORIAL_POR_PAGINA)
 
     context = {
         'paciente': paciente,
-        'registros_combinados': registros_combinados, # Enviamos los pares al HTML
-        'total_historias': historias.count(),
-        'total_analisis': analisis.count(),
+        'registros': registros,
+        'cursor_siguiente': cursor_siguiente,
+        'total_historias': paciente.total_historias,
+        'total_analisis': paciente.total_analisis,
     }
     return render(request, 'historial_clinico.html', context)
 
+@sesion_requerida(json=True)
+def historial_clinico_linea(request, pk):
+    """Endpoint JSON con la siguiente página de la línea de tiempo (scroll infinito)."""
+    paciente = get_object_or_404(Paciente.objects.only('pk'), pk=pk)
+    registros, cursor_siguiente = linea_tiempo.pagina_linea_tiempo(
+        paciente, settings.HISTORIAL_POR_PAGINA, cursor=request.GET.get('cursor')
+    )
+
+    html = render_to_string(
+        'historial_clinico_registros.html', {'paciente': paciente, 'registros': registros}, request=request
+    )
+    return JsonResponse({
+        "html": html,
+        "cursor_siguiente": cursor_siguiente,
+        "registros": [
+            {"tipo": r["tipo"], "id": r["id"], "fecha": r["fecha"].isoformat()} for r in registros
+        ],
+    })
+
+@sesion_requerida(json=True)
+def historial_clinico_registro(request, pk, tipo, registro_id):
+    """Endpoint JSON con el contenido completo de una tarjeta de la línea de tiempo."""
+    paciente = get_object_or_404(Paciente.objects.only('pk'), pk=pk)
+    registro = linea_tiempo.obtener_registro(paciente, tipo, registro_id)
+    if registro is None:
+        return JsonResponse({"error": "Registro no encontrado."}, status=404)
+
+    html = render_to_string('historial_clinico_detalle.html', {'tipo': tipo, 'registro': registro}, request=request)
+    return JsonResponse({"html": html})
+
+@sesion_requerida
 def perfil_view(request):
-    # 1. Verificar sesión (Obteniendo el email como corregimos antes)
-    user_email = request.session.get("authenticated_user")
-    if not user_email:
-        return redirect("login")
-
-    # 2. Obtener usuario usando el email
-    usuario = get_object_or_404(AppUser, email=user_email)
+    # 1. Usuario de la sesión (cargado una sola vez por el middleware)
+    usuario = request.usuario
+    if not usuario:
+        raise Http404("Usuario no encontrado.")
 
     if request.method == 'POST':
+        # La validación del formulario reemplaza los datos del objeto; se guardan antes
+        password_actual = usuario.password
+        email_actual = usuario.email
         form = PerfilForm(request.POST, instance=usuario)
         
         # Aquí Django ejecuta clean_password automáticamente
@@ -643,12 +1050,14 @@ def perfil_view(request):
             else:
                 # Si venía vacía (None), recuperamos la contraseña vieja
                 # para que no se guarde vacía ni se re-encripte lo que no es.
-                user_obj.password = AppUser.objects.get(id=usuario.id).password
+                user_obj.password = password_actual
 
             user_obj.save()
             
             # Actualizamos la sesión por si cambió el correo
             request.session["authenticated_user"] = user_obj.email
+            # La señal de AppUser descarta el correo nuevo de la memoria; aquí, el anterior
+            sesion_usuario.invalidar(email_actual)
             
             return redirect('home')
     else:
@@ -656,11 +1065,8 @@ def perfil_view(request):
 
     return render(request, 'perfil.html', {'form': form})
 
+@sesion_requerida
 def biblioteca_medica(request):
-    # Verificamos sesión
-    if not request.session.get("authenticated_user"):
-        return redirect("login")
-
     # Filtramos por tipo para enviarlos separados
     libros = RecursoMedico.objects.filter(tipo='LIBRO')
     articulos = RecursoMedico.objects.filter(tipo='ARTICULO')
@@ -673,18 +1079,14 @@ def biblioteca_medica(request):
     }
     return render(request, 'biblioteca_medica.html', context)
 
+@sesion_requerida
 def noticias_view(request):
-    if not request.session.get("authenticated_user"):
-        return redirect("login")
-
     noticias = Noticia.objects.all()
 
     return render(request, 'noticias.html', {'noticias': noticias})
 
+@sesion_requerida
 def soporte_view(request):
-    if not request.session.get("authenticated_user"):
-        return redirect("login")
-
     enviado = False
     if request.method == 'POST':
         form = SoporteForm(request.POST)
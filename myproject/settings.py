@@ -54,12 +54,16 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    # request.usuario: AppUser de la sesión (perezoso). Se guarda USUARIO_CACHE_TTL segundos en la
+    # memoria de cada proceso; con varios workers, USUARIO_CACHE=<alias de CACHES> comparte la caché
+    # para que guardar el perfil la invalide en todos
+    'myapp.middleware.UsuarioSesionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'myapp.middleware.WhiteNoiseAsyncMiddleware',  # WhiteNoise compatible con vistas asíncronas (ASGI)
 ]
 
 ROOT_URLCONF = 'myproject.urls'
@@ -180,6 +184,12 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Pacientes por página en la lista de pacientes
+PACIENTES_POR_PAGINA = int(getenv("PACIENTES_POR_PAGINA", "50"))
+
+# Registros por página en la línea de tiempo del historial clínico
+HISTORIAL_POR_PAGINA = int(getenv("HISTORIAL_POR_PAGINA", "10"))
+
 # Configuracion correos del proyecto 
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.gmail.com'